@@ -1,16 +1,32 @@
 import os
+import gc
 import json
 import re
+import threading
+import time
 import warnings
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import numpy as np
-import pandas as pd
-import requests
-import joblib
 import oracledb
-from flask import Flask, render_template, request
+from flask import Flask, Response, g, jsonify, render_template, request, stream_with_context
 from dotenv import load_dotenv
+from threadpoolctl import threadpool_limits
+
+from batch_inference import BatchPredictor
+from concurrent_io import IoPool
+from batch_predict import iter_batch_predictions, parse_batch_request, to_csv, to_ndjson
+from db_pool import pool_stats
+from fallback_estimator import FallbackEstimator
+from http_cache import CachedBody, RenderedCache, finalize_response
+from kma_client import ForecastMissing, KmaClient, KmaUnavailable, create_rate_limiter
+from metrics import Registry, Trace, log, log_enabled, process_memory
+from model_registry import ModelRegistry, SharedModelVersion
+from prediction_cache import PredictionCache
+from prediction_table import PredictionMaterializer, PredictionTable
+from sales_store import create_sales_store, load_shared_index
+from weather_prefetch import WeatherPrefetcher
+from weather_store import MemoryWeatherStore, create_weather_store
 
 # sklearn 버전 경고 무시
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -24,61 +40,87 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODELS_DIR = os.path.join(BASE_DIR, "models")
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-KMA_SERVICE_KEY = os.getenv("KMA_SERVICE_KEY", "")
-KMA_BASE_URL = "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0"
+# 예측 캐시 설정 (STEP > 0 이면 기온/강수를 그 단위로 반올림해서 캐시 적중률을 높임)
+PRED_CACHE_SIZE = int(os.getenv("PRED_CACHE_SIZE", "20000"))
+PRED_CACHE_TTL = float(os.getenv("PRED_CACHE_TTL", "3600"))
+PRED_CACHE_TEMP_STEP = float(os.getenv("PRED_CACHE_TEMP_STEP", "0"))
+PRED_CACHE_RAIN_STEP = float(os.getenv("PRED_CACHE_RAIN_STEP", "0"))
+
+# 모델 로드 방식: background(기본) | parallel | lazy
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "background")
+MODEL_LOAD_WORKERS = int(os.getenv("MODEL_LOAD_WORKERS", "4"))
+# "r" 이면 모델 안의 큰 numpy 배열을 메모리 매핑으로 읽음 (압축 안 된 joblib만 해당)
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "") or None
+# sklearn(기본) | compiled: sklearn Pipeline 없이 배열 계산으로 추론 (compiled_models.py)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "sklearn")
+
+# /ready 에서 DB 연결을 다시 확인하는 간격(초), 1이면 DB 연결이 돼야 ready
+DB_CHECK_INTERVAL = float(os.getenv("DB_CHECK_INTERVAL", "30"))
+READY_REQUIRE_DB = os.getenv("READY_REQUIRE_DB", "0") == "1"
+
+# 모델 교체/롤백 API 토큰 (비어 있으면 API 비활성)
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN", "")
+# prefork 서버: 교체/롤백한 모델 세트를 게시하는 파일 (다른 워커들이 요청 전에 확인해서 같은 세트로 맞춤)
+MODEL_ACTIVE_FILE = os.getenv("MODEL_ACTIVE_FILE", os.path.join(DATA_DIR, "model_active.json"))
+
+# 실제 데이터 조회와 날씨 조회를 동시에 실행 (1이면 사용), 의존성별 제한 시간(초)
+PREDICT_CONCURRENT_IO = os.getenv("PREDICT_CONCURRENT_IO", "1") == "1"
+PREDICT_IO_WORKERS = int(os.getenv("PREDICT_IO_WORKERS", "16"))
+DB_TIMEOUT_SEC = float(os.getenv("DB_TIMEOUT_SEC", "3"))
+WEATHER_TIMEOUT_SEC = float(os.getenv("WEATHER_TIMEOUT_SEC", "5"))
+
+# 오늘~N일 예측을 미리 계산해서 /predict 에서 먼저 사용 (1이면 사용)
+MATERIALIZE_PREDICTIONS = os.getenv("MATERIALIZE_PREDICTIONS", "0") == "1"
+
+# 통계 대체 예측 사용 방식: off | auto(처리 중 요청이 PREDICT_SHED_INFLIGHT 초과 시) | always
+# 모델이 없거나 실패한 시간대는 방식과 상관없이 통계 대체 예측 사용
+FALLBACK_MODE = os.getenv("FALLBACK_MODE", "off")
+PREDICT_SHED_INFLIGHT = int(os.getenv("PREDICT_SHED_INFLIGHT", "32"))
 
-# Oracle DB 설정 (선생님 서버)
-ORACLE_HOST = os.getenv("ORACLE_HOST", "210.121.189.12")
-ORACLE_PORT = int(os.getenv("ORACLE_PORT", "1521"))
-ORACLE_SID = os.getenv("ORACLE_SID", "xe")
-ORACLE_USER = os.getenv("ORACLE_USER", "scott")
-ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD", "tiger")
+# 날씨 캐시 백그라운드 예열 (1이면 사용)
+WEATHER_PREFETCH = os.getenv("WEATHER_PREFETCH", "0") == "1"
+# prefork 서버에서 워커들이 같이 쓰는 파일: 예열을 맡을 워커 하나를 정하는 잠금 / 기상청 호출 속도 제한 상태
+WEATHER_PREFETCH_LOCK = os.getenv("WEATHER_PREFETCH_LOCK", os.path.join(DATA_DIR, "weather_prefetch.lock"))
+KMA_RATE_FILE = os.getenv("KMA_RATE_FILE", os.path.join(DATA_DIR, "kma_rate.state"))
+
+# 과거 실제 데이터 결과 화면(result.html) 캐시 크기 / 유효 시간(초, 0이면 만료 없음)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "0"))
+# 브라우저 캐시 시간(초): 동 목록(URL에 버전 포함), 과거 실제 데이터 결과, static 파일
+HTTP_LOCATIONS_MAX_AGE = int(os.getenv("HTTP_LOCATIONS_MAX_AGE", "86400"))
+HTTP_RESULT_MAX_AGE = int(os.getenv("HTTP_RESULT_MAX_AGE", "3600"))
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
 
 # =========================
 # Flask
 # =========================
 app = Flask(__name__)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
 
 # =========================
-# 날씨 캐시 (API 호출 최소화)
+# 지표 (/metrics)
 # =========================
-WEATHER_CACHE = {}
-CACHE_FILE = os.path.join(DATA_DIR, "weather_cache.json")
-
-def _load_weather_cache():
-    """캐시 파일 로드"""
-    global WEATHER_CACHE
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                WEATHER_CACHE = json.load(f)
-            print(f"✅ 날씨 캐시 로드: {len(WEATHER_CACHE)}개")
-        except:
-            WEATHER_CACHE = {}
-    else:
-        WEATHER_CACHE = {}
+METRICS = Registry()
+PREDICT_SECONDS = METRICS.histogram(
+    "predict_request_seconds", "/predict 전체 처리 시간(초)", ["data_type"])
+STAGE_SECONDS = METRICS.histogram(
+    "predict_stage_seconds", "/predict 단계별 처리 시간(초)", ["stage"])
+PREDICT_REQUESTS = METRICS.counter(
+    "predict_requests_total", "/predict 요청 수", ["data_type", "status"])
 
-def _save_weather_cache():
-    """캐시 파일 저장"""
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(WEATHER_CACHE, f, ensure_ascii=False, indent=2)
-    except:
-        pass
+# =========================
+# 날씨 캐시 (API 호출 최소화)
+# =========================
+# 워커마다 init_worker() 에서 캐시 저장소 열기 (기본: data/weather_cache.sqlite3, WAL 모드)
+WEATHER_CACHE = None
 
 def _get_cached_weather(date_ymd: str, nx: int, ny: int, api_type: str):
     """캐시된 날씨 조회"""
-    key = f"{date_ymd}_{nx}_{ny}_{api_type}"
-    return WEATHER_CACHE.get(key)
+    return WEATHER_CACHE.get(date_ymd, nx, ny, api_type)
 
 def _set_cached_weather(date_ymd: str, nx: int, ny: int, api_type: str, temp: float, rain: float):
     """날씨 캐시 저장"""
-    key = f"{date_ymd}_{nx}_{ny}_{api_type}"
-    WEATHER_CACHE[key] = {"temp": temp, "rain": rain, "cached_at": datetime.now().isoformat()}
-    _save_weather_cache()
-
-# 서버 시작 시 캐시 로드
-_load_weather_cache()
+    WEATHER_CACHE.set(date_ymd, nx, ny, api_type, temp, rain)
 
 # =========================
 # Oracle DB 연결
@@ -92,48 +134,55 @@ def init_oracle_client():
         # 이미 초기화되었거나 불필요
         pass
 
-def get_oracle_connection():
-    """Oracle DB 연결 객체 반환"""
-    try:
-        conn = oracledb.connect(
-            user=ORACLE_USER,
-            password=ORACLE_PASSWORD,
-            host=ORACLE_HOST,
-            port=ORACLE_PORT,
-            sid=ORACLE_SID
-        )
-        return conn
-    except oracledb.Error as error:
-        print(f"❌ Oracle 연결 실패: {error}")
-        return None
-
-# Oracle Client 초기화
-init_oracle_client()
-
-# 연결 테스트
-print(f"\n{'='*60}")
-print(f"🔌 Oracle DB 연결 테스트")
-print(f"{'='*60}")
-test_conn = get_oracle_connection()
-if test_conn:
-    print(f"✅ Oracle DB 연결 성공!")
-    print(f"   Host: {ORACLE_HOST}:{ORACLE_PORT}")
-    print(f"   SID: {ORACLE_SID}")
-    print(f"   User: {ORACLE_USER}")
-    test_conn.close()
-else:
-    print(f"❌ Oracle DB 연결 실패")
-print(f"{'='*60}\n")
+# 실제 데이터 저장소 (기본 Oracle, 로컬 SQLite/Parquet 사본도 가능)
+# 커넥션 풀/파일 핸들은 fork 후에 워커마다 만들어야 하므로 init_worker() 에서 생성
+SALES_STORE = None
+# SALES_MEMORY_INDEX=1 색인: prefork 서버에서는 master 가 init_shared() 에서 한 번 올리고 워커들이 같이 씀
+SALES_INDEX = None
+
+# 연결 확인은 서버 시작을 막지 않도록 /ready 에서 백그라운드로 수행
+_DB_STATUS = {"ok": None, "checked_at": None, "checking": False}
+_DB_STATUS_LOCK = threading.Lock()
+
+def _check_db_status():
+    ok = SALES_STORE.ping()
+    with _DB_STATUS_LOCK:
+        _DB_STATUS.update(ok=ok, checked_at=datetime.now().isoformat(timespec="seconds"), checking=False)
+    print(f"{'✅' if ok else '❌'} 실제 데이터 저장소 연결 확인: {SALES_STORE.describe()}", flush=True)
+
+def _refresh_db_status():
+    """마지막 확인 후 DB_CHECK_INTERVAL초가 지났으면 백그라운드에서 다시 확인"""
+    with _DB_STATUS_LOCK:
+        if _DB_STATUS["checking"]:
+            return
+        checked_at = _DB_STATUS["checked_at"]
+        if checked_at and (datetime.now() - datetime.fromisoformat(checked_at)).total_seconds() < DB_CHECK_INTERVAL:
+            return
+        _DB_STATUS["checking"] = True
+    threading.Thread(target=_check_db_status, name="db-check", daemon=True).start()
 
 # =========================
 # Load location mapping
 # =========================
-loc_path = os.path.join(DATA_DIR, "suwon_locations.json")
-if not os.path.exists(loc_path):
-    raise FileNotFoundError(f"동/격자 파일이 없습니다: {loc_path}")
+LOC = None
+LOC_BODY = None
 
-with open(loc_path, "r", encoding="utf-8") as f:
-    LOC = json.load(f)
+def _load_locations():
+    """동/격자 파일 → (LOC, /api/locations 응답)"""
+    loc_path = os.getenv("LOC_PATH", os.path.join(DATA_DIR, "suwon_locations.json"))
+    if not os.path.exists(loc_path):
+        raise FileNotFoundError(f"동/격자 파일이 없습니다: {loc_path}")
+
+    with open(loc_path, "r", encoding="utf-8") as f:
+        loc = json.load(f)
+
+    # /api/locations 응답은 시작할 때 한 번만 직렬화/압축 (ETag = 본문 해시)
+    body = CachedBody(
+        json.dumps(loc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "application/json",
+        last_modified=datetime.fromtimestamp(os.path.getmtime(loc_path), timezone.utc),
+    )
+    return loc, body
 
 # =========================
 # Time labels
@@ -176,342 +225,80 @@ def _norm_dong_name(x: str) -> str:
     return result.strip().replace(" ", "")
 
 # =========================
-# Oracle DB 조회 함수
+# 실제 데이터 조회 (sales_store.py)
 # =========================
-def _get_actual_hour_from_db(ymd8: str, dong_norm: str, hour: int):
-    """Oracle DB에서 특정 시간대 데이터 조회"""
-    conn = get_oracle_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        
-        # 테이블명: SALES_DATA (import_csv_to_oracle.py로 생성)
-        query = """
-            SELECT AMT, CNT, TEMP, RAIN
-            FROM SALES_DATA
-            WHERE TA_YMD = :ymd
-              AND DONG = :dong
-              AND HOUR = :hour
-        """
-        
-        cursor.execute(query, ymd=ymd8, dong=dong_norm, hour=hour)
-        row = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        if row:
-            return {
-                "amt": float(row[0]) if row[0] is not None else np.nan,
-                "cnt": float(row[1]) if row[1] is not None else np.nan,
-                "temp": float(row[2]) if row[2] is not None else np.nan,
-                "rain": float(row[3]) if row[3] is not None else np.nan,
-            }
-        return None
-        
-    except oracledb.Error as error:
-        print(f"❌ DB 조회 실패: {error}")
-        if conn:
-            conn.close()
-        return None
-
-def _get_actual_weather_day_from_db(ymd8: str, dong_norm: str):
-    """Oracle DB에서 해당 날짜/동의 평균 TEMP/RAIN 조회"""
-    conn = get_oracle_connection()
-    if not conn:
-        return None
-    
-    try:
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT AVG(TEMP), AVG(RAIN)
-            FROM SALES_DATA
-            WHERE TA_YMD = :ymd
-              AND DONG = :dong
-              AND TEMP IS NOT NULL
-        """
-        
-        cursor.execute(query, ymd=ymd8, dong=dong_norm)
-        row = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        if row and row[0] is not None:
-            return float(row[0]), float(row[1] or 0.0), "Oracle DB(실제데이터)"
-        return None
-        
-    except oracledb.Error as error:
-        print(f"❌ 날씨 조회 실패: {error}")
-        if conn:
-            conn.close()
-        return None
-
-def _check_actual_data_exists(ymd8: str, dong_norm: str):
-    """해당 날짜/동의 데이터가 DB에 있는지 확인"""
-    conn = get_oracle_connection()
-    if not conn:
-        return False
-    
-    try:
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT COUNT(*)
-            FROM SALES_DATA
-            WHERE TA_YMD = :ymd
-              AND DONG = :dong
-        """
-        
-        cursor.execute(query, ymd=ymd8, dong=dong_norm)
-        count = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
-        
-        return count > 0
-        
-    except oracledb.Error as error:
-        print(f"❌ 데이터 존재 확인 실패: {error}")
-        if conn:
-            conn.close()
-        return False
+def _get_actual_day_from_db(ymd8: str, dong_norm: str):
+    """
+    실제 데이터 저장소(SALES_STORE_BACKEND: oracle/sqlite/parquet)에서 해당 날짜/동의 하루치 데이터 조회
+    - hours: {시간대: {"amt", "cnt", "temp", "rain"}}
+    - weather: (평균 TEMP, 평균 RAIN, 출처) 또는 None
+    - exists: 데이터 존재 여부
+    조회 실패 시 None
+    """
+    return SALES_STORE.get_day(ymd8, dong_norm)
 
 # =========================
 # Load ML models
 # =========================
-def _load_models():
-    """시간대별 머신러닝 모델 로드 (hour_01 ~ hour_10)"""
-    models = {}
-    for hour in range(1, 11):
-        model_path = os.path.join(MODELS_DIR, f"hour_{hour:02d}_amt_cnt.joblib")
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"모델 파일이 없습니다: {model_path}")
-        try:
-            models[hour] = joblib.load(model_path)
-            print(f"✓ Loaded model for hour {hour}")
-        except Exception as e:
-            raise RuntimeError(f"모델 로드 실패 (hour {hour}): {e}")
-    return models
+# 모델 / 통계 예측 테이블은 init_shared() 에서 한 번 로드 (prefork 서버에서는 master 에서 로드해 워커가 공유)
+MODEL_REGISTRY = None
+FALLBACK = None
+PREDICTOR = None
+
+# prefork 서버에서만: 워커 간 모델 세트 맞추기 (model_registry.SharedModelVersion)
+MODEL_SYNC = None
 
-MODELS = _load_models()
+# 예측 캐시 / 과거 실제 데이터 결과 화면 캐시 (http_cache.py) 는 워커마다 따로
+PRED_CACHE = None
+RESULT_CACHE = None
+
+def _on_model_swap(model_set):
+    """모델 세트가 교체/롤백되면 예측 캐시도 비움 (결과 화면에는 누락보정 예측이 섞일 수 있음)"""
+    if PRED_CACHE is not None:
+        PRED_CACHE.clear()
+    if RESULT_CACHE is not None:
+        RESULT_CACHE.clear()
+    # prefork: 모든 워커가 같은 세트로 맞추므로 사전 계산은 예열을 맡은 워커 하나만 (테이블은 SQLite 로 공유)
+    if MATERIALIZE_PREDICTIONS and MATERIALIZER is not None and (PREFETCHER is None or PREFETCHER.is_leader()):
+        MATERIALIZER.run_async()
 
 # =========================
 # KMA helpers
 # =========================
-ASOS_STN_ID = 119  # 수원 관측소 ID
-ASOS_BASE_URL = "http://apis.data.go.kr/1360000/AsosDalyInfoService/getWthrDataList"
-
-def _kma_get(url: str, params: dict):
-    if not KMA_SERVICE_KEY:
-        raise RuntimeError("KMA_SERVICE_KEY가 .env에 없습니다.")
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    return r.json()
+# 세션 재사용 + 동일 요청 합치기 + 호출 속도 제한 + 서킷 브레이커 (kma_client.py), 워커마다 세션을 따로 만듦
+KMA = None
 
 def get_ultra_now(nx: int, ny: int):
-    # 캐시 확인 (오늘 날짜)
-    today = datetime.now().strftime("%Y%m%d")
-    cached = _get_cached_weather(today, nx, ny, "ultra")
-    if cached:
-        print(f"📦 캐시 사용 (초단기실황): {cached['temp']}℃, {cached['rain']}mm", flush=True)
-        return cached['temp'], cached['rain']
-    
-    now = datetime.now()
-    base_date = now.strftime("%Y%m%d")
-    t = now - timedelta(hours=1)
-    base_time = t.strftime("%H00")
-
-    url = f"{KMA_BASE_URL}/getUltraSrtNcst"
-    params = {
-        "serviceKey": KMA_SERVICE_KEY,
-        "pageNo": "1",
-        "numOfRows": "200",
-        "dataType": "JSON",
-        "base_date": base_date,
-        "base_time": base_time,
-        "nx": str(nx),
-        "ny": str(ny),
-    }
-    data = _kma_get(url, params)
-    items = data["response"]["body"]["items"]["item"]
-    out = {it["category"]: it["obsrValue"] for it in items}
-
-    temp = float(out.get("T1H", 0.0))
-    rain = float(out.get("RN1", 0.0))
-    
-    # 캐시 저장
-    _set_cached_weather(today, nx, ny, "ultra", temp, rain)
-    
-    return temp, rain
+    return KMA.get_ultra_now(nx, ny)
 
 def get_vilage_day_avg(nx: int, ny: int, target_date: str):
-    # 캐시 확인
-    cached = _get_cached_weather(target_date, nx, ny, "village")
-    if cached:
-        print(f"📦 캐시 사용 (단기예보): {cached['temp']}℃, {cached['rain']}mm", flush=True)
-        return cached['temp'], cached['rain']
-    
-    url = f"{KMA_BASE_URL}/getVilageFcst"
-
-    def _call(base_date: str):
-        params = {
-            "serviceKey": KMA_SERVICE_KEY,
-            "pageNo": "1",
-            "numOfRows": "2500",
-            "dataType": "JSON",
-            "base_date": base_date,
-            "base_time": "0500",
-            "nx": str(nx),
-            "ny": str(ny),
-        }
-        return _kma_get(url, params)
-
-    today = datetime.now().strftime("%Y%m%d")
-    try:
-        data = _call(today)
-    except Exception:
-        yday = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
-        data = _call(yday)
-
-    items = data["response"]["body"]["items"]["item"]
-    t_list, r_list = [], []
-
-    for it in items:
-        if it.get("fcstDate") != target_date:
-            continue
-
-        cat = it.get("category")
-        val = it.get("fcstValue")
-
-        if cat == "TMP":
-            try:
-                t_list.append(float(val))
-            except:
-                pass
-        elif cat == "PCP":
-            if val not in ("강수없음", None):
-                try:
-                    v = val.replace("mm", "").strip()
-                    if "미만" in v:
-                        r_list.append(0.0)
-                    else:
-                        r_list.append(float(v))
-                except:
-                    pass
-
-    temp_avg = float(np.mean(t_list)) if t_list else 15.0
-    rain_avg = float(np.mean(r_list)) if r_list else 0.0
-    
-    # 캐시 저장
-    _set_cached_weather(target_date, nx, ny, "village", temp_avg, rain_avg)
-    
-    return temp_avg, rain_avg
+    return KMA.get_vilage_day_avg(nx, ny, target_date)
 
 def get_asos_daily_obs(ymd8: str):
-    # 캐시 확인
-    cached = _get_cached_weather(ymd8, 119, 119, "asos")
-    if cached:
-        print(f"📦 캐시 사용 (ASOS): {cached['temp']}℃, {cached['rain']}mm", flush=True)
-        return cached['temp'], cached['rain']
-    
-    params = {
-        "serviceKey": KMA_SERVICE_KEY,
-        "pageNo": 1,
-        "numOfRows": 10,
-        "dataType": "JSON",
-        "dataCd": "ASOS",
-        "dateCd": "DAY",
-        "startDt": ymd8,
-        "endDt": ymd8,
-        "stnIds": str(ASOS_STN_ID),
-    }
-    js = _kma_get(ASOS_BASE_URL, params)
-    items = js.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-    if not items:
-        raise RuntimeError(f"ASOS 관측 데이터가 없습니다 (날짜: {ymd8})")
-    it = items[0]
-    avg_ta = float(it.get("avgTa")) if it.get("avgTa") not in (None, "") else 0.0
-    sum_rn = float(it.get("sumRn")) if it.get("sumRn") not in (None, "") else 0.0
-    
-    # 캐시 저장
-    _set_cached_weather(ymd8, 119, 119, "asos", avg_ta, sum_rn)
-    
-    return avg_ta, sum_rn
+    return KMA.get_asos_daily_obs(ymd8)
 
-def predict_amt_cnt_ml(gu: str, dong: str, hour: int, day: int, temp: float, rain: float = 0.0):
-    if hour not in MODELS:
-        return 0.0, 0.0
-    
-    model = MODELS[hour]
-    attempts = [
-        {'DONG': dong, 'DAY': day, 'TEMP': temp, 'RAIN': rain},
-        {'GU': gu, 'DONG': dong, 'DAY': day, 'TEMP': temp, 'RAIN': rain},
-        {'DONG': dong, 'DAY': day, 'TEMP': temp},
-        {'GU': gu, 'DONG': dong, 'DAY': day, 'TEMP': temp},
-    ]
-    
-    for features in attempts:
-        try:
-            X = pd.DataFrame([features])
-            pred = model.predict(X)[0]
-            amt = max(0.0, float(pred[0]))
-            cnt = max(0.0, float(pred[1]))
-            return amt, cnt
-        except:
-            continue
-    
-    return 0.0, 0.0
+# 오늘~N일 × 모든 동 × 시간대 예측 사전 계산 (prediction_table.py)
+PRED_TABLE = None
+MATERIALIZER = None
+
+# 모든 격자의 날씨를 기상청 발표 직후 미리 받아둠 (weather_prefetch.py)
+PREFETCHER = None
 
 # =========================
-# Routes
+# 날씨 결정
 # =========================
-@app.route("/", methods=["GET"])
-def index():
-    gus = sorted(LOC.keys())
-    return render_template(
-        "index.html",
-        gus=gus,
-        loc_json=json.dumps(LOC, ensure_ascii=False),
-    )
+# 월별 평균 기온 (수원 기준)
+MONTHLY_AVG_TEMPS = {1: -2, 2: 1, 3: 7, 4: 14, 5: 19, 6: 23,
+                     7: 26, 8: 26, 9: 21, 10: 14, 11: 7, 12: 0}
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    gu = request.form.get("gu")
-    dong = request.form.get("dong")
-    ymd = request.form.get("date")
-
-    if not (gu and dong and ymd):
-        return "입력값이 부족합니다.", 400
-
-    if gu not in LOC:
-        return f"선택한 구가 LOC에 없음: {gu}", 400
-    if dong not in LOC[gu]:
-        return f"선택한 동이 LOC[{gu}]에 없음: {dong}", 400
-
-    target_ymd = ymd.replace("-", "")
-    dt = datetime.strptime(target_ymd, "%Y%m%d")
-    day = dt.weekday() + 1
-
-    nx = int(LOC[gu][dong]["nx"])
-    ny = int(LOC[gu][dong]["ny"])
-
-    print(f"\n{'='*50}", flush=True)
-    print(f"📍 예측 요청: {gu} {dong}, 날짜: {ymd}, 요일: {day}", flush=True)
-    print(f"{'='*50}", flush=True)
-
-    dong_norm = _norm_dong_name(dong)
-    print(f"🔍 동 정규화: '{dong}' -> '{dong_norm}'", flush=True)
-    
+def resolve_weather(nx: int, ny: int, target_ymd: str, actual_weather=None):
+    """
+    날짜에 맞는 날씨 → (temp, rain, weather_source, weather_error)
+    실제 데이터 날씨 > 초단기실황(오늘) > 단기예보(미래/최근 7일) > 월별 평균 순
+    """
     today_ymd = datetime.now().strftime("%Y%m%d")
     one_week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y%m%d")
-
-    # 날씨 조회
     weather_error = None
-    actual_weather = _get_actual_weather_day_from_db(target_ymd, dong_norm)
 
     try:
         if actual_weather is not None:
@@ -529,76 +316,688 @@ def predict():
         else:
             # 7일 이전: 월별 평균 사용 (ASOS API 사용 안 함!)
             month = int(target_ymd[4:6])
-            avg_temps = {1: -2, 2: 1, 3: 7, 4: 14, 5: 19, 6: 23, 
-                        7: 26, 8: 26, 9: 21, 10: 14, 11: 7, 12: 0}
-            temp = float(avg_temps.get(month, 15))
+            temp = float(MONTHLY_AVG_TEMPS.get(month, 15))
             rain = 0.0
             weather_source = f"월별 평균 기온 ({month}월)"
-            print(f"💡 7일 이전 날짜 → 월별 평균 사용", flush=True)
-        print(f"🌤️  날씨: TEMP={temp}℃, RAIN={rain}mm ({weather_source})", flush=True)
+            log("DEBUG", "💡 7일 이전 날짜 → 월별 평균 사용")
+        log("DEBUG", f"🌤️  날씨: TEMP={temp}℃, RAIN={rain}mm ({weather_source})")
+    except ForecastMissing as e:
+        # 예보 범위 밖 날짜 → 기본값을 쓰되 실패로 표시 (결과 캐시/사전 계산 테이블에 남지 않음)
+        temp, rain = e.default
+        weather_source = f"단기예보 범위 밖 → 기본값(TEMP={temp}℃, RAIN={rain}mm)"
+        weather_error = str(e)
+        log("WARNING", f"⚠️  {e} → 기본값 사용")
     except Exception as e:
-        print(f"⚠️  날씨 조회 실패: {e}", flush=True)
+        log("WARNING", f"⚠️  날씨 조회 실패: {e}")
         weather_error = str(e)
         
-        # 429 에러(호출 제한) 처리
-        if "429" in str(e) or "Too Many Requests" in str(e):
-            print(f"💡 API 호출 제한 도달. 최근 평균 날씨로 대체합니다.", flush=True)
+        # 429 에러(호출 제한) / 서킷 열림 처리 → API를 다시 부르지 않고 월별 평균
+        if isinstance(e, KmaUnavailable) or "429" in str(e) or "Too Many Requests" in str(e):
+            log("WARNING", "💡 API 호출 제한 도달. 최근 평균 날씨로 대체합니다.")
             # 같은 월의 평균 날씨 사용
             month = int(target_ymd[4:6])
-            # 월별 평균 기온 (수원 기준)
-            avg_temps = {1: -2, 2: 1, 3: 7, 4: 14, 5: 19, 6: 23, 
-                        7: 26, 8: 26, 9: 21, 10: 14, 11: 7, 12: 0}
-            temp = float(avg_temps.get(month, 15))
+            temp = float(MONTHLY_AVG_TEMPS.get(month, 15))
             rain = 0.0
             weather_source = f"월별 평균 기온 (API 제한)"
-            weather_error = "API 호출 제한 (429)"
+            weather_error = str(e) if isinstance(e, KmaUnavailable) else "API 호출 제한 (429)"
         else:
             # 기타 에러
             try:
                 temp, rain = get_vilage_day_avg(nx, ny, target_ymd)
                 weather_source = "단기예보(getVilageFcst) 일평균(폴백)"
-                print(f"🌤️  폴백 성공: TEMP={temp}℃, RAIN={rain}mm ({weather_source})", flush=True)
+                log("DEBUG", f"🌤️  폴백 성공: TEMP={temp}℃, RAIN={rain}mm ({weather_source})")
             except Exception as e2:
                 temp, rain = 15.0, 0.0
                 weather_source = "날씨 조회 실패 → 기본값(TEMP=15℃, RAIN=0mm)"
                 weather_error = f"{e} | {e2}"
-                print(f"⚠️  기본값 사용: TEMP={temp}℃, RAIN={rain}mm", flush=True)
+                log("WARNING", f"⚠️  기본값 사용: TEMP={temp}℃, RAIN={rain}mm")
+
+    return temp, rain, weather_source, weather_error
+
+# =========================
+# 실제 데이터 + 날씨 동시 조회 (concurrent_io.py)
+# =========================
+IO_POOL = None
+
+def _weather_needs_api(target_ymd: str) -> bool:
+    """오늘/미래/최근 7일만 기상청 API를 씀 (그 이전은 월별 평균)"""
+    one_week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y%m%d")
+    return target_ymd >= one_week_ago
+
+def fetch_actual_and_weather(nx: int, ny: int, target_ymd: str, dong_norm: str, trace: Trace = None):
+    """
+    → (actual_day, (temp, rain, weather_source, weather_error))
+    실제 데이터 조회와 기상청 날씨 조회를 동시에 시작
+    실제 데이터에 날씨가 있으면 그것을 쓰고 기상청 조회는 취소 (이미 시작됐으면 받은 값은 캐시에 남음)
+    제한 시간을 넘기면 기다리지 않고: 실제 데이터 → 없음(예측), 날씨 → 월별 평균
+    trace: 단계별 시간 기록 (db, weather) - weather 는 기상청 결과를 기다린 경우에만 한 번
+    """
+    trace = trace or Trace()
+    fetch_day = trace.wrap("db", _get_actual_day_from_db)
+    fetch_weather = trace.wrap("weather", resolve_weather)
+
+    if not PREDICT_CONCURRENT_IO:
+        actual_day = fetch_day(target_ymd, dong_norm)
+        if actual_day and actual_day["weather"] is not None:
+            return actual_day, resolve_weather(nx, ny, target_ymd, actual_day["weather"])
+        return actual_day, fetch_weather(nx, ny, target_ymd)
+
+    def _timed_weather():
+        # 버려질 수도 있는 결과라서 trace 에는 여기서 기록하지 않고 시간만 같이 돌려줌
+        start = time.perf_counter()
+        return resolve_weather(nx, ny, target_ymd), time.perf_counter() - start
+
+    db_task = IO_POOL.submit("db", fetch_day, target_ymd, dong_norm)
+    weather_task = IO_POOL.submit("weather", _timed_weather) if _weather_needs_api(target_ymd) else None
+
+    actual_day, status = IO_POOL.wait(db_task)
+    if status != "ok":
+        log("WARNING", f"⚠️  실제 데이터 조회 {status}: {actual_day}")
+        actual_day = None
+    if actual_day and actual_day["weather"] is not None:
+        if weather_task is not None:
+            IO_POOL.cancel(weather_task)
+        return actual_day, resolve_weather(nx, ny, target_ymd, actual_day["weather"])
+    if weather_task is None:
+        return actual_day, fetch_weather(nx, ny, target_ymd)
+
+    result, status = IO_POOL.wait(weather_task)
+    if status == "ok":
+        weather, seconds = result
+        trace.record("weather", seconds)
+        return actual_day, weather
+    trace.record("weather", time.perf_counter() - weather_task.started)
+    log("WARNING", f"⚠️  날씨 조회 {status}: {result} → 월별 평균 사용")
+    month = int(target_ymd[4:6])
+    return actual_day, (float(MONTHLY_AVG_TEMPS.get(month, 15)), 0.0,
+                        f"월별 평균 기온 (날씨 조회 {'시간 초과' if status == 'timeout' else '실패'})", str(result))
+
+def predict_amt_cnt_ml(gu: str, dong: str, hour: int, day: int, temp: float, rain: float = 0.0):
+    if hour not in MODEL_REGISTRY:
+        return FALLBACK.predict_day(dong, day, temp, rain, hours=[hour])[hour]
+    return predict_day_ml(gu, dong, day, temp, rain, hours=[hour])[hour]
+
+def predict_day_ml(gu: str, dong: str, day: int, temp: float, rain: float = 0.0, hours=range(1, 11),
+                   sources: dict = None):
+    """
+    시간대별 예측을 한 번에 → {hour: (amt, cnt)} (예측 캐시 경유)
+    sources: 넘기면 시간대별 "model" / "fallback"(모델이 없거나 실패해서 통계 예측) 을 채움
+    """
+    def _compute(missing, q_temp, q_rain, computed_sources):
+        return PREDICTOR.predict_day(gu, dong, day, q_temp, q_rain, hours=missing, sources=computed_sources)
+    return PRED_CACHE.get_or_compute_day(dong, day, temp, rain, hours, _compute,
+                                         version=MODEL_REGISTRY.version, sources=sources)
+
+# =========================
+# Load shedding
+# =========================
+_INFLIGHT_LOCK = threading.Lock()
+_INFLIGHT = 0
+SHED_STATS = {"requests": 0, "shed": 0, "max_inflight": 0}
+
+def _enter_predict():
+    """처리 중인 /predict 수 +1 → 통계 예측으로 처리할지 여부"""
+    global _INFLIGHT
+    with _INFLIGHT_LOCK:
+        _INFLIGHT += 1
+        SHED_STATS["requests"] += 1
+        SHED_STATS["max_inflight"] = max(SHED_STATS["max_inflight"], _INFLIGHT)
+        shed = FALLBACK_MODE == "always" or (FALLBACK_MODE == "auto" and _INFLIGHT > PREDICT_SHED_INFLIGHT)
+        if shed:
+            SHED_STATS["shed"] += 1
+    return shed
+
+def _exit_predict():
+    global _INFLIGHT
+    with _INFLIGHT_LOCK:
+        _INFLIGHT -= 1
+
+def predict_day_any(gu: str, dong: str, day: int, temp: float, rain: float = 0.0, hours=range(1, 11), shed=False,
+                    sources: dict = None):
+    """과부하면 통계 예측, 아니면 모델 예측 (sources: predict_day_ml 과 같음)"""
+    if shed:
+        if sources is not None:
+            sources.update(dict.fromkeys(hours, "fallback"))
+        return FALLBACK.predict_day(dong, day, temp, rain, hours)
+    return predict_day_ml(gu, dong, day, temp, rain, hours, sources)
+
+# =========================
+# 지표 수집 (/metrics 요청 때 각 구성요소의 stats() 를 읽음)
+# =========================
+def _collect_metrics():
+    weather = WEATHER_CACHE.stats()
+    pred = PRED_CACHE.stats()
+    result = RESULT_CACHE.stats()
+    store = SALES_STORE.stats()
+    kma = KMA.stats()
+    io = IO_POOL.stats()["dependencies"]
+    with _INFLIGHT_LOCK:
+        inflight, shed = _INFLIGHT, SHED_STATS["shed"]
+    families = [
+        ("cache_hits_total", "counter", "캐시 적중 수",
+         [({"cache": "weather"}, weather["hits"]), ({"cache": "prediction"}, pred["hits"]),
+          ({"cache": "result"}, result["hits"])]),
+        ("cache_misses_total", "counter", "캐시 누락 수",
+         [({"cache": "weather"}, weather["misses"]), ({"cache": "prediction"}, pred["misses"]),
+          ({"cache": "result"}, result["misses"])]),
+        ("cache_hit_ratio", "gauge", "캐시 적중률",
+         [({"cache": "weather"}, weather["hit_rate"]), ({"cache": "prediction"}, pred["hit_rate"]),
+          ({"cache": "result"}, result["hit_rate"])]),
+        ("cache_entries", "gauge", "캐시 항목 수",
+         [({"cache": "weather"}, weather["size"]), ({"cache": "prediction"}, pred["size"]),
+          ({"cache": "result"}, result["size"])]),
+        ("sales_store_lookups_total", "counter", "실제 데이터 조회 수",
+         [({"backend": store["backend"]}, store["lookups"])]),
+        ("sales_store_errors_total", "counter", "실제 데이터 조회 실패 수",
+         [({"backend": store["backend"]}, store["errors"])]),
+        ("kma_calls_total", "counter", "기상청 API 호출 수",
+         [({"result": k}, kma[k]) for k in ("calls", "errors", "rejected")]),
+        ("predict_io_timeouts_total", "counter", "실제 데이터/날씨 조회 시간 초과 수",
+         [({"dependency": name}, st["timeouts"]) for name, st in io.items()]),
+        ("predict_inflight", "gauge", "처리 중인 /predict 수", [({}, inflight)]),
+        ("predict_shed_total", "counter", "과부하로 통계 예측을 쓴 /predict 수", [({}, shed)]),
+        ("models_loaded", "gauge", "로드된 시간대 모델 수", [({}, len(MODEL_REGISTRY.loaded_hours))]),
+        ("worker_info", "gauge", "이 응답을 만든 워커 (prefork 서버에서 지표는 워커별 값)", [({"pid": os.getpid()}, 1)]),
+        ("process_memory_bytes", "gauge", "워커 메모리 (pss: 공유 페이지를 나눈 몫, uss: 이 워커만 쓰는 페이지)",
+         [({"kind": k}, v) for k, v in process_memory().items()]),
+    ]
+    if MATERIALIZE_PREDICTIONS:
+        table = PRED_TABLE.stats()
+        families.append(("cache_hit_ratio_materialized", "gauge", "사전 계산 예측 적중률",
+                         [({}, table["hit_rate"])]))
+    return families
+
+METRICS.add_collector(_collect_metrics)
+
+# =========================
+# Application factory
+# =========================
+# init_shared: fork 전에 한 번 (모델, 동 목록, 평균 테이블 → 워커들이 copy-on-write 로 공유)
+# init_worker: 프로세스마다 한 번 (DB 풀, SQLite 커넥션, 기상청 세션, 스레드 풀/백그라운드 스레드)
+_SHARED_READY = False
+_WORKER_PID = None
+_INIT_LOCK = threading.Lock()
+INIT_STATS = {"prefork": False, "shared_sec": None, "worker_sec": None, "master_pid": None}
+
+def init_shared(prefork: bool = False):
+    """
+    읽기 전용 데이터 로드 (프로세스 전체에서 한 번)
+    prefork=True: 모델을 지금 전부 로드 (백그라운드 스레드는 fork 후 워커에 남지 않음)
+    """
+    global _SHARED_READY, LOC, LOC_BODY, MODEL_REGISTRY, FALLBACK, PREDICTOR, SALES_INDEX, MODEL_SYNC
+    with _INIT_LOCK:
+        if _SHARED_READY:
+            return
+        start = datetime.now()
+        LOC, LOC_BODY = _load_locations()
+
+        mode = MODEL_LOAD_MODE
+        if prefork and mode != "parallel":
+            print(f"ℹ️  prefork: MODEL_LOAD_MODE={mode} 대신 parallel 로 master 에서 전부 로드", flush=True)
+            mode = "parallel"
+        # master 에서 OpenMP 스레드 풀이 만들어지면 fork 된 워커의 XGBoost 추론이 멈출 수 있어서 1스레드로 로드
+        with threadpool_limits(limits=1 if prefork else None):
+            # 시작을 막지 않도록 기본은 백그라운드 병렬 로드 (model_registry.py)
+            MODEL_REGISTRY = ModelRegistry(
+                MODELS_DIR,
+                mode=mode,
+                mmap_mode=MODEL_MMAP_MODE,
+                workers=MODEL_LOAD_WORKERS,
+                backend=MODEL_BACKEND,
+            ).start()
+        MODEL_REGISTRY.on_swap(_on_model_swap)
+        # 평균 테이블 + 날씨 계수 기반 통계 예측 (모델 실패 시 / 과부하 시)
+        FALLBACK = FallbackEstimator.from_dir(MODELS_DIR, normalize=_norm_dong_name)
+        # 입력 컬럼은 로드 시점에 한 번만 결정
+        PREDICTOR = BatchPredictor(hour_models=MODEL_REGISTRY, fallback=FALLBACK)
+
+        if prefork:
+            # 모델 교체/롤백은 요청을 받은 워커가 게시하고 나머지 워커는 요청 전에 맞춤
+            MODEL_SYNC = SharedModelVersion(MODEL_ACTIVE_FILE)
+            # 매출 색인도 master 에서 한 번만 (워커마다 저장소 전체를 동시에 읽지 않고 배열을 공유)
+            SALES_INDEX = load_shared_index(DATA_DIR)
+            # 지금까지 만든 객체는 GC 대상에서 빼서 워커에서 GC 가 공유 페이지를 건드리지(복사하지) 않게 함
+            gc.collect()
+            gc.freeze()
+        INIT_STATS.update(prefork=prefork, master_pid=os.getpid(),
+                          shared_sec=round((datetime.now() - start).total_seconds(), 3))
+        _SHARED_READY = True
+
+def init_worker():
+    """
+    프로세스(워커)마다 만드는 자원: fork 전 부모의 커넥션/세션/스레드는 자식에서 쓸 수 없음
+    같은 프로세스에서 다시 호출하면 아무것도 하지 않음
+    """
+    global _WORKER_PID, WEATHER_CACHE, SALES_STORE, KMA, IO_POOL, PRED_CACHE, RESULT_CACHE
+    global PRED_TABLE, MATERIALIZER, PREFETCHER
+    init_shared()
+    with _INIT_LOCK:
+        if _WORKER_PID == os.getpid():
+            return
+        start = datetime.now()
+
+        # 서버 시작 시 캐시 저장소 열기 (SQLite 는 워커들이 같은 파일을 함께 씀)
+        WEATHER_CACHE = create_weather_store(DATA_DIR)
+        print(f"✅ 날씨 캐시 로드: {len(WEATHER_CACHE)}개 ({type(WEATHER_CACHE).__name__})")
+
+        # Oracle Client 초기화 + 실제 데이터 저장소 (Oracle 커넥션 풀은 처음 조회할 때 이 워커에서 생성)
+        init_oracle_client()
+        SALES_STORE = create_sales_store(DATA_DIR, index=SALES_INDEX)
+        print(f"✅ 실제 데이터 저장소: {SALES_STORE.describe()} ({type(SALES_STORE).__name__})")
+        _DB_STATUS.update(ok=None, checked_at=None, checking=False)
+        _refresh_db_status()
+
+        # prefork: 호출 속도 제한을 워커들이 나눠 씀 (워커 수만큼 기상청 호출이 늘지 않게)
+        prefork = INIT_STATS["prefork"]
+        KMA = KmaClient(WEATHER_CACHE, limiter=create_rate_limiter(KMA_RATE_FILE if prefork else None))
+        IO_POOL = IoPool(PREDICT_IO_WORKERS, timeouts={"db": DB_TIMEOUT_SEC, "weather": WEATHER_TIMEOUT_SEC})
+
+        PRED_CACHE = PredictionCache(
+            MODELS_DIR,
+            maxsize=PRED_CACHE_SIZE,
+            ttl=PRED_CACHE_TTL,
+            temp_step=PRED_CACHE_TEMP_STEP,
+            rain_step=PRED_CACHE_RAIN_STEP,
+        )
+        RESULT_CACHE = RenderedCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+        PRED_TABLE = PredictionTable(os.getenv("MATERIALIZE_DB", os.path.join(DATA_DIR, "predictions.sqlite3")))
+        MATERIALIZER = PredictionMaterializer(
+            PRED_TABLE, LOC,
+            resolve_weather=lambda nx, ny, ymd8: resolve_weather(nx, ny, ymd8),
+            predictor=PREDICTOR,
+            model_version=lambda: MODEL_REGISTRY.version,
+            ready=MODEL_REGISTRY.ready,
+        )
+        # prefork: 워커마다 스레드는 뜨지만 잠금을 잡은 워커 하나만 예열 (결과는 SQLite 날씨 캐시로 공유)
+        PREFETCHER = WeatherPrefetcher(KMA, LOC, lock_path=WEATHER_PREFETCH_LOCK if prefork else None)
+        if MATERIALIZE_PREDICTIONS:
+            # 날씨 예열이 끝날 때마다, 모델이 바뀔 때마다(_on_model_swap) 다시 계산
+            PREFETCHER.on_complete(MATERIALIZER.run)
+        if WEATHER_PREFETCH:
+            PREFETCHER.start()
+            print(f"✅ 날씨 예열 시작: 격자 {len(PREFETCHER.cells)}개")
+            if prefork and isinstance(WEATHER_CACHE, MemoryWeatherStore):
+                print("⚠️  WEATHER_CACHE_BACKEND=memory: 예열한 날씨는 예열을 맡은 워커에만 남음 (sqlite 권장)")
+
+        INIT_STATS["worker_sec"] = round((datetime.now() - start).total_seconds(), 3)
+        _WORKER_PID = os.getpid()
+
+def create_app(prefork: bool = False):
+    """
+    prefork=False: 지금 프로세스에서 바로 서비스 (python app.py, 벤치마크)
+    prefork=True: 공유 데이터만 로드하고, 워커 자원은 fork 후 post_fork(gunicorn.conf.py) 또는 첫 요청에서 생성
+    """
+    init_shared(prefork=prefork)
+    if not prefork:
+        init_worker()
+    return app
+
+@app.before_request
+def _ensure_worker():
+    # post_fork 훅이 없는 서버(또는 preload 없이 실행)에서도 워커 자원이 준비되도록
+    if _WORKER_PID != os.getpid():
+        init_worker()
+    # 다른 워커가 모델을 교체/롤백했으면 이 요청을 처리하기 전에 같은 세트로 맞춤 (파일이 그대로면 stat 한 번)
+    if MODEL_SYNC is not None:
+        MODEL_SYNC.sync(MODEL_REGISTRY)
+
+# =========================
+# Routes
+# =========================
+@app.after_request
+def _http_cache(resp):
+    """ETag / 조건부 304 / gzip·br 압축 (http_cache.py)"""
+    return finalize_response(resp, request)
+
+_INDEX_BODY = None
+
+def _static_url(filename: str) -> str:
+    """static 파일 URL + 수정 시각 (파일이 바뀌면 URL이 바뀌어 브라우저 캐시 무효화)"""
+    mtime = int(os.path.getmtime(os.path.join(app.static_folder, filename)))
+    return f"/static/{filename}?v={mtime}"
+
+@app.route("/", methods=["GET"])
+def index():
+    # 첫 페이지는 동 목록을 넣지 않으므로 한 번만 렌더링해서 재사용
+    global _INDEX_BODY
+    if _INDEX_BODY is None:
+        html = render_template(
+            "index.html",
+            gus=sorted(LOC.keys()),
+            loc_url=f"/api/locations?v={LOC_BODY.etag}",
+            main_js_url=_static_url("main.js"),
+        )
+        _INDEX_BODY = CachedBody(html.encode("utf-8"), "text/html")
+    return _INDEX_BODY.response(request, cache_control="no-cache")
+
+@app.route("/api/locations", methods=["GET"])
+def locations():
+    """구 → 동 → 격자(nx, ny) (main.js 에서 사용, ?v=ETag 로 버전 지정)"""
+    cache_control = f"public, max-age={HTTP_LOCATIONS_MAX_AGE}" if request.args.get("v") == LOC_BODY.etag else "no-cache"
+    return LOC_BODY.response(request, cache_control=cache_control)
+
+@app.route("/api/result-cache", methods=["GET"])
+def result_cache_status():
+    """과거 실제 데이터 결과 화면 캐시 hit/miss 통계"""
+    return jsonify(RESULT_CACHE.stats())
+
+@app.route("/api/db-pool", methods=["GET"])
+def db_pool_status():
+    """커넥션 풀 포화도 / 대기시간 통계"""
+    return jsonify(pool_stats())
+
+@app.route("/api/sales-store", methods=["GET"])
+def sales_store_status():
+    """실제 데이터 저장소 조회 횟수 / 평균 시간"""
+    return jsonify(SALES_STORE.stats())
+
+@app.route("/api/sales-store/refresh", methods=["POST"])
+def sales_store_refresh():
+    """메모리 색인을 원본 저장소에서 다시 만듦 (SALES_MEMORY_INDEX=1 일 때)"""
+    denied = _check_admin_token()
+    if denied:
+        return denied
+    if not hasattr(SALES_STORE, "refresh"):
+        return jsonify({"error": "메모리 색인을 사용하지 않습니다 (SALES_MEMORY_INDEX=1)"}), 409
+    if INIT_STATS["prefork"]:
+        # 요청을 받은 워커 하나만 새 색인을 쓰게 되므로 prefork 서버에서는 재시작으로 반영
+        return jsonify({"error": "prefork 서버에서는 워커마다 색인이 달라지므로 서버를 재시작해서 반영하세요"}), 409
+    try:
+        refreshed = SALES_STORE.refresh()
+        RESULT_CACHE.clear()
+        return jsonify(refreshed)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+@app.route("/api/predict-io", methods=["GET"])
+def predict_io_status():
+    """실제 데이터/날씨 동시 조회의 의존성별 시간, 시간 초과 횟수"""
+    return jsonify(dict(IO_POOL.stats(), enabled=PREDICT_CONCURRENT_IO))
+
+@app.route("/api/materialized", methods=["GET"])
+def materialized_status():
+    """예측 사전 계산 상태 (행 수, 계산 시각, 적중/누락/만료 횟수)"""
+    return jsonify(dict(MATERIALIZER.stats(), enabled=MATERIALIZE_PREDICTIONS))
+
+@app.route("/api/materialized/refresh", methods=["POST"])
+def materialized_refresh():
+    """예측 사전 계산을 지금 실행"""
+    denied = _check_admin_token()
+    if denied:
+        return denied
+    rows = MATERIALIZER.run()
+    return jsonify(dict(MATERIALIZER.stats(), written=rows))
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus 텍스트 형식 지표 (단계별 시간 histogram, 캐시 적중률 등)"""
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/api/fallback", methods=["GET"])
+def fallback_status():
+    """통계 대체 예측 사용 방식과 과부하 처리 횟수"""
+    with _INFLIGHT_LOCK:
+        shed = dict(SHED_STATS, inflight=_INFLIGHT)
+    return jsonify({
+        "mode": FALLBACK_MODE,
+        "shed_inflight": PREDICT_SHED_INFLIGHT,
+        "load_shedding": shed,
+        "estimator": FALLBACK.stats(),
+    })
+
+@app.route("/api/prediction-cache", methods=["GET"])
+def prediction_cache_status():
+    """예측 캐시 hit/miss 통계"""
+    return jsonify(PRED_CACHE.stats())
+
+@app.route("/api/weather-cache", methods=["GET"])
+def weather_cache_status():
+    """날씨 캐시 hit/miss 통계"""
+    return jsonify(WEATHER_CACHE.stats())
+
+@app.route("/api/kma-client", methods=["GET"])
+def kma_client_status():
+    """기상청 API 호출/거절/합치기 횟수, 서킷 상태"""
+    return jsonify(KMA.stats())
+
+@app.route("/api/weather-prefetch", methods=["GET"])
+def weather_prefetch_status():
+    """날씨 예열 상태"""
+    return jsonify(PREFETCHER.stats())
+
+@app.route("/api/models", methods=["GET"])
+def models_status():
+    """모델별 로드 시간 / 메모리"""
+    return jsonify(MODEL_REGISTRY.stats())
+
+def _check_admin_token():
+    """X-Admin-Token 헤더 확인, 문제 있으면 (응답, 상태코드)"""
+    if not MODEL_ADMIN_TOKEN:
+        return jsonify({"error": "MODEL_ADMIN_TOKEN이 설정되지 않았습니다"}), 403
+    if request.headers.get("X-Admin-Token") != MODEL_ADMIN_TOKEN:
+        return jsonify({"error": "권한 없음"}), 403
+    return None
+
+@app.route("/api/models/reload", methods=["POST"])
+def models_reload():
+    """manifest를 다시 읽어 새 모델 세트를 로드한 뒤 교체 (models 폴더 아래 다른 폴더도 지정 가능)"""
+    denied = _check_admin_token()
+    if denied:
+        return denied
+
+    models_dir = MODELS_DIR
+    sub = (request.get_json(silent=True) or {}).get("models_dir")
+    if sub:
+        models_dir = os.path.realpath(os.path.join(MODELS_DIR, sub))
+        if os.path.commonpath([models_dir, os.path.realpath(MODELS_DIR)]) != os.path.realpath(MODELS_DIR):
+            return jsonify({"error": "models 폴더 밖은 지정할 수 없습니다"}), 400
+    try:
+        version = MODEL_REGISTRY.reload(models_dir)
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "version": MODEL_REGISTRY.version}), 409
+    if MODEL_SYNC is not None:
+        MODEL_SYNC.publish(models_dir, version)
+    return jsonify({"version": version, "previous_version": MODEL_REGISTRY.stats()["previous_version"]})
+
+@app.route("/api/models/rollback", methods=["POST"])
+def models_rollback():
+    """직전 모델 세트로 즉시 되돌림"""
+    denied = _check_admin_token()
+    if denied:
+        return denied
+    try:
+        version = MODEL_REGISTRY.rollback()
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "version": MODEL_REGISTRY.version}), 409
+    if MODEL_SYNC is not None:
+        MODEL_SYNC.publish(MODEL_REGISTRY.snapshot().models_dir, version)
+    return jsonify({"version": version})
+
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    여러 동 × 여러 날짜 예측 (JSON 요청 → NDJSON/CSV 스트리밍, batch_predict.py)
+    날씨는 (격자, 날짜)마다 한 번만 조회하고, 예측은 청크 단위로 시간대 모델마다 한 번씩 호출
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "JSON 객체로 요청해주세요"}), 400
+    fmt = (request.args.get("format") or body.get("format") or "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": f"지원하지 않는 format: {fmt} (ndjson/csv)"}), 400
+    try:
+        targets, dates, hours = parse_batch_request(body, LOC)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def _weather(nx, ny, ymd8):
+        return resolve_weather(nx, ny, ymd8)
+
+    def _generate():
+        stats = {}
+        records = iter_batch_predictions(targets, dates, hours, LOC, _weather, PREDICTOR,
+                                         time_labels=TIME_LABELS, stats=stats)
+        yield from (to_csv(records) if fmt == "csv" else to_ndjson(records))
+        print(f"📦 배치 예측: 동 {len(targets)} × 날짜 {len(dates)} = {stats['pairs']:,}건, "
+              f"날씨 조회 {stats['weather_lookups']}회, {stats['elapsed_sec']:.2f}초", flush=True)
+
+    if fmt == "csv":
+        return Response(stream_with_context(_generate()), mimetype="text/csv",
+                        headers={"Content-Disposition": "attachment; filename=predictions.csv"})
+    return Response(stream_with_context(_generate()), mimetype="application/x-ndjson")
+
+@app.route("/api/worker", methods=["GET"])
+def worker_status():
+    """이 워커의 pid, 초기화 시간, 메모리(MB: rss / pss / uss)"""
+    memory = {k: round(v / 1e6, 1) for k, v in process_memory().items()}
+    return jsonify(dict(INIT_STATS, pid=os.getpid(), memory_mb=memory))
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """프로세스 생존 여부"""
+    return jsonify({"status": "ok"})
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """모델 로드 완료 여부 + DB 연결 상태 (DB 확인은 백그라운드로, 응답은 마지막 결과)"""
+    _refresh_db_status()
+    with _DB_STATUS_LOCK:
+        db = dict(_DB_STATUS)
+    models_ready = MODEL_REGISTRY.ready()
+    is_ready = models_ready and (db["ok"] is True or not READY_REQUIRE_DB)
+    body = {
+        "ready": is_ready,
+        "models": {"ready": models_ready, "loaded": MODEL_REGISTRY.loaded_hours},
+        "db": db,
+    }
+    return jsonify(body), (200 if is_ready else 503)
+
+@app.route("/predict", methods=["GET", "POST"])
+def predict():
+    shed = _enter_predict()
+    trace = Trace(STAGE_SECONDS)
+    g.data_type, status = "invalid", 500
+    try:
+        resp = app.make_response(_predict(shed, trace))
+        status = resp.status_code
+        # 브라우저 개발자 도구에서 단계별 시간 확인용
+        resp.headers["Server-Timing"] = trace.server_timing()
+        return resp
+    finally:
+        _exit_predict()
+        PREDICT_SECONDS.observe(trace.elapsed, data_type=g.data_type)
+        PREDICT_REQUESTS.inc(data_type=g.data_type, status=status)
+
+def _predict(shed: bool, trace: Trace):
+    # GET(주소로 다시 열기/북마크) / POST 둘 다 받음
+    gu = request.values.get("gu")
+    dong = request.values.get("dong")
+    ymd = request.values.get("date")
+
+    if not (gu and dong and ymd):
+        return "입력값이 부족합니다.", 400
+
+    if gu not in LOC:
+        return f"선택한 구가 LOC에 없음: {gu}", 400
+    if dong not in LOC[gu]:
+        return f"선택한 동이 LOC[{gu}]에 없음: {dong}", 400
+
+    target_ymd = ymd.replace("-", "")
+    dt = datetime.strptime(target_ymd, "%Y%m%d")
+    day = dt.weekday() + 1
+
+    nx = int(LOC[gu][dong]["nx"])
+    ny = int(LOC[gu][dong]["ny"])
+
+    # 요청마다 찍던 상세 출력은 LOG_LEVEL=DEBUG 에서만
+    debug = log_enabled("DEBUG")
+    if debug:
+        log("DEBUG", f"\n{'='*50}\n📍 예측 요청: {gu} {dong}, 날짜: {ymd}, 요일: {day}\n{'='*50}")
+
+    dong_norm = _norm_dong_name(dong)
+    if debug:
+        log("DEBUG", f"🔍 동 정규화: '{dong}' -> '{dong_norm}'")
+    
+    use_actual = (ACTUAL_START_YMD <= target_ymd <= ACTUAL_END_YMD)
+
+    # 지난 날짜의 실제 데이터 결과는 바뀌지 않으므로 렌더링한 화면을 그대로 재사용
+    # (누락 시간대 보정 예측이 섞일 수 있어서 모델 버전도 키에 포함)
+    result_key = None
+    if use_actual and not shed and target_ymd < datetime.now().strftime("%Y%m%d"):
+        result_key = (gu, dong, ymd, MODEL_REGISTRY.version)
+        with trace.stage("result_cache"):
+            cached = RESULT_CACHE.get(result_key)
+        if cached is not None:
+            g.data_type = "actual"
+            log("INFO", f"📍 {gu} {dong} {ymd} → actual (결과 캐시), {trace.elapsed * 1000:.1f}ms")
+            return cached.response(request, cache_control=f"public, max-age={HTTP_RESULT_MAX_AGE}")
+
+    # 미리 계산된 예측이 있으면 날씨/실제 데이터 조회 없이 바로 사용 (실제 데이터 기간 밖만)
+    materialized = None
+    if MATERIALIZE_PREDICTIONS and not use_actual:
+        with trace.stage("materialized"):
+            materialized = PRED_TABLE.lookup(gu, dong, target_ymd, MODEL_REGISTRY.version)
+
+    if materialized:
+        actual_day = None
+        temp, rain = materialized["temp"], materialized["rain"]
+        weather_source, weather_error = materialized["weather_source"], None
+        if debug:
+            log("DEBUG", f"🧮 사전 계산 예측 사용 (계산 시각 {materialized['computed_at']})")
+    else:
+        # 실제 데이터 + 날씨 조회 (동시에, 의존성별 제한 시간)
+        actual_day, (temp, rain, weather_source, weather_error) = fetch_actual_and_weather(nx, ny, target_ymd, dong_norm, trace)
 
     results = []
     total_amt = 0
     total_cnt = 0
 
     # 실제 데이터 사용 가능 여부 확인
-    use_actual = (ACTUAL_START_YMD <= target_ymd <= ACTUAL_END_YMD)
     has_any_actual = False
+    models_only = False
     
-    if use_actual:
-        has_any_actual = _check_actual_data_exists(target_ymd, dong_norm)
+    if use_actual and actual_day:
+        has_any_actual = actual_day["exists"]
     
-    print(f"\n📊 데이터 사용 판단:", flush=True)
-    print(f"  - target_ymd: {target_ymd}", flush=True)
-    print(f"  - dong (원본): '{dong}'", flush=True)
-    print(f"  - dong_norm (정규화): '{dong_norm}'", flush=True)
-    print(f"  - use_actual (날짜 범위): {use_actual}", flush=True)
-    print(f"  - has_any_actual (DB 데이터 존재): {has_any_actual}", flush=True)
+    if debug:
+        log("DEBUG", "\n".join([
+            "\n📊 데이터 사용 판단:",
+            f"  - target_ymd: {target_ymd}",
+            f"  - dong (원본): '{dong}'",
+            f"  - dong_norm (정규화): '{dong_norm}'",
+            f"  - use_actual (날짜 범위): {use_actual}",
+            f"  - has_any_actual (DB 데이터 존재): {has_any_actual}",
+        ]))
 
     if use_actual and has_any_actual:
-        print(f"✅ 실제데이터 사용 (Oracle DB): {target_ymd} / {dong_norm}", flush=True)
+        if debug:
+            log("DEBUG", f"✅ 실제데이터 사용 ({SALES_STORE.label}): {target_ymd} / {dong_norm}")
         data_type = "actual"
         
+        def _has_actual(rec):
+            return rec and (not np.isnan(rec.get("amt", np.nan))) and (not np.isnan(rec.get("cnt", np.nan)))
+
+        # 실제 데이터가 빠진 시간대만 모아서 한 번에 예측
+        missing = [h for h in range(1, 11) if not _has_actual(actual_day["hours"].get(h))]
+        preds, sources = {}, {}
+        if missing:
+            with trace.stage("inference"):
+                preds = predict_day_any(gu, dong, day, temp, rain, hours=missing, shed=shed, sources=sources)
+        # 누락 시간대를 모두 모델로 보정했는지 (모델이 없거나 실패한 시간대는 통계 예측이 섞임)
+        models_only = all(sources.get(h) == "model" for h in missing)
+
         for hour in range(1, 11):
-            rec = _get_actual_hour_from_db(target_ymd, dong_norm, hour)
-            if rec and (not np.isnan(rec.get("amt", np.nan))) and (not np.isnan(rec.get("cnt", np.nan))):
+            rec = actual_day["hours"].get(hour)
+            if hour not in preds:
                 amt_i = int(round(rec["amt"]))
                 cnt_i = int(round(rec["cnt"]))
                 src = "실제"
             else:
-                pred_amt, pred_cnt = predict_amt_cnt_ml(
-                    gu=gu, dong=dong, hour=hour, day=day, temp=temp, rain=rain
-                )
+                pred_amt, pred_cnt = preds[hour]
                 amt_i = int(round(pred_amt))
                 cnt_i = int(round(pred_cnt))
-                src = "예측(누락보정)"
+                src = "예측(누락보정)" if sources.get(hour) == "model" else "예측(누락보정, 통계)"
 
             total_amt += amt_i
             total_cnt += cnt_i
@@ -611,13 +1010,20 @@ def predict():
                 "VALUE_SOURCE": src,
             })
     else:
-        print(f"🔮 예측 사용: {target_ymd} / {dong_norm}", flush=True)
+        if debug:
+            log("DEBUG", f"🔮 예측 사용: {target_ymd} / {dong_norm}")
         data_type = "prediction"
         
+        if materialized:
+            preds = materialized["preds"]
+        else:
+            with trace.stage("inference"):
+                preds = predict_day_any(gu, dong, day, temp, rain, shed=shed)
+        if shed and not materialized and debug:
+            log("DEBUG", f"🪶 과부하 → 통계 예측 사용 (FALLBACK_MODE={FALLBACK_MODE})")
+
         for hour in range(1, 11):
-            pred_amt, pred_cnt = predict_amt_cnt_ml(
-                gu=gu, dong=dong, hour=hour, day=day, temp=temp, rain=rain
-            )
+            pred_amt, pred_cnt = preds[hour]
 
             amt_i = int(round(pred_amt))
             cnt_i = int(round(pred_cnt))
@@ -630,34 +1036,44 @@ def predict():
                 "HOUR_LABEL": TIME_LABELS.get(hour, ""),
                 "PRED_AMT_STR": f"{amt_i:,}원",
                 "PRED_CNT_STR": f"{cnt_i:,}건",
-                "VALUE_SOURCE": "예측",
+                "VALUE_SOURCE": "예측(통계)" if shed and not materialized else "예측",
             })
             
     total_amt_str = f"{total_amt:,}원"
     total_cnt_str = f"{total_cnt:,}건"
     
-    print(f"\n📊 총합: AMT={total_amt_str}, CNT={total_cnt_str}", flush=True)
-    print(f"{'='*50}\n", flush=True)
-
-    return render_template(
-        "result.html",
-        gu=gu,
-        dong=dong,
-        date=ymd,
-        nx=nx,
-        ny=ny,
-        temp=temp,
-        rain=rain,
-        weather_source=weather_source,
-        weather_error=weather_error,
-        results=results,
-        total_amt_str=total_amt_str,
-        total_cnt_str=total_cnt_str,
-        data_type=data_type,
-    )
+    g.data_type = data_type
+    if debug:
+        log("DEBUG", f"\n📊 총합: AMT={total_amt_str}, CNT={total_cnt_str}\n{'='*50}\n")
+
+    with trace.stage("render"):
+        html = render_template(
+            "result.html",
+            gu=gu,
+            dong=dong,
+            date=ymd,
+            nx=nx,
+            ny=ny,
+            temp=temp,
+            rain=rain,
+            weather_source=weather_source,
+            weather_error=weather_error,
+            results=results,
+            total_amt_str=total_amt_str,
+            total_cnt_str=total_cnt_str,
+            data_type=data_type,
+        )
+    log("INFO", f"📍 {gu} {dong} {ymd} → {data_type}, {trace.elapsed * 1000:.1f}ms ({trace.summary()})")
+
+    # 실제 데이터 + 날씨 조회 성공일 때만 결과 캐시에 저장 (시간 초과/실패/통계 보정 결과는 다음에 다시 계산)
+    if result_key is not None and data_type == "actual" and weather_error is None and models_only:
+        entry = CachedBody(html.encode("utf-8"), "text/html")
+        RESULT_CACHE.put(result_key, entry)
+        return entry.response(request, cache_control=f"public, max-age={HTTP_RESULT_MAX_AGE}")
+    return html
 
 if __name__ == "__main__":
     print("\n" + "="*50)
     print("🚀 수원시 시간대별 예상매출 예측 서버 시작")
     print("="*50 + "\n")
-    app.run(debug=True)
+    create_app().run(debug=True)
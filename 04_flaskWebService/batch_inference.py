@@ -0,0 +1,131 @@
+"""
+시간대별 모델 배치 추론
+- 모델 로드 시점에 입력 컬럼(feature schema)을 한 번만 결정
+- 요청 1건(10개 시간대) 또는 여러 건을 모델당 한 번의 predict 호출로 처리
+"""
+import numpy as np
+import pandas as pd
+
+# 노트북에서 학습한 모델들이 사용한 입력 컬럼 후보 (예전 predict_amt_cnt_ml의 시도 순서)
+FEATURE_SCHEMAS = [
+    ("DONG", "DAY", "TEMP", "RAIN"),
+    ("GU", "DONG", "DAY", "TEMP", "RAIN"),
+    ("DONG", "DAY", "TEMP"),
+    ("GU", "DONG", "DAY", "TEMP"),
+]
+
+ALL_COLUMNS = ["GU", "DONG", "DAY", "TEMP", "RAIN"]
+
+# 스키마 확인용 샘플 입력 (feature_names_in_ 이 없는 모델에만 사용)
+_PROBE_ROW = {"GU": "팔달구", "DONG": "고등동", "DAY": 1, "TEMP": 15.0, "RAIN": 0.0}
+
+
+def resolve_feature_columns(model):
+    """모델이 기대하는 입력 컬럼 목록 반환"""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        return tuple(str(c) for c in names)
+
+    # 학습 당시 컬럼 정보가 없으면 로드 시점에 한 번만 후보를 시험
+    for cols in FEATURE_SCHEMAS:
+        try:
+            model.predict(pd.DataFrame([{c: _PROBE_ROW[c] for c in cols}]))
+            return cols
+        except Exception:
+            continue
+    raise RuntimeError("모델 입력 컬럼을 확인할 수 없습니다")
+
+
+def make_frame(rows):
+    """
+    rows: [{"gu", "dong", "day", "temp", "rain"}, ...]
+    모든 시간대 모델이 공유하는 입력 DataFrame을 한 번만 생성
+    """
+    return pd.DataFrame({
+        "GU": [r["gu"] for r in rows],
+        "DONG": [r["dong"] for r in rows],
+        "DAY": [int(r["day"]) for r in rows],
+        "TEMP": [float(r["temp"]) for r in rows],
+        "RAIN": [float(r.get("rain", 0.0)) for r in rows],
+    }, columns=ALL_COLUMNS)
+
+
+class HourModel:
+    """시간대 하나의 모델 + 입력 컬럼"""
+
+    backend = "sklearn"
+
+    def __init__(self, hour: int, model):
+        self.hour = hour
+        self.model = model
+        self.columns = list(resolve_feature_columns(model))
+
+    def predict_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """(n, 2) 배열 [AMT, CNT], 음수는 0으로 (frame은 self.columns 순서여야 함)"""
+        pred = np.asarray(self.model.predict(frame), dtype=np.float64)
+        return np.maximum(pred[:, :2], 0.0)
+
+
+class BatchPredictor:
+    """시간대별 모델 묶음에 대한 배치 추론"""
+
+    def __init__(self, models: dict = None, hour_models=None, fallback=None):
+        """
+        models: {hour: 학습된 모델}
+        hour_models: .get(hour) → HourModel 을 제공하는 객체 (예: ModelRegistry)
+        fallback: 모델이 없거나 실패한 시간대에 쓸 예측기 (예: FallbackEstimator), 없으면 0
+        """
+        if hour_models is None:
+            hour_models = {hour: HourModel(hour, m) for hour, m in (models or {}).items()}
+        self.hour_models = hour_models
+        self.fallback = fallback
+
+    def _fallback(self, frame: pd.DataFrame, hour: int) -> np.ndarray:
+        if self.fallback is None:
+            return np.zeros((len(frame), 2))
+        return self.fallback.predict_frame(frame, [hour])[hour]
+
+    def predict_frame(self, frame: pd.DataFrame, hours=range(1, 11), sources: dict = None):
+        """
+        frame의 모든 행을 시간대별로 예측
+        반환: {hour: (n, 2) 배열}, 모델이 없거나 실패한 시간대는 fallback (없으면 0)
+        sources: 넘기면 시간대별로 "model" / "fallback" 을 기록
+        """
+        if sources is None:
+            sources = {}
+        out = {}
+        # 레지스트리면 현재 버전을 한 번만 잡아서 모든 시간대를 같은 버전으로 예측
+        snapshot = getattr(self.hour_models, "snapshot", None)
+        hour_models = snapshot() if snapshot else self.hour_models
+        # 같은 컬럼 구성을 쓰는 모델끼리는 컬럼 선택 결과를 공유
+        views = {}
+        for hour in hours:
+            hm = hour_models.get(hour)
+            if hm is None:
+                out[hour] = self._fallback(frame, hour)
+                sources[hour] = "fallback"
+                continue
+            key = tuple(hm.columns)
+            if key not in views:
+                views[key] = frame[hm.columns]
+            try:
+                out[hour] = hm.predict_frame(views[key])
+                sources[hour] = "model"
+            except Exception as e:
+                print(f"⚠️  모델 예측 실패 (hour {hour}): {e}", flush=True)
+                out[hour] = self._fallback(frame, hour)
+                sources[hour] = "fallback"
+        return out
+
+    def predict_rows(self, rows, hours=range(1, 11), sources: dict = None):
+        """여러 요청을 한 번에 예측 → {hour: (n, 2) 배열}"""
+        if not rows:
+            return {hour: np.zeros((0, 2)) for hour in hours}
+        return self.predict_frame(make_frame(rows), hours, sources)
+
+    def predict_day(self, gu: str, dong: str, day: int, temp: float, rain: float = 0.0, hours=range(1, 11),
+                    sources: dict = None):
+        """요청 1건의 시간대별 예측 → {hour: (amt, cnt)}"""
+        row = {"gu": gu, "dong": dong, "day": day, "temp": temp, "rain": rain}
+        preds = self.predict_rows([row], hours, sources)
+        return {hour: (float(p[0, 0]), float(p[0, 1])) for hour, p in preds.items()}
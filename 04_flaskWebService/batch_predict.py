@@ -0,0 +1,198 @@
+"""
+여러 동 × 여러 날짜 예측 (POST /api/predict/batch)
+- 날씨는 (격자, 날짜)마다 한 번만 조회
+- 예측은 청크 단위로 모아 시간대 모델마다 한 번씩 호출 (batch_inference.BatchPredictor)
+- 결과는 청크가 끝날 때마다 NDJSON / CSV 로 흘려보냄
+
+요청 예:
+    {"gu": "팔달구", "days": 7}
+    {"dongs": [{"gu": "팔달구", "dong": "고등동"}, "장안구 파장동"], "date_from": "2025-11-01", "date_to": "2025-11-07"}
+    {"dates": ["2025-11-01", "2025-11-03"], "hours": [4, 5], "format": "csv"}
+"""
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 한 요청에서 허용하는 (동, 날짜) 조합 수
+BATCH_MAX_PAIRS = int(os.getenv("BATCH_MAX_PAIRS", "50000"))
+# 한 번에 모아서 예측할 (동, 날짜) 조합 수
+BATCH_CHUNK_PAIRS = int(os.getenv("BATCH_CHUNK_PAIRS", "2000"))
+
+FIELDS = ["gu", "dong", "date", "day", "hour", "hour_label",
+          "pred_amt", "pred_cnt", "temp", "rain", "weather_source", "pred_source"]
+
+
+# =========================
+# 요청 해석
+# =========================
+def _parse_ymd(value) -> str:
+    s = str(value).strip().replace("-", "")
+    try:
+        datetime.strptime(s, "%Y%m%d")
+    except ValueError:
+        raise ValueError(f"날짜 형식이 잘못되었습니다: {value} (YYYY-MM-DD)")
+    return s
+
+
+def parse_targets(body: dict, loc: dict):
+    """[(gu, dong), ...] - dongs 가 없으면 LOC 전체 (gu 로 구 제한 가능)"""
+    dongs = body.get("dongs")
+    if dongs is None:
+        gus = body.get("gu") or sorted(loc)
+        if isinstance(gus, str):
+            gus = [gus]
+        targets = []
+        for gu in gus:
+            if gu not in loc:
+                raise ValueError(f"LOC에 없는 구: {gu}")
+            targets.extend((gu, dong) for dong in sorted(loc[gu]))
+        return targets
+
+    if not isinstance(dongs, list):
+        raise ValueError("dongs 는 목록이어야 합니다")
+    targets = []
+    for item in dongs:
+        if isinstance(item, dict):
+            gu, dong = item.get("gu"), item.get("dong")
+        else:
+            parts = str(item).split()
+            gu, dong = (parts[0], parts[-1]) if len(parts) >= 2 else (None, str(item).strip())
+        if gu is None:
+            # 구 없이 동만 주면 LOC에서 찾음
+            gus = [g for g in loc if dong in loc[g]]
+            if len(gus) != 1:
+                raise ValueError(f"구를 정할 수 없는 동: {dong}")
+            gu = gus[0]
+        if gu not in loc or dong not in loc[gu]:
+            raise ValueError(f"LOC에 없는 동: {gu} {dong}")
+        targets.append((gu, dong))
+    return list(dict.fromkeys(targets))
+
+
+def parse_dates(body: dict, today: datetime = None):
+    """[YYYYMMDD, ...] - dates 목록 / date_from~date_to / 오늘부터 days일"""
+    if body.get("dates") is not None:
+        if not isinstance(body["dates"], list):
+            raise ValueError("dates 는 목록이어야 합니다")
+        return list(dict.fromkeys(_parse_ymd(d) for d in body["dates"]))
+
+    if body.get("date_from") is not None:
+        start = datetime.strptime(_parse_ymd(body["date_from"]), "%Y%m%d")
+        end = datetime.strptime(_parse_ymd(body.get("date_to", body["date_from"])), "%Y%m%d")
+        if end < start:
+            raise ValueError("date_to 가 date_from 보다 빠릅니다")
+        return [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range((end - start).days + 1)]
+
+    try:
+        days = int(body.get("days", 1))
+    except (TypeError, ValueError):
+        raise ValueError("days 는 정수여야 합니다")
+    if days < 1:
+        raise ValueError("days 는 1 이상이어야 합니다")
+    today = today or datetime.now()
+    return [(today + timedelta(days=i)).strftime("%Y%m%d") for i in range(days)]
+
+
+def parse_hours(body: dict):
+    hours = body.get("hours") or list(range(1, 11))
+    try:
+        hours = sorted({int(h) for h in hours})
+    except (TypeError, ValueError):
+        raise ValueError("hours 는 1~10 정수 목록이어야 합니다")
+    if not all(1 <= h <= 10 for h in hours):
+        raise ValueError("hours 는 1~10 정수 목록이어야 합니다")
+    return hours
+
+
+def parse_batch_request(body: dict, loc: dict, max_pairs: int = BATCH_MAX_PAIRS):
+    """→ (targets, dates, hours), 잘못된 요청이면 ValueError"""
+    targets = parse_targets(body, loc)
+    dates = parse_dates(body)
+    hours = parse_hours(body)
+    if len(targets) * len(dates) > max_pairs:
+        raise ValueError(f"요청이 너무 큽니다: 동 {len(targets)} × 날짜 {len(dates)} > {max_pairs}")
+    return targets, dates, hours
+
+
+# =========================
+# 예측
+# =========================
+def iter_batch_predictions(targets, dates, hours, loc, resolve_weather, predictor,
+                           time_labels=None, chunk_pairs: int = BATCH_CHUNK_PAIRS, stats: dict = None):
+    """
+    (동, 날짜, 시간대)마다 결과 dict 를 yield
+    resolve_weather(nx, ny, ymd8) → (temp, rain, source, error)
+    predictor: BatchPredictor
+    pred_source: 시간대별로 학습 모델("model")로 예측했는지 대체 예측("fallback")인지
+    """
+    time_labels = time_labels or {}
+    stats = stats if stats is not None else {}
+    weather = {}
+    start = time.perf_counter()
+    stats.update(pairs=0, weather_lookups=0, chunks=0)
+
+    pairs = [(gu, dong, ymd) for ymd in dates for gu, dong in targets]
+    for i in range(0, len(pairs), chunk_pairs):
+        chunk = pairs[i:i + chunk_pairs]
+        rows, infos = [], []
+        for gu, dong, ymd in chunk:
+            key = (int(loc[gu][dong]["nx"]), int(loc[gu][dong]["ny"]), ymd)
+            if key not in weather:
+                weather[key] = resolve_weather(*key)
+                stats["weather_lookups"] += 1
+            temp, rain, source, _ = weather[key]
+            day = datetime.strptime(ymd, "%Y%m%d").weekday() + 1
+            rows.append({"gu": gu, "dong": dong, "day": day, "temp": temp, "rain": rain})
+            infos.append((gu, dong, ymd, day, temp, rain, source))
+
+        sources = {}
+        preds = predictor.predict_rows(rows, hours, sources)
+        for j, (gu, dong, ymd, day, temp, rain, source) in enumerate(infos):
+            for hour in hours:
+                yield {
+                    "gu": gu,
+                    "dong": dong,
+                    "date": f"{ymd[:4]}-{ymd[4:6]}-{ymd[6:]}",
+                    "day": day,
+                    "hour": hour,
+                    "hour_label": time_labels.get(hour, ""),
+                    "pred_amt": int(round(float(preds[hour][j, 0]))),
+                    "pred_cnt": int(round(float(preds[hour][j, 1]))),
+                    "temp": round(float(temp), 2),
+                    "rain": round(float(rain), 2),
+                    "weather_source": source,
+                    "pred_source": sources.get(hour, "fallback"),
+                }
+        stats["pairs"] += len(chunk)
+        stats["chunks"] += 1
+    stats["elapsed_sec"] = time.perf_counter() - start
+
+
+# =========================
+# 출력 형식
+# =========================
+def to_ndjson(records):
+    for rec in records:
+        yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def to_csv(records, flush_every: int = 1000):
+    """엑셀에서 한글이 깨지지 않도록 BOM(utf-8-sig) 포함"""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDS)
+    buf.write("\ufeff")
+    writer.writeheader()
+    for n, rec in enumerate(records, 1):
+        writer.writerow(rec)
+        if n % flush_every == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
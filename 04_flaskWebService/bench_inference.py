@@ -0,0 +1,133 @@
+"""
+추론 지연시간 벤치마크
+예전 방식(시간대마다 1행 DataFrame + predict, 실패 시 스키마 재시도)과
+BatchPredictor(모델당 1회 predict)를 비교
+
+사용법:
+    python bench_inference.py [--requests 200] [--batch 500]
+"""
+import argparse
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from batch_inference import FEATURE_SCHEMAS, BatchPredictor
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+DONGS = ["고등동", "매교동", "매산동", "우만1동", "우만2동", "행궁동"]
+
+
+def load_models(fill_missing=True):
+    """
+    있는 모델만 로드 (압축 해제 안 된 시간대는 건너뜀)
+    fill_missing이면 빠진 시간대를 로드된 모델로 채워 10개 시간대 호출을 재현
+    """
+    models = {}
+    for hour in range(1, 11):
+        path = os.path.join(MODELS_DIR, f"hour_{hour:02d}_amt_cnt.joblib")
+        if os.path.exists(path):
+            models[hour] = joblib.load(path)
+    if fill_missing and models:
+        loaded = list(models.values())
+        for hour in range(1, 11):
+            models.setdefault(hour, loaded[(hour - 1) % len(loaded)])
+    return models
+
+
+def legacy_predict_day(models, gu, dong, day, temp, rain):
+    """예전 predict_amt_cnt_ml 방식"""
+    out = {}
+    for hour, model in models.items():
+        out[hour] = (0.0, 0.0)
+        for cols in FEATURE_SCHEMAS:
+            features = {"GU": gu, "DONG": dong, "DAY": day, "TEMP": temp, "RAIN": rain}
+            try:
+                pred = model.predict(pd.DataFrame([{c: features[c] for c in cols}]))[0]
+                out[hour] = (max(0.0, float(pred[0])), max(0.0, float(pred[1])))
+                break
+            except Exception:
+                continue
+    return out
+
+
+def make_requests(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "gu": "팔달구",
+            "dong": DONGS[i % len(DONGS)],
+            "day": int(rng.integers(1, 8)),
+            "temp": float(rng.uniform(-5, 30)),
+            "rain": float(rng.choice([0.0, 0.0, 0.0, rng.uniform(0, 20)])),
+        }
+        for i in range(n)
+    ]
+
+
+def _percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return f"p50={np.percentile(arr, 50):.2f}ms  p95={np.percentile(arr, 95):.2f}ms  mean={arr.mean():.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시간대별 모델 추론 벤치마크")
+    parser.add_argument("--requests", type=int, default=200, help="요청 1건 단위 반복 횟수")
+    parser.add_argument("--batch", type=int, default=500, help="배치 추론에 넣을 요청 수")
+    parser.add_argument("--no-fill", action="store_true", help="빠진 시간대를 다른 모델로 채우지 않음")
+    args = parser.parse_args()
+
+    models = load_models(fill_missing=not args.no_fill)
+    if not models:
+        raise SystemExit(f"모델 파일이 없습니다: {MODELS_DIR}")
+    predictor = BatchPredictor(models)
+    reqs = make_requests(args.requests)
+
+    print(f"\n{'='*60}")
+    print(f"⏱️  추론 벤치마크 (모델 {len(models)}개: hour {sorted(models)})")
+    print(f"{'='*60}")
+
+    # 워밍업
+    legacy_predict_day(models, **reqs[0])
+    predictor.predict_day(**reqs[0])
+
+    legacy_ms = []
+    for r in reqs:
+        t0 = time.perf_counter()
+        legacy_predict_day(models, **r)
+        legacy_ms.append((time.perf_counter() - t0) * 1000)
+
+    batch_ms = []
+    for r in reqs:
+        t0 = time.perf_counter()
+        predictor.predict_day(**r)
+        batch_ms.append((time.perf_counter() - t0) * 1000)
+
+    print(f"  예전 방식 (요청당): {_percentiles(legacy_ms)}")
+    print(f"  배치 방식 (요청당): {_percentiles(batch_ms)}")
+
+    many = make_requests(args.batch, seed=1)
+    t0 = time.perf_counter()
+    predictor.predict_rows(many)
+    total_ms = (time.perf_counter() - t0) * 1000
+    print(f"  배치 {args.batch}건 한 번에: 총 {total_ms:.1f}ms → 요청당 {total_ms / args.batch:.3f}ms")
+
+    # 결과가 같은지 확인
+    for r in reqs[:20]:
+        a = legacy_predict_day(models, **r)
+        b = predictor.predict_day(**r, hours=sorted(models))
+        for hour in models:
+            assert np.allclose(a[hour], b[hour]), f"hour {hour} 결과 불일치: {a[hour]} vs {b[hour]}"
+    print(f"  ✅ 예측값 일치 확인 (20건)")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+"""
+예측 서비스 벤치마크 (오프라인, 재현 가능)
+- 모델: models/ 의 실제 joblib 파일
+- 날씨: 가짜 기상청 서버 (fake_kma_server.py, 응답 지연 조절 가능)
+- SALES_DATA: 평균 테이블로 만든 합성 데이터를 임시 SQLite 사본으로 (SALES_STORE_BACKEND=sqlite)
+- 동/격자: data/suwon_locations.json 이 없으면 평균 테이블의 동으로 임시 파일 생성
+
+측정
+- 모델 로드 시간 (app import 전체 / 시간대별)
+- 요청 1건 지연 시간 p50/p90/p99 (실제 데이터 / 예보 / 과거 예측 시나리오별, Flask test client)
+- 동시 요청 처리량 (로컬 HTTP 서버 + 동시 사용자 수별 req/s, 지연 시간)
+- 워커 메모리 (RSS: 시작 전 / 모델 로드 후 / 부하 후)
+- prefork 워커 메모리 (gunicorn preload 와 같은 순서로 fork, 워커별 RSS/PSS/USS, preload 유무 비교)
+
+결과는 bench_results/bench_YYYYmmdd_HHMMSS.json 에 저장, --compare 로 이전 결과와 비교
+
+사용법:
+    python bench_service.py [--requests 300] [--concurrency 1,4,16] [--duration 10] [--kma-latency 0.05]
+    python bench_service.py --prefork-workers 4     # 0이면 prefork 메모리 측정 생략 (리눅스만)
+    python bench_service.py --compare bench_results/bench_20250101_120000.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from fake_kma_server import start_fake_kma_server
+from sales_store import COLUMNS, write_sqlite
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+RESULTS_DIR = os.path.join(BASE_DIR, "bench_results")
+
+# 합성 실제 데이터 기간 (app.py 의 ACTUAL_START_YMD ~ ACTUAL_END_YMD 안)
+STANDIN_FROM = "20240101"
+STANDIN_TO = "20241231"
+# 수원시 팔달구 근처 격자
+STANDIN_GRID = {"nx": 60, "ny": 121}
+
+
+# =========================
+# 메모리
+# =========================
+def rss_mb():
+    """현재 RSS(MB), /proc 이 없으면 최대 RSS"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 는 바이트, 리눅스는 KB
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+# =========================
+# 오프라인 환경 준비
+# =========================
+def make_standin_loc(path):
+    """평균 테이블의 동 → {"팔달구": {동: {"nx", "ny"}}} (실제 격자 파일이 없을 때만)"""
+    dongs = sorted(pd.read_csv(os.path.join(MODELS_DIR, "mean_dong_hour.csv"), encoding="utf-8-sig")["DONG"].unique())
+    loc = {"팔달구": {d: dict(STANDIN_GRID) for d in dongs}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(loc, f, ensure_ascii=False)
+    return loc
+
+
+def make_standin_sales(loc, seed=0):
+    """
+    SALES_DATA 대신 쓸 합성 데이터 (COLUMNS 형식 DataFrame)
+    동 × 시간대 × 요일 평균에 잡음을 곱해서 만들고, 일부 시간대는 비워서 누락보정 경로도 타게 함
+    """
+    rng = np.random.default_rng(seed)
+    means = pd.read_csv(os.path.join(MODELS_DIR, "mean_dong_hour_day.csv"), encoding="utf-8-sig")
+    means = means.set_index(["DONG", "HOUR", "DAY"])
+    dongs = sorted({d for gu in loc.values() for d in gu})
+    days = pd.date_range(STANDIN_FROM, STANDIN_TO, freq="D")
+
+    rows = []
+    for ts in days:
+        ymd, day = ts.strftime("%Y%m%d"), ts.weekday() + 1
+        temp = 13.0 - 14.0 * np.cos(2 * np.pi * (ts.dayofyear - 15) / 365.0) + rng.normal(0, 2)
+        rain = float(rng.choice([0.0] * 4 + [rng.uniform(0, 30)]))
+        for dong in dongs:
+            for hour in range(1, 11):
+                if rng.random() < 0.02:
+                    continue
+                key = (dong, hour, day)
+                amt, cnt = (means.loc[key, "AMT"], means.loc[key, "CNT"]) if key in means.index else (1e5, 20.0)
+                amt *= rng.lognormal(0, 0.2)
+                cnt = max(1, int(cnt * rng.lognormal(0, 0.2)))
+                rows.append((ymd, dong, hour, day, float(amt), cnt, float(amt) / cnt, round(temp, 1), round(rain, 1)))
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def prepare_env(workdir, args):
+    """임시 파일/가짜 서버를 만들고 app 이 읽을 환경 변수 설정 → (kma_server, info)"""
+    loc_path = os.path.join(BASE_DIR, "data", "suwon_locations.json")
+    if not os.path.exists(loc_path) or args.standin_loc:
+        loc_path = os.path.join(workdir, "suwon_locations.json")
+        make_standin_loc(loc_path)
+    with open(loc_path, "r", encoding="utf-8") as f:
+        loc = json.load(f)
+
+    start = time.perf_counter()
+    sales_path = os.path.join(workdir, "sales.sqlite3")
+    frame = make_standin_sales(loc)
+    write_sqlite([frame], sales_path)
+    sales_sec = time.perf_counter() - start
+
+    kma = start_fake_kma_server(latency=args.kma_latency)
+    env = {
+        "LOC_PATH": loc_path,
+        "SALES_STORE_BACKEND": "sqlite",
+        "SALES_STORE_PATH": sales_path,
+        "SALES_MEMORY_INDEX": "0",
+        "KMA_BASE_URL": kma.base_url,
+        "ASOS_BASE_URL": f"{kma.base_url}/getWthrDataList",
+        "KMA_SERVICE_KEY": "bench",
+        "WEATHER_CACHE_BACKEND": "memory",
+        "WEATHER_PREFETCH": "0",
+        "MATERIALIZE_PREDICTIONS": "0",
+        "MATERIALIZE_DB": os.path.join(workdir, "predictions.sqlite3"),
+        "MODEL_LOAD_MODE": "parallel",
+        "LOG_LEVEL": "WARNING",
+        "PRED_CACHE_SIZE": str(args.pred_cache_size),
+        "MODEL_BACKEND": args.model_backend,
+    }
+    os.environ.update(env)
+    info = {
+        "loc_path": loc_path,
+        "dongs": sum(len(v) for v in loc.values()),
+        "sales_rows": len(frame),
+        "sales_build_sec": round(sales_sec, 3),
+        "env": env,
+    }
+    return kma, loc, info
+
+
+# =========================
+# 측정
+# =========================
+def _summary(samples_ms):
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    if not len(arr):
+        return {"n": 0}
+    return {
+        "n": int(len(arr)),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p90_ms": round(float(np.percentile(arr, 90)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+def make_scenarios(loc, n, seed=1):
+    """시나리오별 /predict 폼 데이터 목록"""
+    rng = np.random.default_rng(seed)
+    pairs = [(gu, dong) for gu in sorted(loc) for dong in sorted(loc[gu])]
+    today = datetime.now()
+    standin_days = pd.date_range(STANDIN_FROM, STANDIN_TO, freq="D")
+
+    def _forms(dates):
+        out = []
+        for i in range(n):
+            gu, dong = pairs[int(rng.integers(len(pairs)))]
+            out.append({"gu": gu, "dong": dong, "date": dates[int(rng.integers(len(dates)))]})
+        return out
+
+    return {
+        # 합성 SALES_DATA 에서 읽음
+        "actual": _forms([d.strftime("%Y-%m-%d") for d in standin_days]),
+        # 가짜 기상청 단기예보 + 모델 예측
+        "forecast": _forms([(today + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(1, 4)]),
+        # 실제 데이터 기간 밖 과거 → 월별 평균 기온 + 모델 예측
+        "past": _forms([(datetime(2021, 1, 1) + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(365)]),
+    }
+
+
+def bench_latency(client, scenarios, warmup=5):
+    """요청 1건씩 차례로 (네트워크 없이 Flask test client)"""
+    out = {}
+    for name, forms in scenarios.items():
+        for form in forms[:warmup]:
+            client.post("/predict", data=form)
+        samples, errors = [], 0
+        for form in forms:
+            t0 = time.perf_counter()
+            r = client.post("/predict", data=form)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            errors += r.status_code != 200
+        out[name] = dict(_summary(samples), errors=errors)
+        print(f"  {name:9s} {out[name]['p50_ms']:8.2f} / {out[name]['p90_ms']:8.2f} / {out[name]['p99_ms']:8.2f} ms"
+              f"  (p50/p90/p99, {len(samples)}건, 실패 {errors})")
+    return out
+
+
+def bench_throughput(flask_app, scenarios, concurrency_levels, duration):
+    """로컬 HTTP 서버(threaded)에 동시 사용자 수별로 duration 초 동안 요청"""
+    import requests
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class _QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True, request_handler=_QuietHandler)
+    threading.Thread(target=server.serve_forever, name="bench-http", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/predict"
+    mixed = [f for forms in scenarios.values() for f in forms]
+
+    out = {}
+    try:
+        for c in concurrency_levels:
+            stop_at = time.perf_counter() + duration
+
+            def _user(idx):
+                samples, errors = [], 0
+                session = requests.Session()
+                i = idx
+                while time.perf_counter() < stop_at:
+                    form = mixed[i % len(mixed)]
+                    i += c
+                    t0 = time.perf_counter()
+                    try:
+                        r = session.post(url, data=form, timeout=30)
+                        errors += r.status_code != 200
+                    except requests.RequestException:
+                        errors += 1
+                    samples.append((time.perf_counter() - t0) * 1000.0)
+                session.close()
+                return samples, errors
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=c) as pool:
+                results = list(pool.map(_user, range(c)))
+            elapsed = time.perf_counter() - start
+            samples = [s for r in results for s in r[0]]
+            errors = sum(r[1] for r in results)
+            out[str(c)] = dict(_summary(samples), errors=errors, rps=round(len(samples) / elapsed, 2))
+            print(f"  동시 {c:3d}: {out[str(c)]['rps']:8.1f} req/s, p50 {out[str(c)].get('p50_ms', 0):.1f}ms, "
+                  f"p99 {out[str(c)].get('p99_ms', 0):.1f}ms, 실패 {errors}")
+    finally:
+        server.shutdown()
+    return out
+
+
+# =========================
+# prefork 워커 메모리
+# =========================
+PREFORK_MARK = "PREFORK_RESULT "
+
+
+def _mb(memory):
+    return {k: round(v / 1e6, 1) for k, v in memory.items()}
+
+
+def prefork_child(workers, n_requests, preload):
+    """
+    (하위 프로세스에서 실행) gunicorn 과 같은 순서로 워커를 fork 하고 워커별 메모리 측정
+    - preload: create_app(prefork=True) → fork → init_worker()
+    - preload 없음: fork → 워커마다 create_app()
+    워커들이 요청을 처리한 뒤 모두 살아 있는 동안 /proc/<pid>/smaps_rollup 을 읽음 (PSS 는 공유 프로세스 수에 따라 달라짐)
+    """
+    import app as app_module
+    from metrics import process_memory
+
+    if preload:
+        app_module.create_app(prefork=True)
+    loc = app_module.LOC
+    if loc is None:
+        with open(os.environ["LOC_PATH"], "r", encoding="utf-8") as f:
+            loc = json.load(f)
+    scenarios = make_scenarios(loc, n_requests)
+    forms = [f for fs in scenarios.values() for f in fs]
+
+    release_r, release_w = os.pipe()
+    children = []
+    for _ in range(workers):
+        done_r, done_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(done_r)
+            os.close(release_w)
+            report = {}
+            try:
+                start = time.perf_counter()
+                if preload:
+                    app_module.init_worker()
+                else:
+                    app_module.create_app()
+                report["init_sec"] = round(time.perf_counter() - start, 3)
+                client = app_module.app.test_client()
+                report["errors"] = sum(client.post("/predict", data=f).status_code != 200 for f in forms)
+            except Exception as e:
+                report["error"] = str(e)
+            os.write(done_w, json.dumps(report).encode("utf-8"))
+            os.close(done_w)
+            os.read(release_r, 1)
+            os._exit(0)
+        os.close(done_w)
+        children.append((pid, done_r))
+
+    out = {"preload": preload, "workers": []}
+    for pid, done_r in children:
+        chunks = []
+        while True:
+            chunk = os.read(done_r, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        os.close(done_r)
+        out["workers"].append(dict(json.loads(b"".join(chunks) or b"{}"), pid=pid))
+    # 모든 워커가 살아 있을 때 측정
+    for w in out["workers"]:
+        w["memory_mb"] = _mb(process_memory(w["pid"]))
+    out["master_memory_mb"] = _mb(process_memory())
+    os.close(release_w)
+    for pid, _ in children:
+        os.waitpid(pid, 0)
+
+    mems = [w["memory_mb"] for w in out["workers"]]
+    out["worker_rss_mb"] = round(float(np.mean([m.get("rss", 0) for m in mems])), 1)
+    out["worker_pss_mb"] = round(float(np.mean([m.get("pss", 0) for m in mems])), 1)
+    out["worker_uss_mb"] = round(float(np.mean([m.get("uss", 0) for m in mems])), 1)
+    # master + 워커 PSS 합 ≈ 서버 전체가 실제로 쓰는 메모리
+    out["total_pss_mb"] = round(out["master_memory_mb"].get("pss", 0) + sum(m.get("pss", 0) for m in mems), 1)
+    print(PREFORK_MARK + json.dumps(out), flush=True)
+
+
+def bench_prefork(workers, n_requests):
+    """preload 있음/없음 각각 하위 프로세스에서 fork 해서 워커 메모리 비교"""
+    if not hasattr(os, "fork") or not os.path.exists("/proc/self/smaps_rollup"):
+        print("  (fork / smaps_rollup 이 없는 환경이라 생략)")
+        return None
+    out = {}
+    for preload in (True, False):
+        cmd = [sys.executable, os.path.abspath(__file__), "--prefork-child", str(workers),
+               "--requests", str(n_requests)] + ([] if preload else ["--no-preload"])
+        proc = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True, env=dict(os.environ))
+        lines = [l for l in proc.stdout.splitlines() if l.startswith(PREFORK_MARK)]
+        if proc.returncode != 0 or not lines:
+            print(f"  ❌ prefork 측정 실패 (preload={preload}): {proc.stderr.strip()[-500:]}")
+            continue
+        result = json.loads(lines[-1][len(PREFORK_MARK):])
+        name = "preload" if preload else "no_preload"
+        out[name] = result
+        print(f"  {name:10s} 워커 {workers}개: 워커당 RSS {result['worker_rss_mb']:.0f}MB / "
+              f"PSS {result['worker_pss_mb']:.0f}MB / USS {result['worker_uss_mb']:.0f}MB, "
+              f"master+워커 PSS 합 {result['total_pss_mb']:.0f}MB")
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _versions():
+    out = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__}
+    for name in ("sklearn", "xgboost", "joblib", "flask"):
+        try:
+            out[name] = getattr(importlib.import_module(name), "__version__", None)
+        except Exception:
+            out[name] = None
+    return out
+
+
+# =========================
+# 비교
+# =========================
+def _flatten(d, prefix=""):
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else str(k)
+        if isinstance(v, dict):
+            out.update(_flatten(v, key))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+COMPARE_KEYS = ("_ms", "rps", "_sec", "_mb")
+
+
+def compare(old_path, new):
+    """이전 결과와 주요 수치 비교 출력 (지연 시간/메모리는 낮을수록, rps는 높을수록 좋음)"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    a = _flatten({k: old.get(k) or {} for k in ("startup", "latency", "throughput", "memory", "prefork")})
+    b = _flatten({k: new.get(k) or {} for k in ("startup", "latency", "throughput", "memory", "prefork")})
+    print(f"\n📊 비교: {old.get('meta', {}).get('git_commit')} → {new['meta'].get('git_commit')}")
+    for key in sorted(set(a) & set(b)):
+        if not key.endswith(COMPARE_KEYS) or not a[key]:
+            continue
+        change = (b[key] - a[key]) / a[key] * 100.0
+        better = change > 0 if key.endswith("rps") else change < 0
+        mark = "✅" if better and abs(change) >= 5 else ("⚠️ " if abs(change) >= 5 else "  ")
+        print(f"  {mark} {key:40s} {a[key]:10.2f} → {b[key]:10.2f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예측 서비스 벤치마크 (오프라인)")
+    parser.add_argument("--requests", type=int, default=300, help="시나리오별 요청 1건 측정 횟수")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시 사용자 수 목록 (쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=10.0, help="동시 사용자 수별 부하 시간(초)")
+    parser.add_argument("--kma-latency", type=float, default=0.05, help="가짜 기상청 응답 지연(초)")
+    parser.add_argument("--pred-cache-size", type=int, default=int(os.getenv("PRED_CACHE_SIZE", "20000")),
+                        help="예측 캐시 크기 (0이면 매번 모델 추론)")
+    parser.add_argument("--model-backend", choices=["sklearn", "compiled"],
+                        default=os.getenv("MODEL_BACKEND", "sklearn"), help="모델 추론 방식 (compiled_models.py)")
+    parser.add_argument("--standin-loc", action="store_true", help="data/suwon_locations.json 이 있어도 임시 동 목록 사용")
+    parser.add_argument("--prefork-workers", type=int, default=4,
+                        help="prefork 워커 메모리 측정에 쓸 워커 수 (0이면 생략)")
+    parser.add_argument("--prefork-child", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--no-preload", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: bench_results/bench_시각.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+    if args.prefork_child:
+        prefork_child(args.prefork_child, args.requests, preload=not args.no_preload)
+        return
+    concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    workdir = tempfile.mkdtemp(prefix="bench_service_")
+    result = {"meta": {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": _versions(),
+        "args": vars(args),
+    }}
+    try:
+        print(f"\n{'='*60}\n⏱️  예측 서비스 벤치마크\n{'='*60}")
+        rss_start = rss_mb()
+        kma, loc, info = prepare_env(workdir, args)
+        result["setup"] = info
+        print(f"  합성 SALES_DATA: {info['sales_rows']:,}행, 동 {info['dongs']}개, 가짜 기상청 {kma.base_url}")
+
+        # app 시작 = import + create_app (설정 읽기 + 저장소 연결 + 모델 전부 로드, MODEL_LOAD_MODE=parallel)
+        rss_before = rss_mb()
+        t0 = time.perf_counter()
+        app_module = importlib.import_module("app")
+        app_module.create_app()
+        import_sec = time.perf_counter() - t0
+        models = app_module.MODEL_REGISTRY.stats()
+        rss_loaded = rss_mb()
+        result["startup"] = {
+            "app_import_sec": round(import_sec, 3),
+            "model_load_sec": models["total_load_sec"],
+            "models_loaded": len(models["loaded"]),
+            "model_errors": len(models["errors"]),
+            "by_hour_sec": {h: m["load_sec"] for h, m in models["models"].items()},
+            "model_approx_bytes": models["total_approx_bytes"],
+        }
+        print(f"  app 시작 {import_sec:.2f}s (모델 {len(models['loaded'])}개 로드 {models['total_load_sec']:.2f}s)")
+
+        scenarios = make_scenarios(loc, args.requests)
+        client = app_module.app.test_client()
+        print(f"\n⏱️  요청 1건 지연 시간")
+        result["latency"] = bench_latency(client, scenarios)
+        rss_after_latency = rss_mb()
+
+        print(f"\n🚦 동시 요청 처리량 ({args.duration:.0f}초씩)")
+        result["throughput"] = bench_throughput(app_module.app, scenarios, concurrency, args.duration)
+
+        if args.prefork_workers > 0:
+            print(f"\n🧬 prefork 워커 메모리 (워커 {args.prefork_workers}개, 워커당 요청 {3 * min(args.requests, 100)}건)")
+            result["prefork"] = bench_prefork(args.prefork_workers, min(args.requests, 100))
+
+        result["memory"] = {
+            "process_start_mb": round(rss_start, 1),
+            "before_app_mb": round(rss_before, 1),
+            "after_model_load_mb": round(rss_loaded, 1),
+            "after_latency_mb": round(rss_after_latency, 1),
+            "after_load_mb": round(rss_mb(), 1),
+            "peak_mb": round(peak_rss_mb(), 1),
+            # 워커 하나가 app 을 올리는 데 드는 메모리
+            "worker_app_mb": round(rss_loaded - rss_before, 1),
+        }
+        result["caches"] = {
+            "weather": app_module.WEATHER_CACHE.stats(),
+            "prediction": app_module.PRED_CACHE.stats(),
+            "kma_server_calls": kma.total_calls(),
+        }
+        print(f"\n💾 메모리: 모델 로드 후 {rss_loaded:.0f}MB (app +{rss_loaded - rss_before:.0f}MB), "
+              f"부하 후 {result['memory']['after_load_mb']:.0f}MB, 최대 {result['memory']['peak_mb']:.0f}MB")
+        kma.shutdown()
+        app_module.IO_POOL.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    out_path = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 결과 저장: {out_path}")
+
+    if args.compare:
+        compare(args.compare, result)
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
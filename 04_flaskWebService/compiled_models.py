@@ -0,0 +1,490 @@
+"""
+시간대별 모델 경량 추론 (sklearn Pipeline 없이 예측)
+1행 predict 도 Pipeline → ColumnTransformer → OneHotEncoder → MultiOutputRegressor 를 거치면서
+입력 검사/DataFrame 변환에 몇 ms 가 걸림 → 학습된 값만 꺼내서 배열 계산으로 바꿈
+
+- OneHotEncoder: {범주 값: 출력 열} 색인 (모르는 값은 0행, handle_unknown='ignore' 와 같음)
+- StandardScaler: 평균/표준편차 (MLP 는 첫 층 가중치에 미리 합침)
+- MLPRegressor: 첫 층은 범주 열마다 가중치 행을 골라 더하고(원핫 곱셈 대신), 나머지 층은 NumPy 행렬곱
+- XGBRegressor: booster.inplace_predict (DMatrix / sklearn 래퍼 없이)
+  학습 입력이 희소 행렬이었으면 0 칸은 결측으로 학습됐으므로 똑같이 NaN 으로 넣음
+- 그 외(RF 등)는 CompileError → 기존 sklearn 모델 그대로 사용
+
+사용법:
+    python compiled_models.py export            # models/ 의 모델마다 *.compiled.npz 생성
+    python compiled_models.py check             # 원래 joblib 모델과 예측값 비교 + 1행 지연 시간
+    MODEL_BACKEND=compiled python app.py        # 경량 추론 사용 (npz 가 없거나 오래됐으면 로드할 때 변환)
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+try:
+    import xgboost as xgb
+except ImportError:  # XGB 모델을 변환할 때만 필요
+    xgb = None
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+COMPILED_SUFFIX = ".compiled.npz"
+FORMAT_VERSION = 1
+
+_ACTIVATIONS = {
+    "identity": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0, out=x),
+    "tanh": lambda x: np.tanh(x, out=x),
+    "logistic": lambda x: np.divide(1.0, 1.0 + np.exp(-x), out=x),
+}
+
+
+class CompileError(Exception):
+    """경량 추론으로 바꿀 수 없는 모델 (기존 모델을 그대로 씀)"""
+
+
+def compiled_path(model_path: str) -> str:
+    """hour_01_amt_cnt.joblib → hour_01_amt_cnt.compiled.npz"""
+    base = model_path[:-len(".joblib")] if model_path.endswith(".joblib") else model_path
+    return base + COMPILED_SUFFIX
+
+
+def source_signature(model_path: str):
+    st = os.stat(model_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# =========================
+# 입력 변환 (ColumnTransformer)
+# =========================
+class InputLayout:
+    """
+    DataFrame 컬럼 → 모델 입력 행렬의 열 배치
+    categorical: [(컬럼, {값: 범주 번호}, 첫 출력 열)], numeric: [(컬럼, 출력 열, 평균, 표준편차)]
+    """
+
+    def __init__(self, columns, width, categorical, numeric, sparse):
+        self.columns = list(columns)
+        self.width = int(width)
+        self.categorical = categorical
+        self.numeric = numeric
+        self.sparse = bool(sparse)
+        self.num_columns = [c for c, _, _, _ in numeric]
+        self.num_index = np.array([j for _, j, _, _ in numeric], dtype=np.int64)
+        self.num_mean = np.array([m for _, _, m, _ in numeric], dtype=np.float64)
+        self.num_scale = np.array([s for _, _, _, s in numeric], dtype=np.float64)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        from sklearn.compose import ColumnTransformer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise CompileError("Pipeline(전처리, 모델) 형태가 아님")
+        ct = pipeline.steps[0][1]
+        if not isinstance(ct, ColumnTransformer):
+            raise CompileError(f"지원하지 않는 전처리: {type(ct).__name__}")
+
+        names = [str(c) for c in ct.feature_names_in_]
+        categorical, numeric = [], []
+        for name, trans, cols in ct.transformers_:
+            if trans == "drop":
+                continue
+            cols = [names[c] if isinstance(c, (int, np.integer)) else str(c) for c in np.atleast_1d(cols)]
+            out = ct.output_indices_[name]
+            if isinstance(trans, OneHotEncoder):
+                if trans.drop_idx_ is not None or getattr(trans, "_infrequent_enabled", False):
+                    raise CompileError("OneHotEncoder drop / infrequent 범주는 지원하지 않음")
+                offset = out.start
+                for col, cats in zip(cols, trans.categories_):
+                    categorical.append((col, {_key(v): i for i, v in enumerate(cats)}, offset))
+                    offset += len(cats)
+            elif trans == "passthrough" or isinstance(trans, StandardScaler):
+                if isinstance(trans, StandardScaler):
+                    mean = trans.mean_ if trans.with_mean else np.zeros(len(cols))
+                    scale = trans.scale_ if trans.with_std else np.ones(len(cols))
+                else:
+                    mean, scale = np.zeros(len(cols)), np.ones(len(cols))
+                for i, col in enumerate(cols):
+                    numeric.append((col, out.start + i, float(mean[i]), float(scale[i])))
+            else:
+                raise CompileError(f"지원하지 않는 변환: {type(trans).__name__}")
+        width = max(s.stop for s in ct.output_indices_.values())
+        return cls(names, width, categorical, numeric, getattr(ct, "sparse_output_", False))
+
+    def category_index(self, frame):
+        """범주 컬럼마다 (n,) 범주 번호, 모르는 값은 -1"""
+        return [np.fromiter((mapping.get(_key(v), -1) for v in frame[col].tolist()), dtype=np.int64, count=len(frame))
+                for col, mapping, _ in self.categorical]
+
+    def numeric_values(self, frame):
+        """(n, 숫자 컬럼 수) 표준화 전 값 (frame[컬럼 목록] 은 DataFrame 을 새로 만들어서 느림)"""
+        return np.column_stack([frame[c].to_numpy(dtype=np.float64) for c in self.num_columns])
+
+    def dense(self, frame):
+        """원래 ColumnTransformer 출력과 같은 (n, width) 행렬 (희소였으면 0 칸은 NaN)"""
+        n = len(frame)
+        X = np.zeros((n, self.width), dtype=np.float64)
+        rows = np.arange(n)
+        for idx, (_, _, offset) in zip(self.category_index(frame), self.categorical):
+            known = idx >= 0
+            X[rows[known], offset + idx[known]] = 1.0
+        X[:, self.num_index] = (self.numeric_values(frame) - self.num_mean) / self.num_scale
+        if self.sparse:
+            X[X == 0.0] = np.nan
+        return X
+
+    def to_meta(self):
+        return {
+            "columns": self.columns,
+            "width": self.width,
+            "categorical": [[col, list(mapping.items()), offset] for col, mapping, offset in self.categorical],
+            "numeric": self.numeric,
+            "sparse": self.sparse,
+        }
+
+    @classmethod
+    def from_meta(cls, meta):
+        categorical = [(col, {k: int(v) for k, v in items}, int(offset)) for col, items, offset in meta["categorical"]]
+        numeric = [tuple(x) for x in meta["numeric"]]
+        return cls(meta["columns"], meta["width"], categorical, numeric, meta["sparse"])
+
+
+def _key(value):
+    """범주 값 비교용 (학습 때 문자열/숫자 범주 모두)"""
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)) and float(value).is_integer():
+        return int(value)
+    return value if isinstance(value, (int, str)) else str(value)
+
+
+# =========================
+# 모델별 경량 추론
+# =========================
+class _MLPNet:
+    """MLPRegressor 하나 → 첫 층 색인 테이블 + 행렬곱"""
+
+    def __init__(self, tables, w_num, b0, weights, biases, activation):
+        self.tables = tables          # 범주 컬럼마다 (범주 수 + 1, hidden), 마지막 행(-1)은 모르는 값 → 0
+        self.w_num = w_num            # (숫자 컬럼 수, hidden), 표준화 포함
+        self.b0 = b0
+        self.weights = weights
+        self.biases = biases
+        self.activation = activation
+
+    @classmethod
+    def from_estimator(cls, est, layout: InputLayout):
+        if est.out_activation_ != "identity" or est.activation not in _ACTIVATIONS:
+            raise CompileError(f"지원하지 않는 활성화 함수: {est.activation}/{est.out_activation_}")
+        W, b = est.coefs_[0], est.intercepts_[0]
+        if W.shape[0] != layout.width:
+            raise CompileError("MLP 입력 크기가 전처리 출력과 다름")
+        tables = []
+        for _, mapping, offset in layout.categorical:
+            table = np.zeros((len(mapping) + 1, W.shape[1]))
+            table[:-1] = W[offset:offset + len(mapping)]
+            tables.append(table)
+        W_num = W[layout.num_index] / layout.num_scale[:, None]
+        b0 = b - (layout.num_mean / layout.num_scale) @ W[layout.num_index]
+        return cls(tables, W_num, b0, list(est.coefs_[1:]), list(est.intercepts_[1:]), est.activation)
+
+    def predict(self, cat_index, num):
+        act = _ACTIVATIONS[self.activation]
+        h = num @ self.w_num + self.b0
+        for table, idx in zip(self.tables, cat_index):
+            h += table[idx]
+        h = act(h)
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ W + b
+            if i < len(self.weights) - 1:
+                h = act(h)
+        return h
+
+    def arrays(self, prefix):
+        out = {f"{prefix}b0": self.b0, f"{prefix}w_num": self.w_num}
+        out.update({f"{prefix}table{i}": t for i, t in enumerate(self.tables)})
+        out.update({f"{prefix}W{i}": w for i, w in enumerate(self.weights)})
+        out.update({f"{prefix}B{i}": b for i, b in enumerate(self.biases)})
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, n_tables, n_layers, activation):
+        return cls(
+            [arrays[f"{prefix}table{i}"] for i in range(n_tables)],
+            arrays[f"{prefix}w_num"], arrays[f"{prefix}b0"],
+            [arrays[f"{prefix}W{i}"] for i in range(n_layers)],
+            [arrays[f"{prefix}B{i}"] for i in range(n_layers)],
+            activation,
+        )
+
+
+class _XGBTrees:
+    """XGBRegressor 하나 → booster.inplace_predict"""
+
+    def __init__(self, booster, iteration_range, nthread=1):
+        self.booster = booster
+        self.iteration_range = tuple(iteration_range)
+        # 요청 1건(10행 이하)은 스레드 나누는 비용이 더 큼
+        self.booster.set_param({"nthread": nthread})
+
+    @classmethod
+    def from_estimator(cls, est):
+        if xgb is None:
+            raise CompileError("xgboost 가 설치되어 있지 않음")
+        if not (est.missing is None or np.isnan(est.missing)):
+            raise CompileError("missing 값이 NaN 이 아닌 XGB 모델")
+        try:
+            best = est.best_iteration
+            iteration_range = (0, best + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+        # 원래 모델과 booster 를 공유하지 않도록 복사
+        return cls(xgb.Booster(model_file=bytearray(est.get_booster().save_raw("ubj"))), iteration_range)
+
+    def predict(self, X):
+        # XGBoost 는 float32 로 계산하므로 미리 바꿔서 넘김 (원래 모델과 같은 값)
+        return self.booster.inplace_predict(X.astype(np.float32, copy=False),
+                                            iteration_range=self.iteration_range, missing=np.nan)
+
+    def raw(self):
+        return np.frombuffer(bytes(self.booster.save_raw("ubj")), dtype=np.uint8)
+
+    @classmethod
+    def from_raw(cls, raw, iteration_range):
+        if xgb is None:
+            raise CompileError("xgboost 가 설치되어 있지 않음")
+        return cls(xgb.Booster(model_file=bytearray(raw.tobytes())), iteration_range)
+
+
+class CompiledHourModel:
+    """HourModel 과 같은 모양 (hour, columns, predict_frame) → BatchPredictor 에 그대로 넣음"""
+
+    backend = "compiled"
+
+    def __init__(self, hour, layout: InputLayout, kind: str, parts, n_outputs: int):
+        self.hour = hour
+        self.layout = layout
+        self.columns = layout.columns
+        self.kind = kind              # "mlp" | "xgb"
+        self.parts = parts            # 출력마다 (MultiOutputRegressor) 또는 하나 (다중 출력 모델)
+        self.n_outputs = n_outputs
+
+    @classmethod
+    def from_model(cls, hour, pipeline):
+        from sklearn.multioutput import MultiOutputRegressor
+        from sklearn.neural_network import MLPRegressor
+
+        layout = InputLayout.from_pipeline(pipeline)
+        model = pipeline.steps[-1][1]
+        estimators = model.estimators_ if isinstance(model, MultiOutputRegressor) else [model]
+        if all(isinstance(e, MLPRegressor) for e in estimators):
+            kind = "mlp"
+            parts = [_MLPNet.from_estimator(e, layout) for e in estimators]
+            n_outputs = sum(e.n_outputs_ for e in estimators)
+        elif xgb is not None and all(isinstance(e, xgb.XGBRegressor) for e in estimators):
+            kind = "xgb"
+            parts = [_XGBTrees.from_estimator(e) for e in estimators]
+            n_outputs = len(estimators) if len(estimators) > 1 else int(getattr(model, "n_targets_", 0) or 2)
+        else:
+            raise CompileError(f"지원하지 않는 모델: {type(estimators[0]).__name__}")
+        if n_outputs < 2:
+            raise CompileError("출력이 [AMT, CNT] 2개가 아님")
+        return cls(hour, layout, kind, parts, n_outputs)
+
+    def _predict_raw(self, frame):
+        if self.kind == "mlp":
+            cat_index = self.layout.category_index(frame)
+            num = self.layout.numeric_values(frame)
+            outs = [p.predict(cat_index, num) for p in self.parts]
+        else:
+            X = self.layout.dense(frame).astype(np.float32)
+            outs = [p.predict(X) for p in self.parts]
+        return np.column_stack([o.reshape(len(frame), -1) for o in outs])
+
+    def predict_frame(self, frame) -> np.ndarray:
+        """HourModel.predict_frame 과 같음: (n, 2) [AMT, CNT], 음수는 0"""
+        pred = np.asarray(self._predict_raw(frame), dtype=np.float64)
+        return np.maximum(pred[:, :2], 0.0)
+
+    @property
+    def nbytes(self):
+        total = 0
+        for p in self.parts:
+            if isinstance(p, _MLPNet):
+                total += sum(a.nbytes for a in p.arrays("").values())
+            else:
+                total += len(p.booster.save_raw("ubj"))
+        return total
+
+    # =========================
+    # 저장 / 읽기 (.compiled.npz)
+    # =========================
+    def save(self, path: str, signature=None):
+        arrays = {}
+        parts_meta = []
+        for i, p in enumerate(self.parts):
+            if self.kind == "mlp":
+                arrays.update(p.arrays(f"p{i}_"))
+                parts_meta.append({"n_tables": len(p.tables), "n_layers": len(p.weights), "activation": p.activation})
+            else:
+                arrays[f"p{i}_booster"] = p.raw()
+                parts_meta.append({"iteration_range": list(p.iteration_range)})
+        meta = {
+            "format": FORMAT_VERSION,
+            "hour": self.hour,
+            "kind": self.kind,
+            "n_outputs": self.n_outputs,
+            "layout": self.layout.to_meta(),
+            "parts": parts_meta,
+            "source": signature,
+        }
+        arrays["meta"] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def read_meta(path: str):
+        with np.load(path) as data:
+            return json.loads(data["meta"].tobytes().decode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str, hour=None):
+        with np.load(path) as data:
+            arrays = {k: data[k] for k in data.files}
+        meta = json.loads(arrays.pop("meta").tobytes().decode("utf-8"))
+        if meta.get("format") != FORMAT_VERSION:
+            raise CompileError(f"변환 파일 형식이 다름: {meta.get('format')}")
+        layout = InputLayout.from_meta(meta["layout"])
+        if meta["kind"] == "mlp":
+            parts = [_MLPNet.from_arrays(arrays, f"p{i}_", m["n_tables"], m["n_layers"], m["activation"])
+                     for i, m in enumerate(meta["parts"])]
+        else:
+            parts = [_XGBTrees.from_raw(arrays[f"p{i}_booster"], m["iteration_range"])
+                     for i, m in enumerate(meta["parts"])]
+        return cls(hour if hour is not None else meta["hour"], layout, meta["kind"], parts, meta["n_outputs"])
+
+
+def load_compiled(hour: int, model_path: str):
+    """model_path 옆의 .compiled.npz 가 있고 원본과 같으면 CompiledHourModel, 아니면 None"""
+    path = compiled_path(model_path)
+    if not os.path.exists(path) or not os.path.exists(model_path):
+        return None
+    try:
+        if CompiledHourModel.read_meta(path).get("source") != source_signature(model_path):
+            print(f"⚠️  변환 파일이 원본 모델보다 오래됨, 다시 변환: {os.path.basename(path)}", flush=True)
+            return None
+        return CompiledHourModel.load(path, hour)
+    except Exception as e:
+        print(f"⚠️  변환 파일 읽기 실패 ({os.path.basename(path)}): {e}", flush=True)
+        return None
+
+
+# =========================
+# 실행 (export / check)
+# =========================
+def _sample_frame(hm: CompiledHourModel, n: int, seed: int):
+    """학습 범주 + 모르는 값 + 기온/강수 범위 전체에서 뽑은 입력"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, mapping, _ in hm.layout.categorical:
+        values = list(mapping) + (["없는동"] if col in ("DONG", "GU") else [-1])
+        data[col] = [values[i] for i in rng.integers(0, len(values), n)]
+    ranges = {"DAY": (1, 8), "TEMP": (-15.0, 38.0), "RAIN": (0.0, 50.0)}
+    for col in hm.layout.num_columns:
+        lo, hi = ranges.get(col, (0.0, 1.0))
+        if col == "DAY":
+            data[col] = rng.integers(lo, hi, n)
+        elif col == "RAIN":
+            data[col] = np.where(rng.random(n) < 0.6, 0.0, rng.uniform(lo, hi, n).round(1))
+        else:
+            data[col] = rng.uniform(lo, hi, n).round(1)
+    return pd.DataFrame(data)[hm.columns]
+
+
+def _time_one_row(fn, frame, repeat):
+    row = frame.iloc[:1]
+    fn(row)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(row)
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main():
+    import joblib
+
+    from batch_inference import HourModel
+    from model_registry import read_manifest
+
+    parser = argparse.ArgumentParser(description="시간대별 모델 경량 추론 변환 / 일치 확인")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--hours", default="1-10", help="예: 1-10, 4,5")
+    parser.add_argument("--rows", type=int, default=2000, help="check: 비교할 입력 행 수")
+    parser.add_argument("--rtol", type=float, default=1e-5, help="check: 허용 상대 오차")
+    parser.add_argument("--atol", type=float, default=1e-3, help="check: 허용 절대 오차 (원/건)")
+    parser.add_argument("--repeat", type=int, default=200, help="check: 1행 지연 시간 반복 횟수")
+    args = parser.parse_args()
+
+    hours = []
+    for part in args.hours.split(","):
+        a, _, b = part.partition("-")
+        hours.extend(range(int(a), int(b or a) + 1))
+    manifest = read_manifest(args.models_dir, hours)
+
+    failed = False
+    print(f"\n{'='*60}")
+    for hour, entry in manifest.items():
+        path = entry["path"]
+        family = entry["family"] or "-"
+        if not os.path.exists(path):
+            print(f"  - HOUR {hour:02d}: 모델 파일 없음 ({os.path.relpath(path, args.models_dir)})")
+            continue
+        raw = joblib.load(path)
+        try:
+            compiled = CompiledHourModel.from_model(hour, raw)
+        except CompileError as e:
+            print(f"  - HOUR {hour:02d} {family}: 변환 안 함 ({e}), sklearn 그대로 사용")
+            continue
+
+        if args.command == "export":
+            out = compiled_path(path)
+            compiled.save(out, source_signature(path))
+            print(f"  ✓ HOUR {hour:02d} {family} → {os.path.relpath(out, args.models_dir)} "
+                  f"({os.path.getsize(out) / 1024:.0f}KB, 원본 {os.path.getsize(path) / 1024:.0f}KB)")
+            continue
+
+        # check: 저장된 변환 파일이 있으면 그것을, 없으면 방금 변환한 것을 원본과 비교
+        saved = load_compiled(hour, path)
+        compiled = saved or compiled
+        original = HourModel(hour, raw)
+        frame = _sample_frame(compiled, args.rows, seed=hour)
+        expected = original.predict_frame(frame)
+        got = compiled.predict_frame(frame)
+        diff = np.abs(got - expected)
+        ok = bool(np.all(diff <= args.atol + args.rtol * np.abs(expected)))
+        failed |= not ok
+        rel = float(np.max(diff / np.maximum(np.abs(expected), 1.0)))
+        t_orig = _time_one_row(original.predict_frame, frame, args.repeat)
+        t_comp = _time_one_row(compiled.predict_frame, frame, args.repeat)
+        print(f"  {'✓' if ok else '❌'} HOUR {hour:02d} {family:8s} "
+              f"[{'npz' if saved else '메모리 변환'}] 최대 오차 {float(diff.max()):.3g} (상대 {rel:.2e}), "
+              f"1행 {t_orig:.2f}ms → {t_comp:.3f}ms ({t_orig / t_comp:.0f}배)")
+    print(f"{'='*60}\n")
+    if failed:
+        raise SystemExit("❌ 원래 모델과 예측값이 다릅니다")
+
+
+if __name__ == "__main__":
+    main()
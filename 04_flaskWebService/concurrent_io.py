@@ -0,0 +1,100 @@
+"""
+요청 하나 안에서 서로 기다릴 필요 없는 I/O(실제 데이터 조회, 기상청 날씨 조회)를
+스레드 풀에서 동시에 실행하고, 의존성마다 제한 시간을 따로 둠
+→ 응답 시간은 두 I/O 시간의 합이 아니라 (제한 시간 안에서) 느린 쪽 하나로 정해짐
+
+Flask 동기 워커는 그대로 두고 스레드 풀만 사용
+제한 시간이 지난 작업은 취소하지 않고 뒤에서 끝나게 둠 (결과는 캐시에 남음)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class _Task:
+    __slots__ = ("name", "future", "started", "deadline")
+
+    def __init__(self, name, future, started, deadline):
+        self.name = name
+        self.future = future
+        self.started = started
+        self.deadline = deadline
+
+
+class IoPool:
+    def __init__(self, workers: int = 16, timeouts: dict = None):
+        """timeouts: {이름: 제한 시간(초)}"""
+        self.timeouts = dict(timeouts or {})
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict-io")
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _stat(self, name):
+        return self._stats.setdefault(name, {
+            "calls": 0, "ok": 0, "timeouts": 0, "errors": 0,
+            "late": 0, "cancelled": 0, "total_ms": 0.0, "max_ms": 0.0,
+        })
+
+    def submit(self, name: str, fn, *args, **kwargs) -> _Task:
+        """바로 실행 시작, 제한 시간은 지금부터 계산"""
+        now = time.perf_counter()
+        timeout = self.timeouts.get(name)
+        deadline = now + timeout if timeout else None
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._stat(name)["calls"] += 1
+        return _Task(name, future, now, deadline)
+
+    def wait(self, task: _Task):
+        """
+        → (결과, 상태) 상태: "ok" | "timeout" | "error"
+        timeout/error 이면 결과 자리에 예외
+        """
+        remaining = None if task.deadline is None else max(0.0, task.deadline - time.perf_counter())
+        try:
+            value = task.future.result(timeout=remaining)
+            status = "ok"
+        except FutureTimeout:
+            value = TimeoutError(f"{task.name} 응답 시간 초과 ({self.timeouts.get(task.name)}초)")
+            status = "timeout"
+            task.future.add_done_callback(lambda f, name=task.name: self._count_late(name))
+        except Exception as e:
+            value = e
+            status = "error"
+
+        elapsed_ms = (time.perf_counter() - task.started) * 1000.0
+        with self._lock:
+            st = self._stat(task.name)
+            st[{"ok": "ok", "timeout": "timeouts", "error": "errors"}[status]] += 1
+            st["total_ms"] += elapsed_ms
+            st["max_ms"] = max(st["max_ms"], elapsed_ms)
+        return value, status
+
+    def cancel(self, task: _Task) -> bool:
+        """
+        결과가 필요 없어진 작업 취소 → 아직 시작 전이라 실행하지 않게 됐으면 True
+        이미 실행 중이면 그대로 끝나게 둠 (결과는 캐시에 남음)
+        """
+        cancelled = task.future.cancel()
+        if cancelled:
+            with self._lock:
+                self._stat(task.name)["cancelled"] += 1
+        return cancelled
+
+    def _count_late(self, name):
+        """제한 시간이 지난 뒤에 끝난 작업 수"""
+        with self._lock:
+            self._stat(name)["late"] += 1
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for name, st in self._stats.items():
+                waited = st["ok"] + st["timeouts"] + st["errors"]
+                out[name] = dict(st, avg_ms=st["total_ms"] / waited if waited else 0.0,
+                                 timeout_sec=self.timeouts.get(name))
+        return {"workers": self.workers, "dependencies": out}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
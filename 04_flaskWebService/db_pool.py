@@ -0,0 +1,174 @@
+"""
+Oracle DB 커넥션 풀
+/predict 요청마다 oracledb.connect()를 새로 하지 않고 풀에서 빌려 씀
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import oracledb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================
+# Config
+# =========================
+ORACLE_HOST = os.getenv("ORACLE_HOST", "210.121.189.12")
+ORACLE_PORT = int(os.getenv("ORACLE_PORT", "1521"))
+ORACLE_SID = os.getenv("ORACLE_SID", "xe")
+ORACLE_USER = os.getenv("ORACLE_USER", "scott")
+ORACLE_PASSWORD = os.getenv("ORACLE_PASSWORD", "tiger")
+
+# 풀 크기 (min: 미리 열어둘 세션 수, max: 최대 세션 수, increment: 부족할 때 한 번에 늘릴 수)
+POOL_MIN = int(os.getenv("ORACLE_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("ORACLE_POOL_MAX", "8"))
+POOL_INCREMENT = int(os.getenv("ORACLE_POOL_INCREMENT", "1"))
+# 세션이 모두 사용 중일 때 기다리는 최대 시간(ms)
+POOL_WAIT_TIMEOUT_MS = int(os.getenv("ORACLE_POOL_WAIT_TIMEOUT_MS", "3000"))
+# 이 시간(초) 이상 놀고 있던 세션은 꺼낼 때 ping으로 상태 확인 (헬스 체크)
+POOL_PING_INTERVAL = int(os.getenv("ORACLE_POOL_PING_INTERVAL", "60"))
+# 유휴 세션 정리 시간(초)
+POOL_IDLE_TIMEOUT = int(os.getenv("ORACLE_POOL_IDLE_TIMEOUT", "300"))
+# 풀 생성에 실패하면 이 시간(초) 동안은 다시 시도하지 않음 (요청마다 연결 타임아웃을 기다리지 않도록)
+POOL_RETRY_SEC = float(os.getenv("ORACLE_POOL_RETRY_SEC", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_failed_at = None
+
+# =========================
+# 풀 통계
+# =========================
+_stats_lock = threading.Lock()
+_stats = {
+    "acquired": 0,         # 성공한 acquire 횟수
+    "failed": 0,           # 실패(타임아웃/연결오류) 횟수
+    "wait_total_ms": 0.0,  # acquire 대기 시간 합계
+    "wait_max_ms": 0.0,    # acquire 최대 대기 시간
+    "saturated": 0,        # acquire 시점에 busy == max 였던 횟수
+}
+
+
+def _create_pool():
+    """oracledb 커넥션 풀 생성"""
+    return oracledb.create_pool(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        host=ORACLE_HOST,
+        port=ORACLE_PORT,
+        sid=ORACLE_SID,
+        min=POOL_MIN,
+        max=POOL_MAX,
+        increment=POOL_INCREMENT,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=POOL_WAIT_TIMEOUT_MS,
+        ping_interval=POOL_PING_INTERVAL,
+        timeout=POOL_IDLE_TIMEOUT,
+    )
+
+
+def get_pool():
+    """풀을 처음 사용할 때 생성 (실패 시 None)"""
+    global _pool, _pool_failed_at
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            if _pool_failed_at is not None and time.monotonic() - _pool_failed_at < POOL_RETRY_SEC:
+                return None
+            try:
+                _pool = _create_pool()
+                _pool_failed_at = None
+                print(f"✅ Oracle 커넥션 풀 생성 (min={POOL_MIN}, max={POOL_MAX}, inc={POOL_INCREMENT})")
+            except oracledb.Error as error:
+                _pool_failed_at = time.monotonic()
+                print(f"❌ Oracle 커넥션 풀 생성 실패: {error}")
+                return None
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    풀에서 커넥션을 빌려주고 with 블록이 끝나면 반납
+    연결할 수 없으면 None을 넘겨줌 (호출하는 쪽에서 None 체크)
+    """
+    pool = get_pool()
+    if pool is None:
+        with _stats_lock:
+            _stats["failed"] += 1
+        yield None
+        return
+
+    saturated = pool.busy >= pool.max
+    start = time.perf_counter()
+    try:
+        conn = pool.acquire()
+    except oracledb.Error as error:
+        with _stats_lock:
+            _stats["failed"] += 1
+            _stats["saturated"] += int(saturated)
+        print(f"❌ Oracle 커넥션 획득 실패: {error}")
+        yield None
+        return
+
+    waited_ms = (time.perf_counter() - start) * 1000.0
+    with _stats_lock:
+        _stats["acquired"] += 1
+        _stats["saturated"] += int(saturated)
+        _stats["wait_total_ms"] += waited_ms
+        _stats["wait_max_ms"] = max(_stats["wait_max_ms"], waited_ms)
+
+    try:
+        yield conn
+    finally:
+        try:
+            pool.release(conn)
+        except oracledb.Error:
+            pass
+
+
+def ping() -> bool:
+    """DB에 실제로 연결되는지 확인"""
+    with pooled_connection() as conn:
+        if conn is None:
+            return False
+        try:
+            conn.ping()
+            return True
+        except oracledb.Error:
+            return False
+
+
+def pool_stats():
+    """풀 포화도 / 대기시간 통계"""
+    with _stats_lock:
+        stats = dict(_stats)
+    acquired = stats["acquired"]
+    stats["wait_avg_ms"] = stats["wait_total_ms"] / acquired if acquired else 0.0
+
+    pool = _pool
+    if pool is None:
+        stats.update({"open": 0, "busy": 0, "max": POOL_MAX, "saturation": 0.0})
+    else:
+        stats.update({
+            "open": pool.opened,
+            "busy": pool.busy,
+            "max": pool.max,
+            "saturation": pool.busy / pool.max if pool.max else 0.0,
+        })
+    return stats
+
+
+def close_pool():
+    """풀 종료 (서버 종료 시)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            try:
+                _pool.close(force=True)
+            except oracledb.Error:
+                pass
+            _pool = None
@@ -0,0 +1,189 @@
+"""
+로컬 가짜 기상청 API 서버 (테스트/벤치마크용)
+getUltraSrtNcst, getVilageFcst, ASOS getWthrDataList 응답 형식을 흉내냄
+격자/날짜가 같으면 항상 같은 값을 돌려줌
+
+사용법:
+    python fake_kma_server.py --port 8765
+    KMA_BASE_URL=http://127.0.0.1:8765 ASOS_BASE_URL=http://127.0.0.1:8765/getWthrDataList \\
+    KMA_SERVICE_KEY=test python app.py
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 단기예보 한 시각에 들어있는 카테고리 (실제 API와 같은 12개)
+VILAGE_CATEGORIES = ["TMP", "UUU", "VVV", "VEC", "WSD", "SKY", "PTY", "POP", "WAV", "PCP", "REH", "SNO"]
+
+
+def _seed(*parts) -> int:
+    return zlib.crc32("_".join(str(p) for p in parts).encode("utf-8"))
+
+
+def _temp(nx, ny, ymd: str, hour: int) -> float:
+    """날짜/시각/격자로 정해지는 가짜 기온"""
+    month = int(ymd[4:6])
+    base = {1: -2, 2: 1, 3: 7, 4: 14, 5: 19, 6: 23, 7: 26, 8: 26, 9: 21, 10: 14, 11: 7, 12: 0}[month]
+    daily = 4.0 * (1 - abs(hour - 14) / 10.0)
+    noise = (_seed(nx, ny, ymd, hour) % 30) / 10.0 - 1.5
+    return round(base + daily + noise, 1)
+
+
+def _pcp(nx, ny, ymd: str, hour: int) -> str:
+    r = _seed("pcp", nx, ny, ymd, hour) % 20
+    if r < 15:
+        return "강수없음"
+    if r < 17:
+        return "1mm 미만"
+    return f"{float(r - 15):.1f}mm"
+
+
+def ultra_payload(q):
+    nx, ny = q.get("nx", "60"), q.get("ny", "121")
+    base_date, base_time = q.get("base_date", ""), q.get("base_time", "0000")
+    hour = int(base_time[:2] or 0)
+    pcp = _pcp(nx, ny, base_date, hour)
+    rn1 = "0" if pcp == "강수없음" else pcp.replace("mm", "").replace(" 미만", "")
+    items = [
+        {"baseDate": base_date, "baseTime": base_time, "category": "T1H", "nx": nx, "ny": ny,
+         "obsrValue": str(_temp(nx, ny, base_date, hour))},
+        {"baseDate": base_date, "baseTime": base_time, "category": "RN1", "nx": nx, "ny": ny,
+         "obsrValue": rn1},
+        {"baseDate": base_date, "baseTime": base_time, "category": "REH", "nx": nx, "ny": ny,
+         "obsrValue": "60"},
+    ]
+    return _wrap(items)
+
+
+def vilage_payload(q):
+    nx, ny = q.get("nx", "60"), q.get("ny", "121")
+    base_date, base_time = q.get("base_date", ""), q.get("base_time", "0500")
+    start = datetime.strptime(base_date + base_time, "%Y%m%d%H%M") + timedelta(hours=1)
+    items = []
+    # 발표 시각 다음 시각부터 약 3일치
+    for step in range(0, 67):
+        t = start + timedelta(hours=step)
+        ymd, hh = t.strftime("%Y%m%d"), t.hour
+        for cat in VILAGE_CATEGORIES:
+            if cat == "TMP":
+                val = str(_temp(nx, ny, ymd, hh))
+            elif cat == "PCP":
+                val = _pcp(nx, ny, ymd, hh)
+            elif cat == "SNO":
+                val = "적설없음"
+            else:
+                val = str(_seed(cat, ymd, hh) % 100)
+            items.append({
+                "baseDate": base_date, "baseTime": base_time, "category": cat,
+                "fcstDate": ymd, "fcstTime": f"{hh:02d}00", "fcstValue": val, "nx": int(nx), "ny": int(ny),
+            })
+    return _wrap(items)
+
+
+def asos_payload(q):
+    ymd = q.get("startDt", "")
+    temps = [_temp("asos", q.get("stnIds", "119"), ymd, h) for h in range(24)]
+    rain = sum(float(_pcp("asos", 0, ymd, h).replace("mm", "").replace(" 미만", "") or 0)
+               for h in range(24) if _pcp("asos", 0, ymd, h) != "강수없음")
+    items = [{"stnId": q.get("stnIds", "119"), "tm": f"{ymd[:4]}-{ymd[4:6]}-{ymd[6:]}",
+              "avgTa": f"{sum(temps) / len(temps):.1f}", "sumRn": f"{rain:.1f}" if rain else ""}]
+    return _wrap(items)
+
+
+def _wrap(items):
+    return {"response": {
+        "header": {"resultCode": "00", "resultMsg": "NORMAL_SERVICE"},
+        "body": {"dataType": "JSON", "items": {"item": items}, "pageNo": 1,
+                 "numOfRows": len(items), "totalCount": len(items)},
+    }}
+
+
+ROUTES = {
+    "getUltraSrtNcst": ultra_payload,
+    "getVilageFcst": vilage_payload,
+    "getWthrDataList": asos_payload,
+}
+
+
+class FakeKmaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeKMA/1.0"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        name = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        q = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        srv = self.server
+
+        with srv.lock:
+            srv.calls[name] = srv.calls.get(name, 0) + 1
+            throttled = srv.fail_with == 429
+        if srv.latency:
+            time.sleep(srv.latency)
+
+        if throttled:
+            self._send(429, {"error": "Too Many Requests"})
+        elif name not in ROUTES:
+            self._send(404, {"error": f"unknown api: {name}"})
+        else:
+            self._send(200, ROUTES[name](q))
+
+    def _send(self, status, body):
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+class FakeKmaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, verbose=False):
+        super().__init__((host, port), FakeKmaHandler)
+        self.latency = latency
+        self.verbose = verbose
+        self.fail_with = None   # 429로 바꾸면 모든 요청에 429 응답
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+
+def start_fake_kma_server(port=0, latency=0.0):
+    """백그라운드 스레드로 서버 실행 → FakeKmaServer (종료: server.shutdown())"""
+    server = FakeKmaServer(port=port, latency=latency)
+    threading.Thread(target=server.serve_forever, name="fake-kma", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 가짜 기상청 API 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    args = parser.parse_args()
+
+    server = FakeKmaServer(port=args.port, latency=args.latency, verbose=True)
+    print(f"🌦️  가짜 기상청 서버: {server.base_url}")
+    print(f"   KMA_BASE_URL={server.base_url}")
+    print(f"   ASOS_BASE_URL={server.base_url}/getWthrDataList")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
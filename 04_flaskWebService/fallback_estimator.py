@@ -0,0 +1,166 @@
+"""
+통계 기반 대체 예측기
+models/ 의 평균 테이블과 날씨 계수로 모델 없이 예측 (조회 + 곱셈 한 번)
+
+기준값 (위에서부터 있는 것 사용)
+1. mean_dong_hour_day.csv: 동 × 시간대 × 요일 평균
+2. mean_dong_hour.csv: 동 × 시간대 평균
+3. mean_hour.csv: 시간대 평균 (모르는 동)
+
+날씨 보정: weather_beta.json 의 [절편, 기온, 강수] 선형식 비율
+    factor = (b0 + b1*temp + b2*rain) / (b0 + b1*REF_TEMP + b2*0)
+기준값이 동마다 크기가 달라서 더하지 않고 비율로 곱함
+
+사용처
+- 모델 로드/예측 실패 시 0 대신 사용 (BatchPredictor fallback)
+- 과부하 시 모델 대신 사용 (load shedding)
+"""
+import csv
+import json
+import os
+import threading
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+N_HOURS = 10
+N_DAYS = 7
+# 날씨 보정 기준 기온 (평균 테이블이 이 기온일 때의 값이라고 봄)
+REF_TEMP = float(os.getenv("FALLBACK_REF_TEMP", "15"))
+# 날씨 보정 비율 범위
+FACTOR_MIN = float(os.getenv("FALLBACK_FACTOR_MIN", "0.5"))
+FACTOR_MAX = float(os.getenv("FALLBACK_FACTOR_MAX", "1.5"))
+
+TIER_NAMES = {1: "동×시간대×요일", 2: "동×시간대", 3: "시간대", 0: "없음"}
+
+
+def _read_csv(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+class FallbackEstimator:
+    def __init__(self, dongs, base, tiers, beta=None, normalize=None):
+        """
+        dongs: 동 이름 목록 (id = 순서 + 1, 0은 모르는 동)
+        base: [동 id, 시간대-1, 요일-1, (AMT, CNT)] 기준값 (단계별로 미리 채워둠)
+        tiers: [동 id, 시간대-1, 요일-1] 어느 단계 값인지
+        beta: {"amt": [b0, b1, b2], "cnt": [...]}
+        normalize: 테이블에 없는 동 이름을 정규화하는 함수 (예: '수원시 팔달구 행궁동' → '행궁동')
+        """
+        self.dong_ids = {d: i + 1 for i, d in enumerate(dongs)}
+        self.normalize = normalize
+        self.base = base
+        self.tiers = tiers
+        self.beta = np.array([beta["amt"], beta["cnt"]], dtype=np.float64) if beta else None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+
+    @classmethod
+    def from_dir(cls, models_dir: str, normalize=None):
+        """평균 테이블 / 날씨 계수 읽어서 배열 색인 생성"""
+        by_hour = _read_csv(os.path.join(models_dir, "mean_hour.csv"))
+        by_dong_hour = _read_csv(os.path.join(models_dir, "mean_dong_hour.csv"))
+        by_dong_hour_day = _read_csv(os.path.join(models_dir, "mean_dong_hour_day.csv"))
+
+        dongs = sorted({r["DONG"].strip() for r in by_dong_hour} | {r["DONG"].strip() for r in by_dong_hour_day})
+        ids = {d: i + 1 for i, d in enumerate(dongs)}
+        base = np.zeros((len(dongs) + 1, N_HOURS, N_DAYS, 2), dtype=np.float64)
+        tiers = np.zeros((len(dongs) + 1, N_HOURS, N_DAYS), dtype=np.int8)
+
+        # 넓은 단계부터 채우고 좁은 단계로 덮어씀
+        for r in by_hour:
+            h = int(r["HOUR"]) - 1
+            if 0 <= h < N_HOURS:
+                base[:, h, :] = (float(r["AMT"]), float(r["CNT"]))
+                tiers[:, h, :] = 3
+        for r in by_dong_hour:
+            d, h = ids[r["DONG"].strip()], int(r["HOUR"]) - 1
+            if 0 <= h < N_HOURS:
+                base[d, h, :] = (float(r["AMT"]), float(r["CNT"]))
+                tiers[d, h, :] = 2
+        for r in by_dong_hour_day:
+            d, h, w = ids[r["DONG"].strip()], int(r["HOUR"]) - 1, int(r["DAY"]) - 1
+            if 0 <= h < N_HOURS and 0 <= w < N_DAYS:
+                base[d, h, w] = (float(r["AMT"]), float(r["CNT"]))
+                tiers[d, h, w] = 1
+
+        beta = None
+        beta_path = os.path.join(models_dir, "weather_beta.json")
+        if os.path.exists(beta_path):
+            with open(beta_path, "r", encoding="utf-8") as f:
+                beta = json.load(f)
+        return cls(dongs, base, tiers, beta, normalize)
+
+    def _dong_id(self, dong) -> int:
+        i = self.dong_ids.get(dong)
+        if i is None and self.normalize is not None:
+            i = self.dong_ids.get(self.normalize(dong))
+        return i or 0
+
+    @property
+    def nbytes(self):
+        return int(self.base.nbytes + self.tiers.nbytes)
+
+    def _factor(self, temp, rain):
+        """(n,) 기온/강수 → (n, 2) AMT/CNT 보정 비율"""
+        temp = np.asarray(temp, dtype=np.float64)
+        rain = np.asarray(rain, dtype=np.float64)
+        if self.beta is None:
+            return np.ones(temp.shape + (2,))
+        b0, b1, b2 = self.beta[:, 0], self.beta[:, 1], self.beta[:, 2]
+        ref = b0 + b1 * REF_TEMP
+        cur = b0 + b1 * temp[..., None] + b2 * rain[..., None]
+        return np.clip(cur / ref, FACTOR_MIN, FACTOR_MAX)
+
+    def _count(self, n):
+        with self._lock:
+            self.calls += 1
+            self.rows += n
+
+    def predict_arrays(self, dongs, days, temps, rains, hours=range(1, 11)):
+        """행 단위 입력 → {hour: (n, 2) 배열}"""
+        d = np.fromiter((self._dong_id(x) for x in dongs), dtype=np.int64)
+        w = np.clip(np.asarray(days, dtype=np.int64) - 1, 0, N_DAYS - 1)
+        factor = self._factor(temps, rains)
+        self._count(len(d))
+        return {hour: self.base[d, hour - 1, w] * factor for hour in hours}
+
+    def predict_frame(self, frame, hours=range(1, 11)):
+        """BatchPredictor와 같은 입력 DataFrame(DONG, DAY, TEMP, RAIN)"""
+        return self.predict_arrays(frame["DONG"].tolist(), frame["DAY"].values,
+                                   frame["TEMP"].values, frame["RAIN"].values, hours)
+
+    def predict_rows(self, rows, hours=range(1, 11)):
+        """BatchPredictor.predict_rows 와 같은 형식"""
+        return self.predict_arrays([r["dong"] for r in rows], [r["day"] for r in rows],
+                                   [r["temp"] for r in rows], [r.get("rain", 0.0) for r in rows], hours)
+
+    def predict_day(self, dong: str, day: int, temp: float, rain: float = 0.0, hours=range(1, 11)):
+        """요청 1건 → {hour: (amt, cnt)}"""
+        d = self._dong_id(dong)
+        w = min(max(int(day) - 1, 0), N_DAYS - 1)
+        f = self._factor(temp, rain)
+        self._count(1)
+        return {hour: (float(self.base[d, hour - 1, w, 0] * f[0]), float(self.base[d, hour - 1, w, 1] * f[1]))
+                for hour in hours}
+
+    def tier(self, dong: str, hour: int, day: int) -> str:
+        """기준값이 어느 단계에서 왔는지"""
+        d = self._dong_id(dong)
+        return TIER_NAMES[int(self.tiers[d, hour - 1, min(max(int(day) - 1, 0), N_DAYS - 1)])]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "dongs": len(self.dong_ids),
+                "nbytes": self.nbytes,
+                "weather_beta": self.beta is not None,
+                "calls": self.calls,
+                "rows": self.rows,
+            }
@@ -0,0 +1,52 @@
+"""
+gunicorn 설정
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+- preload_app: master 가 wsgi.py 를 import 해서 모델 / 동 목록 / 평균 테이블을 한 번 로드
+  → fork 된 워커들이 같은 메모리 페이지를 copy-on-write 로 공유 (워커 수만큼 모델을 다시 읽지 않음)
+- post_fork: 워커마다 Oracle 커넥션 풀, SQLite 커넥션, 기상청 세션, 스레드 풀을 새로 만듦
+- 모델 교체/롤백(/api/models/reload, rollback)은 요청을 받은 워커가 MODEL_ACTIVE_FILE 에 게시하고
+  다른 워커들은 다음 요청 전에 같은 세트로 맞춤 (서버를 새로 띄우면 이전 게시는 지움)
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 워커당 스레드 수 (1이면 sync 워커), /predict 는 DB/기상청 대기 시간이 길어서 스레드를 같이 씀
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# 0이면 master 에서 로드하지 않고 워커마다 따로 로드 (메모리 워커 수 배)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+# N건 처리 후 워커 재시작 (0이면 안 함), preload 이면 master 에서 다시 fork 하므로 모델을 다시 읽지 않음
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    """master 시작: 지난 실행에서 게시한 모델 세트는 버림 (모두 models/ 를 읽은 상태에서 시작)"""
+    from app import MODEL_ACTIVE_FILE
+
+    try:
+        os.remove(MODEL_ACTIVE_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def post_fork(server, worker):
+    """fork 직후 워커에서: 워커 전용 자원 생성"""
+    from app import init_worker
+
+    init_worker()
+    server.log.info(f"worker {worker.pid}: 워커 자원 생성 완료")
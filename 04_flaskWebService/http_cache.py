@@ -0,0 +1,249 @@
+"""
+HTTP 응답 캐시 / 압축
+- ETag(본문 해시) / Last-Modified → If-None-Match / If-Modified-Since 가 맞으면 304 (본문 없이)
+- gzip / br(brotli 설치 시) 압축, Vary: Accept-Encoding
+- CachedBody: 한 번 만든 응답 본문 + 압축본 (index, /api/locations, 과거 실제 데이터 result.html)
+- RenderedCache: CachedBody LRU/TTL → 같은 요청은 조회/템플릿/압축 없이 바로 반환
+- finalize_response: after_request 에서 나머지 응답에도 ETag + 압축 적용
+
+압축된 응답은 ETag 뒤에 -gzip / -br 을 붙여서 인코딩마다 다른 값 (비교할 때는 떼고 비교)
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from flask import Response
+from werkzeug.http import http_date, parse_date
+
+try:
+    import brotli  # 선택: 없으면 gzip 만
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+# 0 이면 압축 안 함 (앞단 nginx 등에서 압축할 때)
+HTTP_COMPRESS = os.getenv("HTTP_COMPRESS", "1") == "1"
+# 이보다 작은 응답은 압축하지 않음 (바이트)
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+# 요청마다 압축하는 응답은 빠른 단계, 한 번 만들어 두는 응답은 높은 단계
+GZIP_LEVEL_DYNAMIC = 6
+GZIP_LEVEL_CACHED = 9
+BROTLI_QUALITY_DYNAMIC = 5
+BROTLI_QUALITY_CACHED = 11
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+# =========================
+# 압축 / 조건부 요청
+# =========================
+def accepted_encoding(accept_encoding: str):
+    """Accept-Encoding → 쓸 인코딩 (br 우선, q=0 은 제외), 없으면 None"""
+    if not HTTP_COMPRESS or not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(name.strip().lower())
+    for enc in ENCODINGS:
+        if enc in accepted or "*" in accepted:
+            return enc
+    return None
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY_CACHED if cached else BROTLI_QUALITY_DYNAMIC)
+    # mtime=0 → 같은 본문은 항상 같은 압축 결과
+    return gzip.compress(body, compresslevel=GZIP_LEVEL_CACHED if cached else GZIP_LEVEL_DYNAMIC, mtime=0)
+
+
+def body_etag(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 목록 중 하나라도 etag 와 같으면 True (W/, 따옴표, -gzip/-br 무시)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        for enc in ("br", "gzip"):
+            if tag.endswith("-" + enc):
+                tag = tag[:-len(enc) - 1]
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(request, etag: str, last_modified: datetime = None) -> bool:
+    """If-None-Match 가 있으면 그것만, 없으면 If-Modified-Since 로 판단"""
+    inm = request.headers.get("If-None-Match")
+    if inm:
+        return etag_matches(inm, etag)
+    ims = parse_date(request.headers.get("If-Modified-Since"))
+    if ims is not None and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= ims
+    return False
+
+
+def _is_compressible(mimetype: str) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(resp):
+    vary = resp.headers.get("Vary")
+    if not vary:
+        resp.headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        resp.headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+# =========================
+# 미리 만든 응답
+# =========================
+class CachedBody:
+    """응답 본문 하나 + 인코딩별 압축본 (만들 때 한 번만 압축)"""
+
+    __slots__ = ("body", "mimetype", "etag", "last_modified", "variants", "created")
+
+    def __init__(self, body: bytes, mimetype: str, last_modified: datetime = None):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = body_etag(body)
+        self.last_modified = (last_modified or datetime.now(timezone.utc)).replace(microsecond=0)
+        self.created = time.monotonic()
+        self.variants = {}
+        if HTTP_COMPRESS and _is_compressible(mimetype) and len(body) >= HTTP_COMPRESS_MIN_BYTES:
+            self.variants = {enc: compress(body, enc, cached=True) for enc in ENCODINGS}
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+    def response(self, request, cache_control: str = None, status: int = 200) -> Response:
+        """조건부 요청이면 304, 아니면 클라이언트가 받는 인코딩의 본문"""
+        enc = accepted_encoding(request.headers.get("Accept-Encoding", ""))
+        if enc not in self.variants:
+            enc = None
+        if not_modified(request, self.etag, self.last_modified):
+            resp = Response(status=304)
+        else:
+            resp = Response(self.variants[enc] if enc else self.body, status=status, mimetype=self.mimetype)
+            if enc:
+                resp.headers["Content-Encoding"] = enc
+        resp.headers["ETag"] = f'"{self.etag}-{enc}"' if enc else f'"{self.etag}"'
+        resp.headers["Last-Modified"] = http_date(self.last_modified)
+        if cache_control:
+            resp.headers["Cache-Control"] = cache_control
+        if self.variants:
+            _add_vary(resp)
+        return resp
+
+
+class RenderedCache:
+    """키 → CachedBody LRU/TTL (ttl <= 0 이면 만료 없음)"""
+
+    def __init__(self, maxsize: int = 2000, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl > 0 and time.monotonic() - entry.created > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key, entry: CachedBody):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            if self._data:
+                self._invalidations += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "bytes": sum(e.nbytes for e in self._data.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+
+# =========================
+# 나머지 응답 (after_request)
+# =========================
+def finalize_response(resp, request):
+    """
+    ETag(GET/HEAD) + 조건부 304 + 압축
+    스트리밍 응답, 파일 전송(static), 이미 인코딩된 응답(CachedBody)은 그대로
+    """
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or "Content-Encoding" in resp.headers or not _is_compressible(resp.mimetype)):
+        return resp
+
+    body = resp.get_data()
+    etag = resp.headers.get("ETag", "").strip('"') or None
+    if request.method in ("GET", "HEAD"):
+        etag = etag or body_etag(body)
+        if not_modified(request, etag):
+            resp.status_code = 304
+            resp.set_data(b"")
+            resp.headers["ETag"] = f'"{etag}"'
+            return resp
+
+    enc = accepted_encoding(request.headers.get("Accept-Encoding", "")) if len(body) >= HTTP_COMPRESS_MIN_BYTES else None
+    if enc:
+        resp.set_data(compress(body, enc))
+        resp.headers["Content-Encoding"] = enc
+    if len(body) >= HTTP_COMPRESS_MIN_BYTES and HTTP_COMPRESS:
+        _add_vary(resp)
+    if etag:
+        resp.headers["ETag"] = f'"{etag}-{enc}"' if enc else f'"{etag}"'
+    return resp
@@ -2,7 +2,12 @@
 CSV 데이터를 Oracle DB로 임포트하는 스크립트
 선생님 서버용 (210.121.189.12)
 """
+import argparse
 import os
+import re
+import time
+
+import numpy as np
 import pandas as pd
 import oracledb
 from dotenv import load_dotenv
@@ -25,8 +30,27 @@ except:
 # CSV 파일 경로
 CSV_PATH = "data/수원시 한식 동별 데이터백업.csv"
 
-def create_table(conn):
-    """테이블 생성 (Oracle 11g 호환)"""
+SALES_TABLE_SQL = """
+    CREATE TABLE SALES_DATA (
+        ID NUMBER PRIMARY KEY,
+        TA_YMD VARCHAR2(8) NOT NULL,
+        DONG VARCHAR2(50) NOT NULL,
+        HOUR NUMBER(2) NOT NULL,
+        DAY NUMBER(1),
+        AMT NUMBER(12, 2),
+        CNT NUMBER(8),
+        UNIT VARCHAR2(20),
+        TEMP NUMBER(5, 2),
+        RAIN NUMBER(6, 2)
+    )
+"""
+
+def create_table(conn, with_indexes=True, seq_cache=0):
+    """
+    테이블 생성 (Oracle 11g 호환)
+    with_indexes=False 이면 인덱스는 만들지 않음 (대량 적재 후 create_indexes로 생성)
+    seq_cache > 0 이면 시퀀스를 CACHE n 으로 생성 (대량 적재 시 NEXTVAL 비용 감소)
+    """
     cursor = conn.cursor()
     
     # 기존 시퀀스 삭제
@@ -43,34 +67,35 @@ def create_table(conn):
         pass
     
     # 새 테이블 생성 (Oracle 11g 호환)
-    create_sql = """
-    CREATE TABLE SALES_DATA (
-        ID NUMBER PRIMARY KEY,
-        TA_YMD VARCHAR2(8) NOT NULL,
-        DONG VARCHAR2(50) NOT NULL,
-        HOUR NUMBER(2) NOT NULL,
-        DAY NUMBER(1),
-        AMT NUMBER(12, 2),
-        CNT NUMBER(8),
-        UNIT VARCHAR2(20),
-        TEMP NUMBER(5, 2),
-        RAIN NUMBER(6, 2)
-    )
-    """
-    cursor.execute(create_sql)
+    cursor.execute(SALES_TABLE_SQL)
     print("✅ 테이블 생성 완료")
+
+    # 증분 적재 기록도 초기화 (다음 증분 적재는 새 테이블의 최대 날짜부터)
+    try:
+        cursor.execute("DELETE FROM SALES_LOAD_STATE")
+    except:
+        pass
     
     # 시퀀스 생성 (자동 증가 ID용)
-    cursor.execute("""
+    cache_sql = f"CACHE {seq_cache}" if seq_cache > 0 else "NOCACHE"
+    cursor.execute(f"""
         CREATE SEQUENCE SALES_DATA_SEQ
         START WITH 1
         INCREMENT BY 1
-        NOCACHE
+        {cache_sql}
         NOCYCLE
     """)
     print("✅ 시퀀스 생성 완료")
     
-    # 인덱스 생성 (성능 향상)
+    conn.commit()
+    cursor.close()
+
+    if with_indexes:
+        create_indexes(conn)
+
+def create_indexes(conn):
+    """인덱스 생성 (성능 향상)"""
+    cursor = conn.cursor()
     cursor.execute("""
         CREATE INDEX IDX_SALES_YMD_DONG ON SALES_DATA(TA_YMD, DONG)
     """)
@@ -78,8 +103,6 @@ def create_table(conn):
         CREATE INDEX IDX_SALES_YMD_DONG_HOUR ON SALES_DATA(TA_YMD, DONG, HOUR)
     """)
     print("✅ 인덱스 생성 완료")
-    
-    conn.commit()
     cursor.close()
 
 def import_csv_to_oracle(csv_path):
@@ -188,5 +211,426 @@ def import_csv_to_oracle(csv_path):
     print(f"✅ 임포트 완료!")
     print(f"{'='*60}\n")
 
+# =========================
+# 대량 적재 (fast 모드)
+# =========================
+CSV_COLUMNS = ['TA_YMD', 'DONG', 'HOUR', 'DAY', 'AMT', 'CNT', 'UNIT', 'TEMP', 'RAIN']
+
+INSERT_SQL = """
+    INSERT INTO SALES_DATA
+    (ID, TA_YMD, DONG, HOUR, DAY, AMT, CNT, UNIT, TEMP, RAIN)
+    VALUES (SALES_DATA_SEQ.NEXTVAL, :1, :2, :3, :4, :5, :6, :7, :8, :9)
+"""
+
+def detect_encoding(csv_path):
+    """앞부분만 읽어서 인코딩 확인"""
+    for encoding in ['utf-8-sig', 'cp949', 'utf-8']:
+        try:
+            pd.read_csv(csv_path, encoding=encoding, nrows=1000)
+            return encoding
+        except (UnicodeDecodeError, pd.errors.ParserError):
+            continue
+    raise ValueError(f"CSV 인코딩을 알 수 없습니다: {csv_path}")
+
+def _norm_dong(name):
+    """app.py의 _norm_dong_name과 같은 규칙"""
+    s = str(name).strip().replace(" ", "")
+    if '동' in s:
+        m = re.findall(r"([가-힣0-9]+동)", s)
+        s = m[-1] if m else s
+    return s
+
+def normalize_dong_series(dong):
+    """동 이름 정규화 (고유값만 정규화해서 다시 펼침)"""
+    codes, uniques = pd.factorize(dong)
+    # 마지막 칸은 결측값(code -1) 자리 → None
+    normalized = np.array([_norm_dong(u) for u in uniques] + [None], dtype=object)
+    return pd.Series(normalized[codes], index=dong.index)
+
+def prepare_chunk(df):
+    """CSV 청크 → INSERT 바인드용 튜플 목록 (컬럼 단위 변환)"""
+    out = pd.DataFrame({
+        'TA_YMD': df['TA_YMD'].astype(str).str.replace("-", "", regex=False).str.strip(),
+        'DONG': normalize_dong_series(df['DONG']),
+        'HOUR': pd.to_numeric(df['HOUR'], errors='coerce').fillna(0).astype('int64'),
+        'DAY': np.trunc(pd.to_numeric(df['DAY'], errors='coerce')).astype('Int64'),
+        'AMT': pd.to_numeric(df['AMT'], errors='coerce'),
+        'CNT': np.trunc(pd.to_numeric(df['CNT'], errors='coerce')).astype('Int64'),
+        'UNIT': df['UNIT'].astype('string'),
+        'TEMP': pd.to_numeric(df['TEMP'], errors='coerce'),
+        'RAIN': pd.to_numeric(df['RAIN'], errors='coerce'),
+    })
+    # NaN/NA → None (Oracle NULL)
+    out = out.astype(object).where(out.notna(), None)
+    return list(out.itertuples(index=False, name=None))
+
+def read_csv_chunks(csv_path, chunksize, encoding=None):
+    """필요한 컬럼만 청크 단위로 읽기 (메모리 사용량 일정)"""
+    encoding = encoding or detect_encoding(csv_path)
+    print(f"✅ CSV 인코딩: {encoding}")
+    header = pd.read_csv(csv_path, encoding=encoding, nrows=0).columns
+    usecols = [c for c in CSV_COLUMNS if c in header]
+    reader = pd.read_csv(
+        csv_path, encoding=encoding, usecols=usecols, chunksize=chunksize,
+        dtype={'TA_YMD': str, 'DONG': str, 'UNIT': str},
+    )
+    for chunk in reader:
+        for col in CSV_COLUMNS:
+            if col not in chunk.columns:
+                chunk[col] = None
+        yield chunk
+
+def insert_rows(cursor, sql, rows, batch_size):
+    """executemany(batcherrors) 로 삽입 → (성공 행 수, 오류 목록)"""
+    ok, errors = 0, []
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        cursor.executemany(sql, batch, batcherrors=True)
+        batch_errors = cursor.getbatcherrors()
+        for err in batch_errors:
+            errors.append((i + err.offset, err.message))
+        ok += len(batch) - len(batch_errors)
+    return ok, errors
+
+def bulk_import_csv_to_oracle(csv_path, chunksize=100_000, batch_size=20_000):
+    """
+    대량 적재 모드
+    - 청크 단위 read_csv + 컬럼 단위 변환 (iterrows 없음)
+    - executemany(batcherrors=True) 큰 배치, 청크마다 한 번 commit
+    - 인덱스는 적재가 끝난 뒤 생성
+    """
+    print(f"\n{'='*60}")
+    print(f"📂 CSV → Oracle DB 대량 적재 시작")
+    print(f"{'='*60}\n")
+
+    print(f"🔌 Oracle DB 연결 중...")
+    conn = oracledb.connect(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        host=ORACLE_HOST,
+        port=ORACLE_PORT,
+        sid=ORACLE_SID
+    )
+    print(f"✅ Oracle 연결 성공")
+
+    print(f"\n📊 테이블 생성 중... (인덱스는 적재 후 생성)")
+    create_table(conn, with_indexes=False, seq_cache=1000)
+
+    cursor = conn.cursor()
+    cursor.setinputsizes(8, 50, None, None, None, None, 20, None, None)
+
+    total_ok, total_err, rows_read = 0, 0, 0
+    start = time.perf_counter()
+    for chunk in read_csv_chunks(csv_path, chunksize):
+        rows = prepare_chunk(chunk)
+        ok, errors = insert_rows(cursor, INSERT_SQL, rows, batch_size)
+        conn.commit()
+
+        # 오류 위치 = 이전 청크까지 읽은 행 수 + 청크 안 위치 (CSV 데이터 행 번호, 1부터)
+        for offset, message in errors[:3]:
+            print(f"  ⚠️  행 {rows_read + offset + 1:,} 삽입 실패: {message}")
+        rows_read += len(rows)
+        total_ok += ok
+        total_err += len(errors)
+        elapsed = time.perf_counter() - start
+        print(f"  ✓ {total_ok:,} 행 삽입 (오류 {total_err:,}) - {total_ok / elapsed:,.0f} rows/sec")
+
+    load_sec = time.perf_counter() - start
+    cursor.close()
+
+    print(f"\n📊 인덱스 생성 중...")
+    t0 = time.perf_counter()
+    create_indexes(conn)
+    index_sec = time.perf_counter() - t0
+
+    conn.close()
+
+    print(f"\n{'='*60}")
+    print(f"✅ 대량 적재 완료: {total_ok:,} 행 (오류 {total_err:,})")
+    print(f"   적재: {load_sec:.1f}초 ({total_ok / max(load_sec, 1e-9):,.0f} rows/sec)")
+    print(f"   인덱스: {index_sec:.1f}초")
+    print(f"{'='*60}\n")
+
+# =========================
+# 증분 적재 (incremental 모드)
+# - SALES_DATA를 지우지 않고 새 (TA_YMD, DONG, HOUR)만 MERGE
+# - 청크 단위 트랜잭션: 스테이징 → MERGE → 진행 상태 기록을 한 번에 commit
+#   → 중간에 실패해도 다시 실행하면 끝난 청크 다음부터 이어서 적재 (중복 행 없음)
+# - 스테이징은 세션 전용 임시 테이블(GTT): 증분 적재가 동시에 여러 개 돌아도 서로의 스테이징 행을 보거나 지우지 않고
+#   commit/rollback 때 자동으로 비워짐
+# =========================
+STAGE_TABLE_SQL = """
+    CREATE GLOBAL TEMPORARY TABLE SALES_DATA_STAGE (
+        ROW_NO NUMBER NOT NULL,
+        TA_YMD VARCHAR2(8),
+        DONG VARCHAR2(50),
+        HOUR NUMBER(2),
+        DAY NUMBER(1),
+        AMT NUMBER(12, 2),
+        CNT NUMBER(8),
+        UNIT VARCHAR2(20),
+        TEMP NUMBER(5, 2),
+        RAIN NUMBER(6, 2)
+    ) ON COMMIT DELETE ROWS
+"""
+
+# 파일별 적재 상태 + 하이워터마크(마지막으로 끝까지 적재한 날짜)
+LOAD_STATE_SQL = """
+    CREATE TABLE SALES_LOAD_STATE (
+        SOURCE_NAME VARCHAR2(300) PRIMARY KEY,
+        STATUS VARCHAR2(10) NOT NULL,
+        CHUNKSIZE NUMBER NOT NULL,
+        CHUNKS_DONE NUMBER NOT NULL,
+        ROWS_MERGED NUMBER NOT NULL,
+        BASE_HWM VARCHAR2(8),
+        MAX_YMD VARCHAR2(8),
+        UPDATED_AT DATE NOT NULL
+    )
+"""
+
+STAGE_INSERT_SQL = """
+    INSERT INTO SALES_DATA_STAGE
+    (ROW_NO, TA_YMD, DONG, HOUR, DAY, AMT, CNT, UNIT, TEMP, RAIN)
+    VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10)
+"""
+
+# 같은 청크 안에 같은 키가 여러 번 있으면 마지막 행만 사용
+MERGE_SQL = """
+    MERGE INTO SALES_DATA T
+    USING (
+        SELECT TA_YMD, DONG, HOUR, DAY, AMT, CNT, UNIT, TEMP, RAIN
+        FROM (
+            SELECT S.*, ROW_NUMBER() OVER (
+                PARTITION BY TA_YMD, DONG, HOUR ORDER BY ROW_NO DESC) RN
+            FROM SALES_DATA_STAGE S
+            WHERE TA_YMD IS NOT NULL AND DONG IS NOT NULL AND HOUR IS NOT NULL
+        )
+        WHERE RN = 1
+    ) S
+    ON (T.TA_YMD = S.TA_YMD AND T.DONG = S.DONG AND T.HOUR = S.HOUR)
+    {update_clause}
+    WHEN NOT MATCHED THEN INSERT
+        (ID, TA_YMD, DONG, HOUR, DAY, AMT, CNT, UNIT, TEMP, RAIN)
+        VALUES (SALES_DATA_SEQ.NEXTVAL, S.TA_YMD, S.DONG, S.HOUR, S.DAY,
+                S.AMT, S.CNT, S.UNIT, S.TEMP, S.RAIN)
+"""
+
+MERGE_UPDATE_CLAUSE = """
+    WHEN MATCHED THEN UPDATE SET
+        T.DAY = S.DAY, T.AMT = S.AMT, T.CNT = S.CNT,
+        T.UNIT = S.UNIT, T.TEMP = S.TEMP, T.RAIN = S.RAIN
+"""
+
+def _create_if_missing(cursor, sql):
+    """ORA-00955(이미 존재) 는 무시"""
+    try:
+        cursor.execute(sql)
+        return True
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        if getattr(error, "code", None) == 955:
+            return False
+        raise
+
+def ensure_tables(conn):
+    """증분 적재에 필요한 테이블/시퀀스/인덱스를 없을 때만 생성 (기존 데이터는 그대로)"""
+    cursor = conn.cursor()
+    if _create_if_missing(cursor, SALES_TABLE_SQL):
+        print("✅ SALES_DATA 테이블 생성")
+    if _create_if_missing(cursor, "CREATE SEQUENCE SALES_DATA_SEQ START WITH 1 INCREMENT BY 1 CACHE 1000 NOCYCLE"):
+        # 예전 방식으로 적재된 테이블이면 기존 ID 다음 번호부터 시작해야 함
+        cursor.execute("SELECT NVL(MAX(ID), 0) FROM SALES_DATA")
+        max_id = cursor.fetchone()[0]
+        if max_id:
+            cursor.execute("DROP SEQUENCE SALES_DATA_SEQ")
+            cursor.execute(f"CREATE SEQUENCE SALES_DATA_SEQ START WITH {int(max_id) + 1} "
+                           f"INCREMENT BY 1 CACHE 1000 NOCYCLE")
+        print("✅ SALES_DATA_SEQ 시퀀스 생성")
+    for sql in (
+        "CREATE INDEX IDX_SALES_YMD_DONG ON SALES_DATA(TA_YMD, DONG)",
+        "CREATE INDEX IDX_SALES_YMD_DONG_HOUR ON SALES_DATA(TA_YMD, DONG, HOUR)",
+    ):
+        if _create_if_missing(cursor, sql):
+            print(f"✅ 인덱스 생성: {sql.split()[2]}")
+    # 예전 버전이 만든 일반 테이블(모든 세션이 공유)이면 임시 테이블로 다시 만듦
+    cursor.execute("SELECT TEMPORARY FROM USER_TABLES WHERE TABLE_NAME = 'SALES_DATA_STAGE'")
+    row = cursor.fetchone()
+    if row is not None and row[0] != 'Y':
+        cursor.execute("DROP TABLE SALES_DATA_STAGE PURGE")
+        print("♻️  SALES_DATA_STAGE 일반 테이블 삭제 → 임시 테이블로 다시 생성")
+    if _create_if_missing(cursor, STAGE_TABLE_SQL):
+        print("✅ SALES_DATA_STAGE 스테이징 임시 테이블 생성")
+    if _create_if_missing(cursor, LOAD_STATE_SQL):
+        print("✅ SALES_LOAD_STATE 적재 상태 테이블 생성")
+    conn.commit()
+    cursor.close()
+
+def source_name(csv_path):
+    """적재 상태를 구분하는 키 (같은 이름이라도 파일 크기가 다르면 다른 원본)"""
+    return f"{os.path.basename(csv_path)}|{os.path.getsize(csv_path)}"
+
+def get_high_water_mark(cursor):
+    """
+    끝까지 적재된 마지막 날짜
+    - DONE: 그 실행의 시작 하이워터마크와 새로 넣은 최대 날짜 중 큰 값
+      (새 날짜가 하나도 없어서 MAX_YMD 가 NULL 이어도 시작 하이워터마크는 유지)
+    - 끝나지 않은 실행: 시작 하이워터마크까지는 이미 적재된 상태
+    - 그래도 없으면(상태 기록이 없거나 날짜가 하나도 기록되지 않은 경우, 예전 방식으로 전체 적재) SALES_DATA의 최대 날짜
+    GREATEST 는 인자 하나라도 NULL 이면 NULL 이므로 양쪽에 NVL
+    """
+    cursor.execute("""
+        SELECT MAX(CASE WHEN STATUS = 'DONE'
+                        THEN GREATEST(NVL(MAX_YMD, BASE_HWM), NVL(BASE_HWM, MAX_YMD))
+                        ELSE BASE_HWM END)
+        FROM SALES_LOAD_STATE
+    """)
+    hwm = cursor.fetchone()[0]
+    if hwm is None:
+        cursor.execute("SELECT MAX(TA_YMD) FROM SALES_DATA")
+        hwm = cursor.fetchone()[0]
+    return hwm
+
+def _load_state(cursor, source):
+    cursor.execute("""
+        SELECT STATUS, CHUNKSIZE, CHUNKS_DONE, ROWS_MERGED, BASE_HWM, MAX_YMD
+        FROM SALES_LOAD_STATE WHERE SOURCE_NAME = :1
+    """, [source])
+    return cursor.fetchone()
+
+def _save_state(cursor, source, status, chunksize, chunks_done, rows_merged, base_hwm, max_ymd):
+    cursor.execute("""
+        MERGE INTO SALES_LOAD_STATE T
+        USING (SELECT :1 SOURCE_NAME FROM DUAL) S
+        ON (T.SOURCE_NAME = S.SOURCE_NAME)
+        WHEN MATCHED THEN UPDATE SET
+            STATUS = :2, CHUNKSIZE = :3, CHUNKS_DONE = :4, ROWS_MERGED = :5,
+            BASE_HWM = :6, MAX_YMD = :7, UPDATED_AT = SYSDATE
+        WHEN NOT MATCHED THEN INSERT
+            (SOURCE_NAME, STATUS, CHUNKSIZE, CHUNKS_DONE, ROWS_MERGED, BASE_HWM, MAX_YMD, UPDATED_AT)
+            VALUES (:1, :2, :3, :4, :5, :6, :7, SYSDATE)
+    """, [source, status, chunksize, chunks_done, rows_merged, base_hwm, max_ymd])
+
+def _max_ymd(a, b):
+    return max(x for x in (a, b) if x) if (a or b) else None
+
+def incremental_import_csv_to_oracle(csv_path, chunksize=100_000, batch_size=20_000,
+                                     use_hwm=True, update_existing=False):
+    """
+    증분 적재 모드
+    - use_hwm: 하이워터마크 이하 날짜는 건너뜀 (새 달 데이터만 추가할 때)
+    - update_existing: 이미 있는 키도 새 값으로 갱신 (기본은 새 키만 추가)
+    """
+    print(f"\n{'='*60}")
+    print(f"📂 CSV → Oracle DB 증분 적재 시작")
+    print(f"{'='*60}\n")
+
+    print(f"🔌 Oracle DB 연결 중...")
+    conn = oracledb.connect(
+        user=ORACLE_USER,
+        password=ORACLE_PASSWORD,
+        host=ORACLE_HOST,
+        port=ORACLE_PORT,
+        sid=ORACLE_SID
+    )
+    print(f"✅ Oracle 연결 성공")
+    ensure_tables(conn)
+
+    cursor = conn.cursor()
+    source = source_name(csv_path)
+    hwm = get_high_water_mark(cursor) if use_hwm else None
+
+    # 이전 실행이 중간에 끊겼으면 끝난 청크 다음부터 이어서
+    # (하이워터마크도 처음 시작할 때 값을 그대로 사용)
+    chunks_done, rows_merged, max_ymd = 0, 0, None
+    state = _load_state(cursor, source)
+    if state is not None:
+        status, prev_chunksize, prev_chunks, prev_rows, base_hwm, prev_max = state
+        if status == 'DONE':
+            print(f"✅ 이미 적재가 끝난 파일입니다: {source} ({int(prev_rows):,} 행)")
+            cursor.close()
+            conn.close()
+            return
+        if int(prev_chunksize) != chunksize:
+            print(f"⚠️  이전 실행의 chunksize({int(prev_chunksize)})로 이어서 적재합니다")
+            chunksize = int(prev_chunksize)
+        chunks_done, rows_merged, max_ymd = int(prev_chunks), int(prev_rows), prev_max
+        hwm = base_hwm if use_hwm else None
+        print(f"⏯️  이어서 적재: 청크 {chunks_done}개 완료, {rows_merged:,} 행 반영됨")
+    print(f"📌 하이워터마크: {hwm or '(없음)'}" + ("" if use_hwm else " (사용 안 함)"))
+
+    merge_sql = MERGE_SQL.format(update_clause=MERGE_UPDATE_CLAUSE if update_existing else "")
+    stage_cursor = conn.cursor()
+    stage_cursor.setinputsizes(None, 8, 50, None, None, None, None, 20, None, None)
+
+    total_read, total_skipped = 0, 0
+    start = time.perf_counter()
+    for chunk_no, chunk in enumerate(read_csv_chunks(csv_path, chunksize)):
+        if chunk_no < chunks_done:
+            continue
+        rows = prepare_chunk(chunk)
+        total_read += len(rows)
+        if hwm:
+            kept = [r for r in rows if r[0] is not None and r[0] > hwm]
+            total_skipped += len(rows) - len(kept)
+            rows = kept
+
+        # 스테이징 → MERGE → 상태 기록을 한 트랜잭션으로 (스테이징 행은 commit/rollback 때 비워짐)
+        merged = 0
+        if rows:
+            staged = [(i,) + r for i, r in enumerate(rows)]
+            _, errors = insert_rows(stage_cursor, STAGE_INSERT_SQL, staged, batch_size)
+            if errors:
+                # 일부 행이 빠진 청크를 완료로 기록하면 이어서 적재할 때 그 행들을 다시 넣지 않음
+                # → 이 청크는 되돌리고 중단 (상태는 직전 청크까지, CSV 를 고친 뒤 다시 실행하면 이 청크부터)
+                conn.rollback()
+                for offset, message in errors[:3]:
+                    print(f"  ❌ 청크 {chunk_no} 행 {offset:,} 스테이징 실패: {message}")
+                stage_cursor.close()
+                cursor.close()
+                conn.close()
+                raise RuntimeError(f"청크 {chunk_no}: {len(errors):,}개 행 스테이징 실패 → 적재 중단 "
+                                   f"(청크 {chunks_done}개까지 반영됨)")
+            cursor.execute(merge_sql)
+            merged = cursor.rowcount
+            max_ymd = _max_ymd(max_ymd, max((r[0] for r in rows if r[0]), default=None))
+        rows_merged += merged
+        chunks_done = chunk_no + 1
+        _save_state(cursor, source, 'RUNNING', chunksize, chunks_done, rows_merged, hwm, max_ymd)
+        conn.commit()
+
+        elapsed = time.perf_counter() - start
+        print(f"  ✓ 청크 {chunk_no}: {merged:,} 행 반영 (누적 {rows_merged:,}, 건너뜀 {total_skipped:,}) "
+              f"- {total_read / elapsed:,.0f} rows/sec")
+
+    _save_state(cursor, source, 'DONE', chunksize, chunks_done, rows_merged, hwm, max_ymd)
+    conn.commit()
+    stage_cursor.close()
+    cursor.close()
+    conn.close()
+
+    print(f"\n{'='*60}")
+    print(f"✅ 증분 적재 완료: {rows_merged:,} 행 반영 (하이워터마크 이하 {total_skipped:,} 행 건너뜀)")
+    print(f"   새 하이워터마크: {_max_ymd(hwm, max_ymd) or '(없음)'}")
+    print(f"{'='*60}\n")
+
 if __name__ == "__main__":
-    import_csv_to_oracle(CSV_PATH)
+    parser = argparse.ArgumentParser(description="CSV 데이터를 Oracle SALES_DATA 테이블로 임포트")
+    parser.add_argument("--csv", default=CSV_PATH, help="CSV 파일 경로")
+    parser.add_argument("--mode", choices=["fast", "incremental", "legacy"], default="fast",
+                        help="fast: 테이블을 새로 만들고 대량 적재 (기본), "
+                             "incremental: 기존 데이터를 두고 새 키만 MERGE, legacy: 예전 방식")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="한 번에 읽을 CSV 행 수 (청크마다 commit)")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="executemany 한 번에 보낼 행 수")
+    parser.add_argument("--no-hwm", action="store_true",
+                        help="incremental: 하이워터마크 이하 날짜도 MERGE (과거 데이터 보충)")
+    parser.add_argument("--update-existing", action="store_true",
+                        help="incremental: 이미 있는 (TA_YMD, DONG, HOUR) 도 새 값으로 갱신")
+    args = parser.parse_args()
+
+    if args.mode == "fast":
+        bulk_import_csv_to_oracle(args.csv, chunksize=args.chunksize, batch_size=args.batch_size)
+    elif args.mode == "incremental":
+        incremental_import_csv_to_oracle(args.csv, chunksize=args.chunksize, batch_size=args.batch_size,
+                                         use_hwm=not args.no_hwm, update_existing=args.update_existing)
+    else:
+        import_csv_to_oracle(args.csv)
@@ -0,0 +1,481 @@
+"""
+기상청(KMA) API 클라이언트
+- requests.Session 커넥션 재사용
+- 같은 요청이 동시에 들어오면 한 번만 호출 (single-flight)
+- 토큰 버킷으로 호출 속도 제한 (429 방지), prefork 서버에서는 파일로 워커들이 같이 씀
+- 연속 실패 시 서킷 브레이커가 열려서 바로 실패 → 월별 평균 폴백
+"""
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from metrics import log
+
+try:
+    import ijson  # 선택: 단기예보 응답 스트리밍 파싱
+except ImportError:
+    ijson = None
+
+try:
+    import fcntl  # 리눅스/맥: 워커 간 호출 속도 제한 공유
+except ImportError:
+    fcntl = None
+
+load_dotenv()
+
+KMA_SERVICE_KEY = os.getenv("KMA_SERVICE_KEY", "")
+KMA_BASE_URL = os.getenv("KMA_BASE_URL", "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0")
+ASOS_BASE_URL = os.getenv("ASOS_BASE_URL", "http://apis.data.go.kr/1360000/AsosDalyInfoService/getWthrDataList")
+ASOS_STN_ID = 119  # 수원 관측소 ID
+
+# (연결, 응답) 타임아웃(초)
+KMA_CONNECT_TIMEOUT = float(os.getenv("KMA_CONNECT_TIMEOUT", "3"))
+KMA_READ_TIMEOUT = float(os.getenv("KMA_READ_TIMEOUT", "10"))
+# 초당 호출 수 / 순간 최대 호출 수 / 토큰을 기다리는 최대 시간(초)
+KMA_RATE_PER_SEC = float(os.getenv("KMA_RATE_PER_SEC", "5"))
+KMA_RATE_BURST = int(os.getenv("KMA_RATE_BURST", "10"))
+KMA_RATE_MAX_WAIT = float(os.getenv("KMA_RATE_MAX_WAIT", "2"))
+# 연속 실패 N번이면 서킷 열림, 열린 뒤 몇 초 후 한 번 다시 시도
+KMA_BREAKER_THRESHOLD = int(os.getenv("KMA_BREAKER_THRESHOLD", "5"))
+KMA_BREAKER_RESET = float(os.getenv("KMA_BREAKER_RESET", "60"))
+
+
+class KmaUnavailable(RuntimeError):
+    """서킷이 열렸거나 호출 제한에 걸려 API를 부르지 않은 경우"""
+
+
+class ForecastMissing(ValueError):
+    """단기예보 응답에 요청한 날짜가 없는 경우 (예보 범위 밖) → default: 대신 쓸 (temp, rain)"""
+
+    def __init__(self, target_date: str, default=(15.0, 0.0)):
+        super().__init__(f"단기예보에 {target_date} 예보가 없습니다")
+        self.target_date = target_date
+        self.default = default
+
+
+# =========================
+# Single-flight
+# =========================
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """같은 key로 동시에 들어온 호출은 첫 호출 결과를 나눠 가짐"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# =========================
+# Token bucket
+# =========================
+class TokenBucket:
+    """rate(초당) 만큼 토큰이 차고 최대 burst개까지 쌓임"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> bool:
+        """토큰 하나를 가져옴, max_wait 안에 못 가져오면 False"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else max_wait
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class FileTokenBucket:
+    """
+    여러 프로세스(gunicorn 워커)가 같이 쓰는 토큰 버킷
+    토큰 수와 갱신 시각을 파일에 두고 flock 으로 잠가서 갱신 → 워커 수와 상관없이 전체 호출 속도가 rate
+    """
+
+    def __init__(self, path: str, rate: float, burst: int):
+        self.path = path
+        self.rate = rate
+        self.capacity = max(1, burst)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """토큰을 하나 가져오면 0, 없으면 다음 토큰까지 기다릴 시간(초)"""
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # 파일을 닫으면 풀림
+            f.seek(0)
+            now = time.time()
+            try:
+                tokens, updated = (float(v) for v in f.read().split())
+            except ValueError:
+                tokens, updated = float(self.capacity), now
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+            f.seek(0)
+            f.truncate()
+            f.write(f"{tokens!r} {now!r}")
+            return wait
+
+    def acquire(self, max_wait: float) -> bool:
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def create_rate_limiter(shared_path: str = None):
+    """shared_path 가 있으면 그 파일로 프로세스 간 공유 (fcntl 이 없는 환경은 프로세스 안에서만)"""
+    if shared_path and fcntl is not None:
+        return FileTokenBucket(shared_path, KMA_RATE_PER_SEC, KMA_RATE_BURST)
+    return TokenBucket(KMA_RATE_PER_SEC, KMA_RATE_BURST)
+
+
+# =========================
+# Circuit breaker
+# =========================
+class CircuitBreaker:
+    """closed → (연속 실패) → open → (reset_timeout 후) half-open → 성공 시 closed"""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            # half-open: 시험 호출 하나만 허용
+            self._trial = True
+            return True
+
+    def release(self):
+        """allow() 후 호출하지 못하고 끝났을 때: 시험 호출 자리만 돌려줌 (실패로 세지 않음)"""
+        with self._lock:
+            self._trial = False
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self, trip: bool = False):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if trip or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+# =========================
+# 단기예보 파싱
+# =========================
+def _parse_pcp(val):
+    """PCP 값 → mm (강수없음/해석 불가는 None)"""
+    if val in ("강수없음", None):
+        return None
+    try:
+        v = str(val).replace("mm", "").strip()
+        return 0.0 if "미만" in v else float(v)
+    except ValueError:
+        return None
+
+
+def aggregate_village_items(items):
+    """
+    단기예보 항목을 한 번 훑어서 날짜별 (평균 TMP, 평균 PCP) 계산
+    PCP는 강수가 있는 시각만 평균 (예전 get_vilage_day_avg와 같은 기준)
+    """
+    acc = {}  # fcstDate -> [TMP 합, TMP 개수, PCP 합, PCP 개수]
+    for it in items:
+        cat = it.get("category")
+        if cat not in ("TMP", "PCP"):
+            continue
+        a = acc.setdefault(it.get("fcstDate"), [0.0, 0, 0.0, 0])
+        if cat == "TMP":
+            try:
+                a[0] += float(it.get("fcstValue"))
+                a[1] += 1
+            except (TypeError, ValueError):
+                pass
+        else:
+            mm = _parse_pcp(it.get("fcstValue"))
+            if mm is not None:
+                a[2] += mm
+                a[3] += 1
+
+    return {
+        ymd: (t_sum / t_n if t_n else 15.0, r_sum / r_n if r_n else 0.0)
+        for ymd, (t_sum, t_n, r_sum, r_n) in acc.items()
+        if ymd
+    }
+
+
+def parse_village_stream(fp):
+    """
+    getVilageFcst JSON 응답(파일 객체)을 날짜별 평균으로 변환
+    ijson이 설치되어 있으면 항목을 하나씩 읽고, 없으면 json으로 한 번에 읽음
+    """
+    if ijson is not None:
+        return aggregate_village_items(ijson.items(fp, "response.body.items.item.item"))
+    data = json.load(fp)
+    items = data.get("response", {}).get("body", {}).get("items", {}) or {}
+    return aggregate_village_items(items.get("item", []))
+
+
+# =========================
+# Client
+# =========================
+class KmaClient:
+    def __init__(self, store, service_key: str = KMA_SERVICE_KEY, limiter=None):
+        """store: weather_store.WeatherStore, limiter: 없으면 이 프로세스 전용 TokenBucket"""
+        self.store = store
+        self.service_key = service_key
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.flights = SingleFlight()
+        self.limiter = limiter or create_rate_limiter()
+        self.breaker = CircuitBreaker(KMA_BREAKER_THRESHOLD, KMA_BREAKER_RESET)
+        self._counts_lock = threading.Lock()
+        self.counts = {"calls": 0, "errors": 0, "rejected": 0}
+
+    def _bump(self, name: str):
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def _request(self, url: str, params: dict, parse=None):
+        if not self.breaker.allow():
+            self._bump("rejected")
+            raise KmaUnavailable("기상청 API 서킷 열림 (최근 연속 실패)")
+        if not self.limiter.acquire(KMA_RATE_MAX_WAIT):
+            # half-open 시험 호출 자리를 잡은 채로 끝나면 서킷이 계속 닫히지 않으므로 돌려줌
+            self.breaker.release()
+            self._bump("rejected")
+            raise KmaUnavailable("기상청 API 호출 속도 제한")
+
+        self._bump("calls")
+        try:
+            r = self.session.get(url, params=params, timeout=(KMA_CONNECT_TIMEOUT, KMA_READ_TIMEOUT),
+                                 stream=parse is not None)
+            with r:
+                r.raise_for_status()
+                if parse is None:
+                    data = r.json()
+                else:
+                    r.raw.decode_content = True
+                    data = parse(r.raw)
+        except Exception as e:
+            self._bump("errors")
+            # 429(호출 제한)는 바로 서킷을 열어서 한동안 호출하지 않음
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            self.breaker.failure(trip=(status == 429))
+            raise
+        self.breaker.success()
+        return data
+
+    def get_json(self, url: str, params: dict):
+        """같은 url/params 요청이 진행 중이면 그 결과를 같이 사용"""
+        if not self.service_key:
+            raise RuntimeError("KMA_SERVICE_KEY가 .env에 없습니다.")
+        params = dict(params, serviceKey=self.service_key)
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        return self.flights.do(key, lambda: self._request(url, params))
+
+    def get_stream(self, url: str, params: dict, parse):
+        """응답 본문을 메모리에 다 올리지 않고 parse(파일 객체)로 바로 처리"""
+        if not self.service_key:
+            raise RuntimeError("KMA_SERVICE_KEY가 .env에 없습니다.")
+        params = dict(params, serviceKey=self.service_key)
+        key = ("stream", url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        return self.flights.do(key, lambda: self._request(url, params, parse))
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        counts.update({"breaker": self.breaker.state, "coalesced": self.flights.shared})
+        return counts
+
+    # =========================
+    # 날씨 조회
+    # =========================
+    def get_ultra_now(self, nx: int, ny: int, use_cache: bool = True):
+        # 캐시 확인 (오늘 날짜)
+        today = datetime.now().strftime("%Y%m%d")
+        cached = self.store.get(today, nx, ny, "ultra") if use_cache else None
+        if cached:
+            log("DEBUG", f"📦 캐시 사용 (초단기실황): {cached['temp']}℃, {cached['rain']}mm")
+            return cached['temp'], cached['rain']
+
+        now = datetime.now()
+        base_date = now.strftime("%Y%m%d")
+        t = now - timedelta(hours=1)
+        base_time = t.strftime("%H00")
+
+        url = f"{KMA_BASE_URL}/getUltraSrtNcst"
+        params = {
+            "pageNo": "1",
+            "numOfRows": "200",
+            "dataType": "JSON",
+            "base_date": base_date,
+            "base_time": base_time,
+            "nx": str(nx),
+            "ny": str(ny),
+        }
+        data = self.get_json(url, params)
+        items = data["response"]["body"]["items"]["item"]
+        out = {it["category"]: it["obsrValue"] for it in items}
+
+        temp = float(out.get("T1H", 0.0))
+        rain = float(out.get("RN1", 0.0))
+
+        # 캐시 저장
+        self.store.set(today, nx, ny, "ultra", temp, rain)
+
+        return temp, rain
+
+    def get_vilage_day_avg(self, nx: int, ny: int, target_date: str, use_cache: bool = True):
+        # 캐시 확인
+        cached = self.store.get(target_date, nx, ny, "village") if use_cache else None
+        if cached:
+            log("DEBUG", f"📦 캐시 사용 (단기예보): {cached['temp']}℃, {cached['rain']}mm")
+            return cached['temp'], cached['rain']
+
+        url = f"{KMA_BASE_URL}/getVilageFcst"
+
+        def _call(base_date: str):
+            params = {
+                "pageNo": "1",
+                "numOfRows": "2500",
+                "dataType": "JSON",
+                "base_date": base_date,
+                "base_time": "0500",
+                "nx": str(nx),
+                "ny": str(ny),
+            }
+            days = self.get_stream(url, params, parse_village_stream)
+            if not days:
+                raise ValueError(f"단기예보 항목이 없습니다 (base_date: {base_date})")
+            return days
+
+        today = datetime.now().strftime("%Y%m%d")
+        try:
+            days = _call(today)
+        except KmaUnavailable:
+            raise
+        except Exception:
+            yday = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
+            days = _call(yday)
+
+        # 응답에 들어있는 모든 예보 날짜를 한 번에 캐시에 저장 (없는 날짜는 저장하지 않음)
+        self.store.set_many([(ymd, nx, ny, "village", t, r) for ymd, (t, r) in days.items()])
+        if target_date not in days:
+            raise ForecastMissing(target_date)
+
+        temp_avg, rain_avg = days[target_date]
+        return temp_avg, rain_avg
+
+    def get_asos_daily_obs(self, ymd8: str):
+        # 캐시 확인
+        cached = self.store.get(ymd8, ASOS_STN_ID, ASOS_STN_ID, "asos")
+        if cached:
+            log("DEBUG", f"📦 캐시 사용 (ASOS): {cached['temp']}℃, {cached['rain']}mm")
+            return cached['temp'], cached['rain']
+
+        params = {
+            "pageNo": 1,
+            "numOfRows": 10,
+            "dataType": "JSON",
+            "dataCd": "ASOS",
+            "dateCd": "DAY",
+            "startDt": ymd8,
+            "endDt": ymd8,
+            "stnIds": str(ASOS_STN_ID),
+        }
+        js = self.get_json(ASOS_BASE_URL, params)
+        items = js.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        if not items:
+            raise RuntimeError(f"ASOS 관측 데이터가 없습니다 (날짜: {ymd8})")
+        it = items[0]
+        avg_ta = float(it.get("avgTa")) if it.get("avgTa") not in (None, "") else 0.0
+        sum_rn = float(it.get("sumRn")) if it.get("sumRn") not in (None, "") else 0.0
+
+        # 캐시 저장
+        self.store.set(ymd8, ASOS_STN_ID, ASOS_STN_ID, "asos", avg_ta, sum_rn)
+
+        return avg_ta, sum_rn
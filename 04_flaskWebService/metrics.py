@@ -0,0 +1,251 @@
+"""
+요청 지연 시간 측정 + Prometheus 텍스트 형식 지표 (/metrics)
++ 로그 레벨 (요청마다 찍던 상세 출력은 DEBUG 에서만)
+
+- Histogram / Counter: 라벨별 누적값, 스레드 안전
+- Trace: 요청 하나의 단계별 시간 (날씨, 실제 데이터, 모델 추론, 템플릿 렌더링 ...)
+  단계가 끝날 때마다 histogram 에도 기록, 응답 헤더 Server-Timing 으로도 내보냄
+- add_collector: 캐시 적중률처럼 이미 stats() 로 모으는 값은 /metrics 요청 때 읽어서 내보냄
+- process_memory: 워커 메모리 (rss / pss / uss, prefork 서버에서 copy-on-write 공유 확인용)
+
+prometheus_client 없이 텍스트 형식만 맞춤 (https://prometheus.io/docs/instrumenting/exposition_formats/)
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# =========================
+# 로그 레벨
+# =========================
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+_LOG_THRESHOLD = LOG_LEVELS.get(LOG_LEVEL, 20)
+
+
+def log_enabled(level: str) -> bool:
+    return LOG_LEVELS.get(level, 20) >= _LOG_THRESHOLD
+
+
+def log(level: str, msg: str):
+    """LOG_LEVEL 이상일 때만 출력 (문자열은 호출하는 쪽에서 만들어지므로 반복문 안에서는 log_enabled 먼저 확인)"""
+    if LOG_LEVELS.get(level, 20) >= _LOG_THRESHOLD:
+        print(msg, flush=True)
+
+
+# =========================
+# 지표
+# =========================
+# 초 단위, 캐시 적중(µs) ~ 기상청 제한 시간(초)까지
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 → [버킷별 개수..., 합계, 개수]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, entry in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, entry):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, {'le': _fmt(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, {'le': '+Inf'})} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(entry[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {entry[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn):
+        """
+        fn() → [(이름, "gauge"|"counter", 설명, [({라벨}, 값), ...]), ...]
+        /metrics 요청 때마다 호출
+        """
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for fn in self._collectors:
+            try:
+                families = fn()
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_fmt(float(value))}")
+        return "\n".join(lines) + "\n"
+
+
+# =========================
+# 프로세스 메모리
+# =========================
+_SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Private_Clean": "uss", "Private_Dirty": "uss",
+                 "Shared_Clean": "shared", "Shared_Dirty": "shared"}
+
+
+def process_memory(pid="self"):
+    """
+    프로세스 메모리(바이트) → {"rss", "pss", "uss", "shared"}
+    - pss: 공유 페이지는 나눠 쓰는 프로세스 수로 나눈 몫 (워커들 pss 합 ≈ 실제 사용량)
+    - uss: 이 프로세스만 쓰는 페이지 (워커 하나를 더 띄울 때 늘어나는 양)
+    /proc/<pid>/smaps_rollup 이 없으면(리눅스 4.14 이전, 리눅스 외) rss 만, 그것도 없으면 {}
+    """
+    out = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                kind = _SMAPS_FIELDS.get(key)
+                if kind:
+                    out[kind] = out.get(kind, 0) + int(rest.split()[0]) * 1024
+        return out
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return {"rss": int(line.split()[1]) * 1024}
+    except (OSError, ValueError, IndexError):
+        pass
+    return out
+
+
+# =========================
+# 요청 단위 측정
+# =========================
+class Trace:
+    """요청 하나의 단계별 시간 (초), 다른 스레드에서 실행되는 단계도 기록 가능"""
+
+    def __init__(self, histogram: Histogram = None):
+        self.histogram = histogram
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        # 같은 단계가 여러 번이면 합산 (제한 시간이 지난 뒤 끝난 단계도 여기로 옴)
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self.histogram is not None:
+            self.histogram.observe(seconds, stage=stage)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, name: str, fn):
+        """스레드 풀에 넘길 함수를 단계 측정으로 감쌈"""
+        def _run(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return _run
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (브라우저 개발자 도구 Network 탭에 표시됨)"""
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = [f"{name};dur={sec * 1000:.2f}" for name, sec in stages]
+        parts.append(f"total;dur={self.elapsed * 1000:.2f}")
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        with self._lock:
+            stages = list(self.stages.items())
+        return " ".join(f"{name}={sec * 1000:.1f}ms" for name, sec in stages)
@@ -0,0 +1,429 @@
+"""
+시간대별 모델 레지스트리
+models/best_model_by_hour.csv (시간대별 최적 모델 종류), metrics_summary.csv,
+results_by_hour.csv 를 읽어 모델 세트(버전)를 구성
+
+로드 방식
+- lazy: 처음 쓰일 때 로드
+- parallel: 시작할 때 스레드 풀로 한꺼번에 로드 (끝날 때까지 대기)
+- background: 스레드 풀로 로드하되 시작은 막지 않음 (아직 로드 중인 모델은 쓰일 때 대기)
+
+버전 교체
+- reload(): 새 모델 세트를 전부 로드한 뒤 참조 하나만 바꿔치기 → 처리 중인 요청은 기존 세트로 끝까지 처리
+- rollback(): 직전 세트를 메모리에 그대로 두므로 다시 로드하지 않고 즉시 되돌림
+- SharedModelVersion: prefork 서버에서 교체/롤백한 워커가 지금 세트를 파일에 게시하고,
+  다른 워커들은 요청을 처리하기 전에 파일을 확인해서 같은 세트로 맞춤 (워커마다 다른 버전으로 예측하지 않게)
+"""
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from batch_inference import HourModel
+
+LOAD_MODES = ("lazy", "parallel", "background")
+# sklearn: joblib 모델 그대로 / compiled: compiled_models.py 경량 추론 (변환 못 하는 모델은 sklearn)
+BACKENDS = ("sklearn", "compiled")
+
+
+def estimate_model_bytes(obj) -> int:
+    """
+    모델 객체 안의 numpy 배열 / XGBoost booster 크기 합 (대략적인 메모리 사용량)
+    sklearn 추정기 속성을 따라가며 계산
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, np.ndarray):
+            total += o.nbytes
+        elif type(o).__name__ == "Booster" and hasattr(o, "save_raw"):
+            try:
+                total += len(o.save_raw())
+            except Exception:
+                pass
+        elif isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            stack.extend(o)
+        elif hasattr(o, "__dict__") and not isinstance(o, type):
+            stack.extend(vars(o).values())
+    return total
+
+
+# =========================
+# Manifest
+# =========================
+def _read_csv(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _numbers(row, keys):
+    out = {}
+    for k in keys:
+        try:
+            out[k] = float(row[k])
+        except (KeyError, TypeError, ValueError):
+            pass
+    return out
+
+
+def read_manifest(models_dir: str, hours):
+    """
+    시간대별 {"family", "path", "metrics"} 구성
+    - family: best_model_by_hour.csv 의 BEST_MODEL
+    - path: HOUR_XX/model_{family}.joblib 이 있으면 그것, 없으면 hour_XX_amt_cnt.joblib
+    - metrics: 모델 종류별 파일이면 results_by_hour.csv 의 MAE/RMSE/R2,
+               hour_XX_amt_cnt.joblib 이면 metrics_summary.csv 의 MAE_AMT/MAE_CNT
+    """
+    best = {int(r["HOUR"]): r["BEST_MODEL"].strip()
+            for r in _read_csv(os.path.join(models_dir, "best_model_by_hour.csv"))}
+    by_family = {(int(r["HOUR"]), r["MODEL"].strip()): _numbers(r, ("MAE", "RMSE", "R2"))
+                 for r in _read_csv(os.path.join(models_dir, "results_by_hour.csv"))}
+    summary = {int(r["HOUR"]): r for r in _read_csv(os.path.join(models_dir, "metrics_summary.csv"))}
+
+    manifest = {}
+    for hour in hours:
+        family = best.get(hour)
+        per_family = os.path.join(models_dir, f"HOUR_{hour:02d}", f"model_{family}.joblib") if family else None
+        if per_family and os.path.exists(per_family):
+            path = per_family
+            metrics = by_family.get((hour, family), {})
+        else:
+            path = os.path.join(models_dir, f"hour_{hour:02d}_amt_cnt.joblib")
+            row = summary.get(hour, {})
+            metrics = _numbers(row, ("MAE_AMT", "MAE_CNT", "n_train", "n_test"))
+            family = family or row.get("model_type")
+        manifest[hour] = {"family": family, "path": path, "metrics": metrics}
+    return manifest
+
+
+def manifest_version(manifest) -> str:
+    """모델 파일 경로/크기/수정시각으로 만든 버전 id"""
+    h = hashlib.sha1()
+    for hour in sorted(manifest):
+        path = manifest[hour]["path"]
+        try:
+            st = os.stat(path)
+            h.update(f"{hour}|{path}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+        except OSError:
+            h.update(f"{hour}|{path}|missing".encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+# =========================
+# ModelSet (버전 하나)
+# =========================
+class ModelSet:
+    """한 버전의 시간대별 모델 묶음 (만들어진 뒤 manifest는 바뀌지 않음)"""
+
+    def __init__(self, models_dir: str, hours, mmap_mode: str = None, backend: str = "sklearn",
+                 retry_sec: float = 30.0):
+        """retry_sec: 로드에 실패한 시간대는 이 시간(초)이 지난 뒤 get() 때 다시 로드 (그 전에는 바로 None)"""
+        self.models_dir = models_dir
+        self.hours = list(hours)
+        self.mmap_mode = mmap_mode
+        self.backend = backend
+        self.retry_sec = retry_sec
+        self.manifest = read_manifest(models_dir, self.hours)
+        self.version = manifest_version(self.manifest)
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+
+        self._models = {}
+        self._errors = {}
+        self._failed_at = {}  # hour → 로드에 실패한 시각
+        self._load_info = {}
+        self._locks = {hour: threading.Lock() for hour in self.hours}
+
+    def _load(self, hour: int):
+        """
+        hour 모델을 한 번만 로드 (동시에 호출되면 먼저 온 쪽이 로드하고 나머지는 대기)
+        실패하면 retry_sec 동안은 다시 시도하지 않음 (파일을 고치면 그 뒤 요청에서 다시 로드)
+        """
+        with self._locks[hour]:
+            if hour in self._models:
+                return self._models[hour]
+            if hour in self._errors and time.monotonic() - self._failed_at[hour] < self.retry_sec:
+                return None
+
+            path = self.manifest[hour]["path"]
+            start = time.perf_counter()
+            try:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"모델 파일이 없습니다: {path}")
+                hm = self._load_compiled(hour, path) if self.backend == "compiled" else None
+                if hm is None:
+                    raw = joblib.load(path, mmap_mode=self.mmap_mode)
+                    hm = HourModel(hour, raw)
+                    if self.backend == "compiled":
+                        hm = self._compile(hm)
+            except Exception as e:
+                self._errors[hour] = str(e)
+                self._failed_at[hour] = time.monotonic()
+                print(f"❌ 모델 로드 실패 (hour {hour}, {self.retry_sec:.0f}초 뒤 다시 시도): {e}", flush=True)
+                return None
+
+            elapsed = time.perf_counter() - start
+            self._load_info[hour] = {
+                "family": self.manifest[hour]["family"],
+                "path": os.path.relpath(path, self.models_dir),
+                "metrics": self.manifest[hour]["metrics"],
+                "load_sec": round(elapsed, 4),
+                "approx_bytes": hm.nbytes if hm.backend == "compiled" else estimate_model_bytes(hm.model),
+                "file_bytes": os.path.getsize(path),
+                "columns": hm.columns,
+                "backend": hm.backend,
+            }
+            self._models[hour] = hm
+            self._errors.pop(hour, None)
+            self._failed_at.pop(hour, None)
+            print(f"✓ Loaded model for hour {hour} ({elapsed:.2f}s)", flush=True)
+            return hm
+
+    def _load_compiled(self, hour: int, path: str):
+        """미리 변환해 둔 *.compiled.npz (원본과 크기/수정 시각이 같을 때만), 없으면 None"""
+        from compiled_models import load_compiled
+        return load_compiled(hour, path)
+
+    def _compile(self, hm: HourModel):
+        """로드한 모델을 바로 변환, 못 하면 sklearn 모델 그대로"""
+        from compiled_models import CompileError, CompiledHourModel
+        try:
+            return CompiledHourModel.from_model(hm.hour, hm.model)
+        except CompileError as e:
+            print(f"ℹ️  hour {hm.hour}: 경량 추론 변환 안 함 ({e}), sklearn 사용", flush=True)
+            return hm
+
+    def load(self, mode: str, workers: int):
+        if mode == "lazy":
+            return self
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-load")
+        futures = [executor.submit(self._load, hour) for hour in self.hours]
+        if mode == "parallel":
+            for f in futures:
+                f.result()
+        executor.shutdown(wait=False)
+        return self
+
+    def get(self, hour: int):
+        """HourModel (없거나 로드 실패면 None)"""
+        if hour not in self._locks:
+            return None
+        hm = self._models.get(hour)
+        if hm is not None:
+            return hm
+        return self._load(hour)
+
+    def ready(self) -> bool:
+        return len(self._models) == len(self.hours)
+
+    @property
+    def loaded_hours(self):
+        return sorted(self._models)
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "models_dir": self.models_dir,
+            "backend": self.backend,
+            "created_at": self.created_at,
+            "loaded": self.loaded_hours,
+            "errors": {str(h): e for h, e in self._errors.items()},
+            "models": {str(h): info for h, info in sorted(self._load_info.items())},
+            "total_load_sec": round(sum(i["load_sec"] for i in self._load_info.values()), 4),
+            "total_approx_bytes": sum(i["approx_bytes"] for i in self._load_info.values()),
+        }
+
+
+# =========================
+# Registry
+# =========================
+class ModelRegistry:
+    def __init__(self, models_dir: str, hours=range(1, 11), mode: str = "background",
+                 mmap_mode: str = None, workers: int = 4, backend: str = "sklearn"):
+        if mode not in LOAD_MODES:
+            raise ValueError(f"알 수 없는 모델 로드 방식: {mode} (가능: {', '.join(LOAD_MODES)})")
+        if backend not in BACKENDS:
+            raise ValueError(f"알 수 없는 추론 방식: {backend} (가능: {', '.join(BACKENDS)})")
+        self.models_dir = models_dir
+        self.hours = list(hours)
+        self.mode = mode
+        # "r" 이면 joblib 파일 안의 큰 numpy 배열을 메모리 매핑 (압축 안 된 파일만 해당)
+        self.mmap_mode = mmap_mode or None
+        self.workers = workers
+        self.backend = backend
+
+        self._current = ModelSet(models_dir, self.hours, self.mmap_mode, backend)
+        self._previous = None
+        self._swap_lock = threading.Lock()
+        self._on_swap = []
+
+    def start(self):
+        """mode에 맞게 현재 세트 로드 시작"""
+        self._current.load(self.mode, self.workers)
+        return self
+
+    # =========================
+    # 조회
+    # =========================
+    def snapshot(self) -> ModelSet:
+        """현재 모델 세트 (요청 하나는 같은 세트로 끝까지 예측)"""
+        return self._current
+
+    def get(self, hour: int):
+        return self._current.get(hour)
+
+    def __contains__(self, hour):
+        return self.get(hour) is not None
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @property
+    def loaded_hours(self):
+        return self._current.loaded_hours
+
+    def ready(self) -> bool:
+        """모든 시간대 모델이 로드되었는지"""
+        return self._current.ready()
+
+    # =========================
+    # 교체 / 되돌리기
+    # =========================
+    def on_swap(self, callback):
+        """모델 세트가 바뀔 때 호출할 함수 등록 (예: 예측 캐시 비우기)"""
+        self._on_swap.append(callback)
+
+    def _swap(self, new_set: ModelSet):
+        self._previous, self._current = self._current, new_set
+        for cb in self._on_swap:
+            try:
+                cb(new_set)
+            except Exception as e:
+                print(f"⚠️  모델 교체 후처리 실패: {e}", flush=True)
+
+    def reload(self, models_dir: str = None):
+        """
+        manifest를 다시 읽어 새 세트를 전부 로드한 뒤 교체
+        로드 실패한 시간대가 있으면 교체하지 않고 RuntimeError
+        """
+        with self._swap_lock:
+            new_set = ModelSet(models_dir or self.models_dir, self.hours, self.mmap_mode, self.backend)
+            new_set.load("parallel", self.workers)
+            if not new_set.ready():
+                raise RuntimeError(f"새 모델 세트 로드 실패: {new_set.stats()['errors']}")
+            old_version = self._current.version
+            self._swap(new_set)
+            print(f"♻️  모델 교체: {old_version} → {new_set.version}", flush=True)
+            return new_set.version
+
+    def rollback(self):
+        """직전 세트로 즉시 되돌림 (다시 로드하지 않음)"""
+        with self._swap_lock:
+            if self._previous is None:
+                raise RuntimeError("되돌릴 이전 모델 세트가 없습니다")
+            old_version = self._current.version
+            self._swap(self._previous)
+            print(f"⏪ 모델 되돌림: {old_version} → {self._current.version}", flush=True)
+            return self._current.version
+
+    @property
+    def previous_version(self):
+        previous = self._previous
+        return previous.version if previous else None
+
+    def stats(self):
+        current = self._current.stats()
+        current.update({
+            "mode": self.mode,
+            "mmap_mode": self.mmap_mode,
+            "previous_version": self.previous_version,
+        })
+        return current
+
+
+# =========================
+# 워커 간 버전 맞추기 (prefork 서버)
+# =========================
+class SharedModelVersion:
+    """
+    지금 써야 하는 모델 세트(models_dir, version)를 파일 하나에 게시
+    - publish(): 교체/롤백한 프로세스가 호출 (임시 파일에 쓴 뒤 교체)
+    - sync(): 다른 프로세스가 요청마다 호출, 파일이 바뀌었을 때만 읽어서 직전 세트면 rollback, 아니면 reload
+    """
+
+    def __init__(self, path: str, retry_sec: float = 30.0):
+        self.path = path
+        self.retry_sec = retry_sec
+        self._seen = None          # 마지막으로 반영한 파일 (inode, mtime, size)
+        self._failed_at = None     # 맞추기에 실패한 시각 (retry_sec 동안 다시 시도하지 않음)
+        self._lock = threading.Lock()
+        self.syncs = 0
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def publish(self, models_dir: str, version: str):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"models_dir": os.path.abspath(models_dir), "version": version,
+                       "published_at": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid()}, f)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._seen = self._signature()
+
+    def sync(self, registry) -> bool:
+        """게시된 세트와 다르면 같은 세트로 교체 → 교체했으면 True"""
+        sig = self._signature()
+        if sig is None or sig == self._seen:
+            return False
+        with self._lock:
+            if sig == self._seen:
+                return False
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_sec:
+                return False
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    target = json.load(f)
+                if target["version"] == registry.version:
+                    changed = False
+                elif target["version"] == registry.previous_version:
+                    registry.rollback()
+                    changed = True
+                else:
+                    registry.reload(target["models_dir"])
+                    changed = True
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                print(f"⚠️  게시된 모델 세트로 맞추지 못했습니다: {e}", flush=True)
+                return False
+            self._seen = sig
+            self._failed_at = None
+            if changed:
+                self.syncs += 1
+                if registry.version != target["version"]:
+                    print(f"⚠️  게시된 버전 {target['version']} 대신 {registry.version} 로드 "
+                          f"(그 사이 모델 파일이 바뀜)", flush=True)
+            return changed
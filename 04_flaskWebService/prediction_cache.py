@@ -0,0 +1,141 @@
+"""
+예측 결과 LRU/TTL 캐시
+(모델 버전, 동, 요일, 시간대, 기온, 강수) 입력이 같으면 모델을 다시 돌리지 않음
+MODELS_DIR 아래 파일(HOUR_XX 하위 폴더 포함)이 바뀌면 자동으로 비움
+모델이 없거나 실패해서 통계 대체 예측을 쓴 시간대는 저장하지 않음 (모델이 로드되면 바로 모델 예측 사용)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def _quantize(value: float, step: float) -> float:
+    """step 단위로 반올림 (step <= 0 이면 그대로)"""
+    if step and step > 0:
+        return round(round(float(value) / step) * step, 6)
+    return float(value)
+
+
+class PredictionCache:
+    def __init__(self, models_dir: str, maxsize: int = 10000, ttl: float = 3600.0,
+                 temp_step: float = 0.0, rain_step: float = 0.0, check_interval: float = 5.0):
+        self.models_dir = models_dir
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.temp_step = temp_step
+        self.rain_step = rain_step
+        self.check_interval = check_interval
+
+        self._data = OrderedDict()  # key -> (저장 시각, (amt, cnt))
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._models_sig = self._models_signature()
+        self._last_check = time.monotonic()
+
+    # =========================
+    # 모델 파일 변경 감지
+    # =========================
+    def _models_signature(self):
+        """MODELS_DIR 아래 모든 파일(HOUR_XX/model_*.joblib 포함)의 상대 경로 + 수정시각 + 크기"""
+        sig = []
+        for root, dirs, files in os.walk(self.models_dir):
+            dirs.sort()
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                sig.append((os.path.relpath(path, self.models_dir), st.st_mtime_ns, st.st_size))
+        return tuple(sorted(sig))
+
+    def _check_models_changed(self):
+        """check_interval 마다 한 번 모델 파일을 확인하고, 바뀌었으면 캐시 비움"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        sig = self._models_signature()
+        if sig != self._models_sig:
+            self._models_sig = sig
+            self._data.clear()
+            self._invalidations += 1
+            print(f"♻️  모델 파일 변경 감지 → 예측 캐시 초기화", flush=True)
+
+    # =========================
+    # 조회 / 저장
+    # =========================
+    def quantize(self, temp: float, rain: float):
+        """캐시 키와 모델 입력에 쓰는 기온/강수"""
+        return _quantize(temp, self.temp_step), _quantize(rain or 0.0, self.rain_step)
+
+    def get_or_compute_day(self, dong: str, day: int, temp: float, rain: float, hours, compute,
+                           version=None, sources: dict = None):
+        """
+        시간대별 예측을 캐시에서 꺼내고, 없는 시간대만 compute(hours, temp, rain, sources)로 계산
+        compute는 {hour: (amt, cnt)}를 반환하고 sources에 시간대별 "model" / "fallback" 을 기록
+        version: 모델 세트 버전 (키에 포함 → 교체 전 모델의 예측을 다시 쓰지 않음)
+        sources: 넘기면 시간대별 출처를 채워 줌 (캐시 적중은 모델 예측만 있으므로 "model")
+        """
+        if sources is None:
+            sources = {}
+        q_temp, q_rain = self.quantize(temp, rain)
+        now = time.monotonic()
+        out, missing = {}, []
+
+        with self._lock:
+            self._check_models_changed()
+            for hour in hours:
+                key = (version, dong, int(day), int(hour), q_temp, q_rain)
+                entry = self._data.get(key)
+                if entry is not None and now - entry[0] < self.ttl:
+                    self._data.move_to_end(key)
+                    out[hour] = entry[1]
+                    sources[hour] = "model"
+                    self._hits += 1
+                else:
+                    if entry is not None:
+                        del self._data[key]
+                    missing.append(hour)
+                    self._misses += 1
+
+        if missing:
+            computed_sources = {}
+            computed = compute(missing, q_temp, q_rain, computed_sources)
+            with self._lock:
+                for hour, value in computed.items():
+                    if computed_sources.get(hour) != "model":
+                        continue
+                    key = (version, dong, int(day), int(hour), q_temp, q_rain)
+                    self._data[key] = (now, value)
+                    self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            out.update(computed)
+            sources.update(computed_sources)
+
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._invalidations += 1
+
+    def stats(self):
+        """hit/miss 카운터"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "temp_step": self.temp_step,
+                "rain_step": self.rain_step,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,246 @@
+"""
+예측 결과 사전 계산 테이블
+오늘 ~ N일 뒤의 (동 × 날짜 × 시간대) 예측을 날씨 예열이 끝날 때마다 한 번에 계산해서 SQLite(WAL)에 저장
+/predict 는 여기서 먼저 찾고, 없거나 오래됐으면 기존처럼 실시간 예측
+
+행마다 신선도 정보를 같이 저장
+- model_version: 계산에 쓴 모델 세트 버전 (현재 버전과 다르면 사용 안 함)
+- computed_at / expires_at: 계산 시각 / 만료 시각
+- weather_source, temp, rain: 계산에 쓴 날씨
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from batch_predict import iter_batch_predictions
+
+load_dotenv()
+
+# 오늘 + N일까지 계산
+MATERIALIZE_DAYS = int(os.getenv("MATERIALIZE_DAYS", "3"))
+# 계산한 예측을 쓸 수 있는 시간(초) - 단기예보 발표 간격(3시간)에 맞춤
+MATERIALIZE_TTL = float(os.getenv("MATERIALIZE_TTL", "10800"))
+
+
+class PredictionTable:
+    """materialized_predictions 테이블 (스레드/프로세스마다 커넥션 따로)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._stat_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS materialized_predictions (
+                gu             TEXT NOT NULL,
+                dong           TEXT NOT NULL,
+                ymd            TEXT NOT NULL,
+                hour           INTEGER NOT NULL,
+                amt            REAL NOT NULL,
+                cnt            REAL NOT NULL,
+                temp           REAL NOT NULL,
+                rain           REAL NOT NULL,
+                weather_source TEXT NOT NULL,
+                model_version  TEXT NOT NULL,
+                computed_at    TEXT NOT NULL,
+                expires_at     REAL NOT NULL,
+                PRIMARY KEY (gu, dong, ymd, hour)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # fork 이후에는 부모 프로세스의 커넥션을 쓰지 않고 새로 연결
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def write(self, records, model_version: str, ttl: float = MATERIALIZE_TTL):
+        """batch_predict 결과 dict 들을 UPSERT → 저장한 행 수"""
+        computed_at = datetime.now().isoformat(timespec="seconds")
+        expires_at = time.time() + ttl
+        rows = [
+            (r["gu"], r["dong"], r["date"].replace("-", ""), r["hour"], r["pred_amt"], r["pred_cnt"],
+             r["temp"], r["rain"], r["weather_source"], model_version, computed_at, expires_at)
+            for r in records
+        ]
+        with self._conn() as conn:
+            conn.executemany("""
+                INSERT INTO materialized_predictions
+                (gu, dong, ymd, hour, amt, cnt, temp, rain, weather_source, model_version, computed_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(gu, dong, ymd, hour) DO UPDATE SET
+                    amt = excluded.amt, cnt = excluded.cnt, temp = excluded.temp, rain = excluded.rain,
+                    weather_source = excluded.weather_source, model_version = excluded.model_version,
+                    computed_at = excluded.computed_at, expires_at = excluded.expires_at
+            """, rows)
+        return len(rows)
+
+    def lookup(self, gu: str, dong: str, ymd8: str, model_version: str, hours=range(1, 11)):
+        """
+        모든 시간대가 있고 신선하면 {"preds": {hour: (amt, cnt)}, "temp", "rain", "weather_source", "computed_at"}
+        아니면 None
+        """
+        hours = list(hours)
+        try:
+            rows = self._conn().execute("""
+                SELECT hour, amt, cnt, temp, rain, weather_source, model_version, computed_at, expires_at
+                FROM materialized_predictions
+                WHERE gu = ? AND dong = ? AND ymd = ?
+            """, (gu, dong, ymd8)).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️  사전 계산 예측 조회 실패: {e}", flush=True)
+            rows = []
+
+        by_hour = {r[0]: r for r in rows}
+        now = time.time()
+        if not all(h in by_hour for h in hours):
+            with self._stat_lock:
+                self.misses += 1
+            return None
+        picked = [by_hour[h] for h in hours]
+        if any(r[6] != model_version or r[8] <= now for r in picked):
+            with self._stat_lock:
+                self.stale += 1
+            return None
+
+        with self._stat_lock:
+            self.hits += 1
+        first = picked[0]
+        return {
+            "preds": {r[0]: (float(r[1]), float(r[2])) for r in picked},
+            "temp": first[3],
+            "rain": first[4],
+            "weather_source": first[5],
+            "computed_at": min(r[7] for r in picked),
+        }
+
+    def purge(self, before_ymd: str):
+        """지난 날짜 삭제"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM materialized_predictions WHERE ymd < ?", (before_ymd,))
+
+    def stats(self):
+        try:
+            n, oldest, newest = self._conn().execute(
+                "SELECT COUNT(*), MIN(computed_at), MAX(computed_at) FROM materialized_predictions"
+            ).fetchone()
+        except sqlite3.Error:
+            n, oldest, newest = 0, None, None
+        with self._stat_lock:
+            total = self.hits + self.misses + self.stale
+            return {
+                "rows": n,
+                "oldest_computed_at": oldest,
+                "newest_computed_at": newest,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class PredictionMaterializer:
+    """LOC 전체 × 오늘~N일 × 10개 시간대 예측을 계산해서 PredictionTable에 저장"""
+
+    def __init__(self, table: PredictionTable, loc: dict, resolve_weather, predictor, model_version,
+                 ready=None, days: int = MATERIALIZE_DAYS):
+        """
+        resolve_weather(nx, ny, ymd8) → (temp, rain, source, error)
+        model_version: 현재 모델 세트 버전을 돌려주는 함수
+        ready: 모델이 모두 로드됐는지 돌려주는 함수 (아니면 계산하지 않음)
+        """
+        self.table = table
+        self.loc = loc
+        self.resolve_weather = resolve_weather
+        self.predictor = predictor
+        self.model_version = model_version
+        self.ready = ready
+        self.days = days
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run = None
+        self.last_duration = 0.0
+        self.last_rows = 0
+        self.last_skipped = 0
+        self.last_error = None
+
+    def run(self, now: datetime = None):
+        """한 번 계산 (이미 실행 중이면 건너뜀) → 저장한 행 수"""
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._run(now or datetime.now())
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ 예측 사전 계산 실패: {e}", flush=True)
+            return 0
+        finally:
+            self._lock.release()
+
+    def _run(self, now):
+        if self.ready is not None and not self.ready():
+            print("⏳ 모델 로드가 끝나지 않아 예측 사전 계산을 건너뜁니다", flush=True)
+            return 0
+        start = time.perf_counter()
+        version = self.model_version()
+        targets = [(gu, dong) for gu in sorted(self.loc) for dong in sorted(self.loc[gu])]
+        dates = [(now + timedelta(days=d)).strftime("%Y%m%d") for d in range(self.days + 1)]
+
+        # 날씨 조회가 실패해서 대체값이 쓰인 (격자, 날짜)는 저장하지 않음 → 실시간 경로가 다시 시도
+        degraded = set()
+
+        def _weather(nx, ny, ymd8):
+            weather = self.resolve_weather(nx, ny, ymd8)
+            if weather[3]:
+                degraded.add((nx, ny, ymd8))
+            return weather
+
+        def _usable(rec):
+            info = self.loc[rec["gu"]][rec["dong"]]
+            return (int(info["nx"]), int(info["ny"]), rec["date"].replace("-", "")) not in degraded
+
+        records = list(iter_batch_predictions(targets, dates, range(1, 11), self.loc, _weather, self.predictor))
+        # 한 시간대라도 대체 예측(fallback)이면 그 (동, 날짜)는 통째로 저장하지 않음 → 모델 예측만 테이블에 남김
+        fallback = {(r["gu"], r["dong"], r["date"]) for r in records if r["pred_source"] != "model"}
+        usable = [r for r in records if _usable(r) and (r["gu"], r["dong"], r["date"]) not in fallback]
+        written = self.table.write(usable, version)
+        self.table.purge(now.strftime("%Y%m%d"))
+
+        self.runs += 1
+        self.last_run = now.isoformat(timespec="seconds")
+        self.last_duration = time.perf_counter() - start
+        self.last_rows = written
+        self.last_skipped = len(records) - len(usable)
+        self.last_error = None
+        print(f"🧮 예측 사전 계산: {written:,}행 (날씨 실패·대체 예측으로 제외 {self.last_skipped:,}), "
+              f"{self.last_duration:.1f}초, 모델 {version}", flush=True)
+        return written
+
+    def run_async(self):
+        threading.Thread(target=self.run, name="materialize", daemon=True).start()
+
+    def stats(self):
+        return {
+            "days": self.days,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_duration_sec": round(self.last_duration, 3),
+            "last_rows": self.last_rows,
+            "last_skipped": self.last_skipped,
+            "last_error": self.last_error,
+            "table": self.table.stats(),
+        }
@@ -0,0 +1,358 @@
+"""
+경기도 카드 소비 데이터(월별 원본) → 동 × 날짜 × 시간대 매출 (월별 파티션 Parquet)
+01_Analysis&Design/허정_cvs전처리.ipynb 의 전처리를 파일 단위 스트리밍으로
+
+노트북: 월별 CSV 전체 read_csv → concat → 업종 필터 → 성별/연령 합산 → 행정동코드 → 동 이름
+여기서는
+- 월 파일마다 청크 단위로 읽고, 필요한 컬럼만 (usecols), 업종 필터를 청크에서 바로 적용
+- 청크마다 (날짜, 행정동코드, 시간대, 요일) 합계 → 부분 합계를 모아 주기적으로 다시 합침
+  → 메모리는 원본 크기와 상관없이 한 달치 집계 결과(동 × 일 × 시간대) 정도
+- 인코딩 자동 확인 (utf-8-sig / cp949, 2024년 12월 파일처럼 달마다 다름)
+- 영문 컬럼(tbsh_gyeonggi_day_*.csv) / 한글 컬럼(카드소비데이터.csv) 둘 다 읽음
+- 월 파일마다 프로세스 하나 → 1년치를 병렬 처리, 결과는 sales_store.ParquetSalesStore 와 같은 배치
+    out/ym=YYYYMM/part-<원본>.parquet  (TA_YMD, DONG, HOUR, DAY, AMT, CNT, UNIT, TEMP, RAIN)
+- 이미 처리한 원본(크기/수정 시각 같음)은 건너뜀 (_manifest.json)
+
+사용법:
+    python preprocess_card_data.py "C:/data/경기도_카드_소비_데이터/suwan/tbsh_gyeonggi_day_2024*_수원시.csv"
+    python preprocess_card_data.py "raw/*.csv" --category 커피/음료 --out data/coffee_parquet
+    python preprocess_card_data.py "raw/*.csv" --weather data/weather_by_hour.csv --workers 4
+
+결과 사용:
+    SALES_STORE_BACKEND=parquet SALES_STORE_PATH=data/sales_parquet python app.py
+    SALES_STORE_BACKEND=parquet SALES_STORE_PATH=data/sales_parquet python train_models.py --source store
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from import_csv_to_oracle import detect_encoding
+from sales_store import COLUMNS, DATA_DIR, parquet_schema, pa, pq
+
+try:
+    import resource  # 최대 RSS 기록용 (윈도우에는 없음)
+except ImportError:
+    resource = None
+
+load_dotenv()
+
+PROJECT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_OUT = os.path.join(DATA_DIR, "sales_parquet")
+# 행정동코드 → 동 이름 (앞에서부터 읽을 수 있는 것 사용, xlsx 는 openpyxl 필요)
+DEFAULT_DONG_CODES = [
+    os.path.join(PROJECT_DATA_DIR, "행정동코드.xlsx"),
+    os.path.join(PROJECT_DATA_DIR, "행정동코드백업.csv"),
+]
+MANIFEST = "_manifest.json"
+
+# 원본 컬럼: 영문(tbsh_gyeonggi_day_*) / 한글(카드소비데이터.csv)
+RAW_COLUMNS = {
+    "ta_ymd": "기준년월일",
+    "admi_cty_no": "행정동코드",
+    "card_tpbuz_nm_1": "카드사_업종대분류명",
+    "card_tpbuz_nm_2": "카드사_업종중분류명",
+    "hour": "시간대",
+    "day": "요일",
+    "amt": "매출금액",
+    "cnt": "매출건수",
+}
+KEYS = ["ta_ymd", "admi_cty_no", "hour", "day"]
+# 부분 합계가 이 행 수를 넘으면 한 번 더 합침
+COMPACT_ROWS = 500_000
+
+
+# =========================
+# 참조 데이터
+# =========================
+def load_dong_codes(paths, city="수원시"):
+    """행정동코드 파일 → {8자리 행정동코드: 읍면동명} (시군구명에 city 가 들어간 것만)"""
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            if path.lower().endswith((".xlsx", ".xls")):
+                codes = pd.read_excel(path)
+            else:
+                codes = pd.read_csv(path, encoding=detect_encoding(path))
+        except ImportError as e:
+            print(f"⚠️  {os.path.basename(path)} 읽기 실패 ({e}), 다음 파일 사용")
+            continue
+        codes = codes.dropna(subset=["행정동코드", "읍면동명"])
+        if city:
+            codes = codes[codes["시군구명"].astype(str).str.contains(city, na=False)]
+        code = pd.to_numeric(codes["행정동코드"], errors="coerce").astype("Int64")
+        # 행정동코드.xlsx 는 10자리 (카드 데이터는 8자리)
+        code = code.where(code < 10**9, code // 100)
+        mapping = dict(zip(code.astype("int64"), codes["읍면동명"].astype(str).str.strip()))
+        print(f"✅ 행정동코드: {os.path.basename(path)} ({len(mapping)}개 동)")
+        return mapping
+    raise SystemExit(f"행정동코드 파일을 찾을 수 없습니다: {paths}")
+
+
+def load_weather(path):
+    """(선택) 날짜 × 시간대 기온/강수 CSV(TA_YMD, HOUR, TEMP, RAIN) → 모든 동에 같은 값으로 붙임"""
+    if not path:
+        return None
+    weather = pd.read_csv(path, encoding=detect_encoding(path), dtype={"TA_YMD": str})
+    weather["TA_YMD"] = weather["TA_YMD"].str.replace("-", "", regex=False).str.strip()
+    weather["HOUR"] = pd.to_numeric(weather["HOUR"], errors="coerce").astype("int64")
+    return weather.groupby(["TA_YMD", "HOUR"], as_index=False)[["TEMP", "RAIN"]].mean()
+
+
+# =========================
+# 월 파일 하나
+# =========================
+def resolve_columns(header):
+    """원본 헤더 → {표준 이름: 실제 컬럼 이름}"""
+    header = [str(c).strip() for c in header]
+    resolved = {}
+    for name, korean in RAW_COLUMNS.items():
+        if name in header:
+            resolved[name] = name
+        elif korean in header:
+            resolved[name] = korean
+    missing = [n for n in KEYS + ["amt", "cnt"] if n not in resolved]
+    if missing:
+        raise ValueError(f"필요한 컬럼이 없습니다: {missing} (헤더: {header})")
+    return resolved
+
+
+def _compact(partials):
+    return [pd.concat(partials, ignore_index=True).groupby(KEYS, as_index=False, sort=False)[["amt", "cnt"]].sum()]
+
+
+def aggregate_file(path, category, level, chunksize, encoding=None):
+    """
+    월 파일 → (날짜, 행정동코드, 시간대, 요일) 별 매출 합계 DataFrame
+    성별/연령별 행이 여기서 합쳐짐 (노트북의 groupby(...).sum() 과 같음)
+    """
+    encoding = encoding or detect_encoding(path)
+    cols = resolve_columns(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+    cat_col = f"card_tpbuz_nm_{level}"
+    if category and cat_col not in cols:
+        raise ValueError(f"업종 컬럼이 없습니다: {cat_col}")
+
+    wanted = KEYS + ["amt", "cnt"] + ([cat_col] if category else [])
+    rename = {cols[n]: n for n in wanted}
+    dtype = {cols["ta_ymd"]: str}
+    if category:
+        dtype[cols[cat_col]] = "category"
+    reader = pd.read_csv(path, encoding=encoding, usecols=list(rename), dtype=dtype,
+                         chunksize=chunksize, skipinitialspace=True)
+
+    partials, pending = [], 0
+    rows_in = rows_kept = 0
+    for chunk in reader:
+        rows_in += len(chunk)
+        chunk = chunk.rename(columns=rename)
+        if category:
+            chunk = chunk[chunk[cat_col] == category]
+        if chunk.empty:
+            continue
+        rows_kept += len(chunk)
+        chunk = chunk[KEYS + ["amt", "cnt"]].assign(
+            ta_ymd=chunk["ta_ymd"].str.replace("-", "", regex=False).str.strip(),
+            admi_cty_no=pd.to_numeric(chunk["admi_cty_no"], errors="coerce"),
+            hour=pd.to_numeric(chunk["hour"], errors="coerce"),
+            day=pd.to_numeric(chunk["day"], errors="coerce"),
+            amt=pd.to_numeric(chunk["amt"], errors="coerce").fillna(0),
+            cnt=pd.to_numeric(chunk["cnt"], errors="coerce").fillna(0),
+        ).dropna(subset=KEYS)
+        part = chunk.groupby(KEYS, as_index=False, sort=False)[["amt", "cnt"]].sum()
+        partials.append(part)
+        pending += len(part)
+        if pending > COMPACT_ROWS:
+            partials = _compact(partials)
+            pending = len(partials[0])
+
+    if not partials:
+        return pd.DataFrame(columns=KEYS + ["amt", "cnt"]), encoding, rows_in, rows_kept
+    return _compact(partials)[0], encoding, rows_in, rows_kept
+
+
+def to_sales_frame(agg, dong_codes, weather=None):
+    """집계 결과 → sales_store COLUMNS (동 이름, 객단가, 날씨)"""
+    dong = agg["admi_cty_no"].astype("int64").map(dong_codes)
+    frame = pd.DataFrame({
+        "TA_YMD": agg["ta_ymd"].values,
+        "DONG": dong.values,
+        "HOUR": agg["hour"].astype("int64").values,
+        "DAY": agg["day"].astype("int64").values,
+        "AMT": agg["amt"].astype("float64").values,
+        "CNT": agg["cnt"].astype("int64").values,
+    })
+    unknown = int(frame["DONG"].isna().sum())
+    # 매출 0 인 행은 노트북에서도 지움 (객단가 계산 불가)
+    frame = frame[frame["DONG"].notna() & (frame["AMT"] > 0) & (frame["CNT"] > 0)]
+    frame = frame.assign(UNIT=(frame["AMT"] / frame["CNT"]).round().astype("int64").astype(str))
+
+    if weather is not None:
+        frame = frame.merge(weather, on=["TA_YMD", "HOUR"], how="left")
+    else:
+        frame = frame.assign(TEMP=np.nan, RAIN=np.nan)
+    frame = frame.sort_values(["TA_YMD", "DONG", "HOUR"]).reset_index(drop=True)
+    return frame[COLUMNS], unknown
+
+
+def source_key(path):
+    """파티션 파일 이름에 쓸 원본 구분자 (파일 이름의 YYYYMM, 없으면 파일 이름)"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    m = re.search(r"(20\d{4})", stem)
+    return m.group(1) if m else re.sub(r"[^0-9A-Za-z가-힣_-]", "_", stem)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def process_file(path, out_root, dong_codes, weather, category, level, chunksize):
+    """
+    프로세스 풀 작업 하나: 월 파일 → 월별 파티션 파일
+    임시 파일에 쓴 뒤 교체하므로 읽는 쪽(앱)은 완성된 파일만 봄
+    """
+    start = time.perf_counter()
+    agg, encoding, rows_in, rows_kept = aggregate_file(path, category, level, chunksize)
+    frame, unknown = to_sales_frame(agg, dong_codes, weather)
+
+    key = source_key(path)
+    schema = parquet_schema()
+    partitions = []
+    for ym, part in frame.groupby(frame["TA_YMD"].str[:6]):
+        part_dir = os.path.join(out_root, f"ym={ym}")
+        os.makedirs(part_dir, exist_ok=True)
+        dst = os.path.join(part_dir, f"part-{key}.parquet")
+        tmp = dst + ".tmp"
+        pq.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False), tmp)
+        os.replace(tmp, dst)
+        partitions.append(os.path.relpath(dst, out_root))
+
+    return {
+        "source": os.path.basename(path),
+        "encoding": encoding,
+        "rows_in": rows_in,
+        "rows_kept": rows_kept,
+        "rows_out": len(frame),
+        "unknown_dong_rows": unknown,
+        "partitions": partitions,
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# =========================
+# 실행
+# =========================
+def _signature(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def _load_manifest(out_root):
+    path = os.path.join(out_root, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(out_root, manifest):
+    path = os.path.join(out_root, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _up_to_date(entry, path, out_root, options):
+    return (
+        entry is not None
+        and entry.get("signature") == _signature(path)
+        and entry.get("options") == options
+        and all(os.path.exists(os.path.join(out_root, p)) for p in entry.get("partitions", []))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="카드 소비 데이터 월별 원본 → 동 × 시간대 매출 Parquet")
+    parser.add_argument("inputs", nargs="+", help="원본 CSV 경로 또는 glob (예: \"raw/tbsh_gyeonggi_day_2024*_수원시.csv\")")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="출력 폴더 (기본 data/sales_parquet)")
+    parser.add_argument("--category", default="한식", help="업종 이름 (빈 문자열이면 전체)")
+    parser.add_argument("--level", type=int, choices=[1, 2], default=2, help="업종 분류 단계 (1: 대분류, 2: 중분류)")
+    parser.add_argument("--city", default="수원시", help="행정동코드에서 고를 시군구 이름")
+    parser.add_argument("--dong-codes", default=None, help="행정동코드 파일 (xlsx/csv, 기본 ../data/행정동코드.xlsx)")
+    parser.add_argument("--weather", default=None, help="(선택) TA_YMD, HOUR, TEMP, RAIN CSV")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="동시에 처리할 월 파일 수")
+    parser.add_argument("--force", action="store_true", help="이미 처리한 원본도 다시 처리")
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.inputs for p in (glob.glob(pattern) or [pattern])})
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise SystemExit(f"원본 파일이 없습니다: {missing}")
+    if pa is None:
+        raise SystemExit("pyarrow가 필요합니다 (pip install pyarrow)")
+
+    out_root = os.path.abspath(args.out)
+    os.makedirs(out_root, exist_ok=True)
+    dong_codes = load_dong_codes([args.dong_codes] if args.dong_codes else DEFAULT_DONG_CODES, args.city)
+    weather = load_weather(args.weather)
+    options = {"category": args.category, "level": args.level, "city": args.city,
+               "weather": os.path.basename(args.weather) if args.weather else None}
+
+    manifest = _load_manifest(out_root)
+    todo = [p for p in paths if args.force or not _up_to_date(manifest.get(os.path.basename(p)), p, out_root, options)]
+    print(f"\n{'='*60}")
+    print(f"🧾 카드 소비 데이터 전처리: 원본 {len(paths)}개 (처리 {len(todo)}개, 건너뜀 {len(paths) - len(todo)}개)")
+    print(f"   업종: {args.category or '전체'} (분류 {args.level}단계), 프로세스 {args.workers}개 → {out_root}")
+    print(f"{'='*60}")
+
+    start = time.perf_counter()
+    failed = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(process_file, p, out_root, dong_codes, weather, args.category, args.level, args.chunksize): p
+            for p in todo
+        }
+        for fut in as_completed(futures):
+            path = futures[fut]
+            name = os.path.basename(path)
+            try:
+                result = fut.result()
+            except Exception as e:
+                failed.append(name)
+                print(f"❌ {name}: {e}")
+                continue
+            # 같은 원본이 예전에 다른 달 파티션을 만들었으면 지움
+            for old in manifest.get(name, {}).get("partitions", []):
+                if old not in result["partitions"] and os.path.exists(os.path.join(out_root, old)):
+                    os.remove(os.path.join(out_root, old))
+            manifest[name] = {**result, "signature": _signature(path), "options": options}
+            _save_manifest(out_root, manifest)
+            rss = f", 최대 RSS {result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] else ""
+            print(f"  ✓ {name} [{result['encoding']}] {result['rows_in']:,}행 → {result['rows_kept']:,}행 "
+                  f"→ {result['rows_out']:,}행 ({result['seconds']:.1f}s{rss})")
+            if result["unknown_dong_rows"]:
+                print(f"    ⚠️  행정동코드에 없는 동: {result['unknown_dong_rows']:,}행 제외")
+
+    total_rows = sum(e.get("rows_out", 0) for e in manifest.values())
+    print(f"\n✅ 완료: {len(todo) - len(failed)}개 처리, 실패 {len(failed)}개, "
+          f"전체 {total_rows:,}행 ({time.perf_counter() - start:.1f}s)")
+    print(f"{'='*60}\n")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
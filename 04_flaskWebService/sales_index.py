@@ -0,0 +1,294 @@
+"""
+실제 매출 데이터 메모리 색인
+(날짜 순번, 동 id, 시간) 3차원 numpy 배열로 전체 기간을 메모리에 올려두고
+/predict 의 실제 데이터 조회를 DB 없이 배열 인덱싱으로 처리
+
+- 시작 시 스냅샷 파일(npz)이 있으면 그것을, 없으면 원본 저장소 전체를 읽어 만든 뒤 스냅샷으로 저장
+- 색인 범위 밖(새로 들어온 날짜, 모르는 동)은 원본 저장소로 넘김 (read-through)
+- refresh(): 원본 저장소에서 다시 만들어 참조 하나만 교체
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from sales_store import SalesStore
+
+# 원본 저장소에서 주기적으로 다시 만들기(초), 0이면 하지 않음
+REFRESH_SEC = float(os.getenv("SALES_MEMORY_REFRESH_SEC", "0"))
+
+N_HOURS = 10
+# 1970-01-01 의 date.toordinal()
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _ordinal(ymd8: str):
+    try:
+        return date(int(ymd8[:4]), int(ymd8[4:6]), int(ymd8[6:8])).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+class SalesIndex:
+    """
+    만들어진 뒤에는 바뀌지 않는 배열 묶음
+    - amt(float64), cnt/temp/rain(float32): [날짜, 동, 시간-1], 값이 없으면 NaN
+    - present(bool): 해당 시간대 행이 있는지
+    """
+    ARRAYS = ("amt", "cnt", "temp", "rain", "present")
+
+    def __init__(self, start_ordinal: int, dongs, amt, cnt, temp, rain, present,
+                 source: str = "", built_at: str = None):
+        self.start_ordinal = int(start_ordinal)
+        self.dongs = list(dongs)
+        self.dong_ids = {d: i for i, d in enumerate(self.dongs)}
+        self.amt, self.cnt, self.temp, self.rain, self.present = amt, cnt, temp, rain, present
+        self.source = source
+        self.built_at = built_at or datetime.now().isoformat(timespec="seconds")
+
+    @property
+    def n_days(self):
+        return self.present.shape[0]
+
+    @property
+    def end_ordinal(self):
+        return self.start_ordinal + self.n_days - 1
+
+    @property
+    def rows(self):
+        return int(self.present.sum())
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    # =========================
+    # 만들기 / 저장
+    # =========================
+    @classmethod
+    def from_frames(cls, frames, source: str = ""):
+        """DataFrame(TA_YMD, DONG, HOUR, AMT, CNT, TEMP, RAIN) 청크들 → SalesIndex"""
+        cols = ["TA_YMD", "DONG", "HOUR", "AMT", "CNT", "TEMP", "RAIN"]
+        parts = [f[cols] for f in frames]
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=cols)
+
+        days = pd.to_datetime(df["TA_YMD"].astype(str), format="%Y%m%d", errors="coerce")
+        hour = pd.to_numeric(df["HOUR"], errors="coerce")
+        ok = days.notna() & df["DONG"].notna() & hour.between(1, N_HOURS)
+        df, days, hour = df[ok], days[ok], hour[ok].astype(np.int64)
+
+        ordinals = days.values.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+        dong_codes, dongs = pd.factorize(df["DONG"].astype(str), sort=True)
+        start = int(ordinals.min()) if len(df) else date.today().toordinal()
+        n_days = int(ordinals.max()) - start + 1 if len(df) else 0
+
+        d_idx = ordinals - start
+        h_idx = hour.values - 1
+        # 같은 키가 여러 번 있으면 DB 조회(setdefault)처럼 처음 행 사용 → 뒤에서부터 채움
+        d_idx, dong_codes, h_idx = d_idx[::-1], dong_codes[::-1], h_idx[::-1]
+
+        shape = (n_days, len(dongs), N_HOURS)
+        arrays = {}
+        for name, dtype in (("amt", np.float64), ("cnt", np.float32), ("temp", np.float32), ("rain", np.float32)):
+            arr = np.full(shape, np.nan, dtype=dtype)
+            arr[d_idx, dong_codes, h_idx] = pd.to_numeric(df[name.upper()], errors="coerce").values[::-1]
+            arrays[name] = arr
+        present = np.zeros(shape, dtype=bool)
+        present[d_idx, dong_codes, h_idx] = True
+        return cls(start, list(dongs), present=present, source=source, **arrays)
+
+    def save(self, path: str):
+        """
+        npz 스냅샷 (임시 파일에 쓴 뒤 교체)
+        임시 파일 이름은 호출마다 달라서 여러 워커가 동시에 저장해도 서로의 파일을 덮어쓰지 않음
+        """
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    start_ordinal=np.int64(self.start_ordinal),
+                    dongs=np.array(self.dongs, dtype=str),
+                    source=np.array(self.source),
+                    built_at=np.array(self.built_at),
+                    **{name: getattr(self, name) for name in self.ARRAYS},
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                int(z["start_ordinal"]), z["dongs"].tolist(),
+                *(z[name] for name in cls.ARRAYS),
+                source=str(z["source"]), built_at=str(z["built_at"]),
+            )
+
+    # =========================
+    # 조회
+    # =========================
+    def lookup(self, ymd8: str, dong: str):
+        """
+        [(HOUR, AMT, CNT, TEMP, RAIN), ...]
+        색인 범위 밖이면 None (원본 저장소에서 조회해야 함)
+        """
+        d = _ordinal(ymd8)
+        di = self.dong_ids.get(dong)
+        if d is None or di is None or not (self.start_ordinal <= d <= self.end_ordinal):
+            return None
+        d -= self.start_ordinal
+        hours = np.flatnonzero(self.present[d, di])
+        return [
+            (int(h) + 1, self.amt[d, di, h], self.cnt[d, di, h], self.temp[d, di, h], self.rain[d, di, h])
+            for h in hours
+        ]
+
+    def stats(self):
+        return {
+            "rows": self.rows,
+            "days": self.n_days,
+            "dongs": len(self.dongs),
+            "from": date.fromordinal(self.start_ordinal).strftime("%Y%m%d") if self.n_days else None,
+            "to": date.fromordinal(self.end_ordinal).strftime("%Y%m%d") if self.n_days else None,
+            "nbytes": self.nbytes,
+            "source": self.source,
+            "built_at": self.built_at,
+        }
+
+
+class MemorySalesStore(SalesStore):
+    """원본 저장소(backing) 앞에 두는 메모리 색인"""
+
+    def __init__(self, backing: SalesStore, snapshot_path: str = None, refresh_sec: float = REFRESH_SEC,
+                 index: SalesIndex = None):
+        """index: 이미 만들어진 색인 (prefork 서버에서 master 가 load_index 로 올린 것을 워커들이 같이 씀)"""
+        super().__init__()
+        self.backing = backing
+        self.label = backing.label
+        self.snapshot_path = snapshot_path
+        self.refresh_sec = refresh_sec
+        self.shared = index is not None
+        self._index = index
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.memory_hits = 0
+        self.fallthrough = 0
+        self.last_build_sec = None
+        self.last_error = None
+
+    # =========================
+    # 로드 / 새로 만들기
+    # =========================
+    def _load_initial(self):
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                start = time.perf_counter()
+                self._index = SalesIndex.load(self.snapshot_path)
+                self.last_build_sec = time.perf_counter() - start
+                print(f"✅ 매출 색인 스냅샷 로드: {self._index.rows:,}행, "
+                      f"{self._index.nbytes / 1e6:.1f}MB ({self.last_build_sec:.2f}s)", flush=True)
+                return
+            except Exception as e:
+                print(f"⚠️  매출 색인 스냅샷을 읽을 수 없습니다: {e}", flush=True)
+        self.refresh()
+
+    def load_index(self) -> SalesIndex:
+        """지금 바로 색인을 올림 (스냅샷 → 없으면 원본 저장소 전체) → 색인, 실패하면 예외"""
+        self._load_initial()
+        return self._index
+
+    def refresh(self):
+        """원본 저장소 전체를 다시 읽어 색인 교체 (+ 스냅샷 저장) → 새 색인 통계"""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            try:
+                index = SalesIndex.from_frames(self.backing.scan(), source=self.backing.describe())
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ 매출 색인 생성 실패: {e}", flush=True)
+                raise
+            self._index = index
+            self.last_build_sec = time.perf_counter() - start
+            self.last_error = None
+            print(f"✅ 매출 색인 생성: {index.rows:,}행, {index.nbytes / 1e6:.1f}MB "
+                  f"({self.last_build_sec:.2f}s)", flush=True)
+            if self.snapshot_path:
+                try:
+                    index.save(self.snapshot_path)
+                except OSError as e:
+                    print(f"⚠️  매출 색인 스냅샷 저장 실패: {e}", flush=True)
+            return index.stats()
+
+    def _loop(self):
+        try:
+            self._load_initial()
+        except Exception:
+            pass
+        while self.refresh_sec > 0 and not self._stop.wait(self.refresh_sec):
+            try:
+                self.refresh()
+            except Exception:
+                pass
+
+    def start(self):
+        """
+        시작을 막지 않도록 백그라운드로 로드 (그 전까지는 원본 저장소에서 조회)
+        master 의 색인을 같이 쓰는 워커는 로드도, 주기적 재생성도 하지 않음 (워커마다 전체를 다시 읽지 않게)
+        """
+        if self.shared:
+            return self
+        threading.Thread(target=self._loop, name="sales-index", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # =========================
+    # 조회
+    # =========================
+    def _fetch_day(self, ymd8, dong):
+        index = self._index
+        rows = index.lookup(ymd8, dong) if index is not None else None
+        if rows is not None:
+            with self._stat_lock:
+                self.memory_hits += 1
+            return rows
+        with self._stat_lock:
+            self.fallthrough += 1
+        return self.backing._fetch_day(ymd8, dong)
+
+    def scan(self, chunksize=100_000):
+        return self.backing.scan(chunksize)
+
+    def ping(self):
+        return self._index is not None or self.backing.ping()
+
+    def describe(self):
+        return f"memory({self.backing.describe()})"
+
+    def stats(self):
+        stats = super().stats()
+        index = self._index
+        with self._stat_lock:
+            stats.update({
+                "memory_hits": self.memory_hits,
+                "fallthrough": self.fallthrough,
+            })
+        stats.update({
+            "index": index.stats() if index is not None else None,
+            "snapshot": self.snapshot_path,
+            "last_build_sec": self.last_build_sec,
+            "last_error": self.last_error,
+            "refresh_sec": self.refresh_sec,
+            "backing": self.backing.stats(),
+        })
+        return stats
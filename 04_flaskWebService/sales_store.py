@@ -0,0 +1,550 @@
+"""
+실제 매출 데이터 저장소
+/predict 는 get_day(날짜, 동) 하나만 사용하므로 백엔드를 바꿔 끼울 수 있음
+- OracleSalesStore: 기존 Oracle SALES_DATA (커넥션 풀 경유)
+- SqliteSalesStore: 앱 서버마다 두는 읽기 전용 SQLite 사본, (TA_YMD, DONG, HOUR) 클러스터드 키 + mmap
+- ParquetSalesStore: 월별 파티션 Parquet, memory_map 으로 읽고 파티션 단위 LRU 캐시 (pyarrow 필요)
+
+사본 만들기:
+    python sales_store.py export --backend sqlite --source csv --csv "data/수원시 한식 동별 데이터백업.csv"
+    python sales_store.py export --backend parquet --source oracle
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 백엔드를 쓸 때만 필요
+    pa = None
+    pq = None
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# SQLite 읽기에 쓸 메모리 매핑 크기(바이트), 0이면 사용 안 함
+SQLITE_MMAP_BYTES = int(os.getenv("SALES_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+# Parquet 파티션(월)을 메모리에 몇 개까지 올려둘지
+PARQUET_CACHE_PARTITIONS = int(os.getenv("SALES_PARQUET_CACHE_PARTITIONS", "12"))
+
+COLUMNS = ["TA_YMD", "DONG", "HOUR", "DAY", "AMT", "CNT", "UNIT", "TEMP", "RAIN"]
+
+
+def _num(v):
+    """None/NaN → None, 나머지는 float"""
+    if v is None:
+        return None
+    v = float(v)
+    return None if np.isnan(v) else v
+
+
+def day_result(rows, label: str):
+    """
+    (HOUR, AMT, CNT, TEMP, RAIN) 행들 → get_day 결과
+    - hours: {시간대: {"amt", "cnt", "temp", "rain"}} (없는 값은 NaN)
+    - weather: (평균 TEMP, 평균 RAIN, 출처) 또는 None
+    - exists: 데이터 존재 여부
+    """
+    hours = {}
+    temps, rains = [], []
+    for hour, amt, cnt, temp, rain in rows:
+        amt, cnt, temp, rain = _num(amt), _num(cnt), _num(temp), _num(rain)
+        hours.setdefault(int(hour), {
+            "amt": np.nan if amt is None else amt,
+            "cnt": np.nan if cnt is None else cnt,
+            "temp": np.nan if temp is None else temp,
+            "rain": np.nan if rain is None else rain,
+        })
+        # 기존 AVG(TEMP), AVG(RAIN) ... WHERE TEMP IS NOT NULL 과 동일한 평균
+        if temp is not None:
+            temps.append(temp)
+            if rain is not None:
+                rains.append(rain)
+
+    weather = None
+    if temps:
+        rain_avg = float(np.mean(rains)) if rains else 0.0
+        weather = (float(np.mean(temps)), rain_avg, label)
+
+    return {"exists": bool(rows), "hours": hours, "weather": weather}
+
+
+# =========================
+# 공통 인터페이스
+# =========================
+class SalesStore:
+    label = "실제데이터"
+
+    def __init__(self):
+        self._stat_lock = threading.Lock()
+        self.lookups = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+    def _fetch_day(self, ymd8: str, dong: str):
+        """[(HOUR, AMT, CNT, TEMP, RAIN), ...] (HOUR 순), 조회 실패 시 예외"""
+        raise NotImplementedError
+
+    def get_day(self, ymd8: str, dong: str):
+        """하루치 실제 데이터 (day_result 형식), 조회 실패 시 None"""
+        start = time.perf_counter()
+        try:
+            rows = self._fetch_day(ymd8, dong)
+        except Exception as e:
+            print(f"❌ 실제 데이터 조회 실패 ({type(self).__name__}): {e}", flush=True)
+            rows = None
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with self._stat_lock:
+            self.lookups += 1
+            self.errors += int(rows is None)
+            self.total_ms += elapsed
+        return day_result(rows, self.label) if rows is not None else None
+
+    def scan(self, chunksize: int = 100_000):
+        """전체 데이터를 DataFrame(COLUMNS) 청크로 읽기 (메모리 색인/사본 만들기용)"""
+        raise NotImplementedError
+
+    def ping(self) -> bool:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+    def stats(self):
+        with self._stat_lock:
+            return {
+                "backend": type(self).__name__,
+                "source": self.describe(),
+                "lookups": self.lookups,
+                "errors": self.errors,
+                "avg_ms": self.total_ms / self.lookups if self.lookups else 0.0,
+            }
+
+
+# =========================
+# Oracle
+# =========================
+class OracleSalesStore(SalesStore):
+    label = "Oracle DB(실제데이터)"
+
+    def _fetch_day(self, ymd8, dong):
+        import oracledb
+        from db_pool import pooled_connection
+
+        with pooled_connection() as conn:
+            if not conn:
+                raise ConnectionError("Oracle 커넥션을 얻지 못했습니다")
+            try:
+                cursor = conn.cursor()
+                # (TA_YMD, DONG) 인덱스로 하루치 최대 10행만 읽음
+                cursor.execute("""
+                    SELECT /*+ INDEX(S IDX_SALES_YMD_DONG) */
+                           HOUR, AMT, CNT, TEMP, RAIN
+                    FROM SALES_DATA S
+                    WHERE TA_YMD = :ymd
+                      AND DONG = :dong
+                    ORDER BY HOUR
+                """, ymd=ymd8, dong=dong)
+                rows = cursor.fetchall()
+                cursor.close()
+            except oracledb.Error as error:
+                raise RuntimeError(f"DB 조회 실패: {error}") from error
+        return rows
+
+    def scan(self, chunksize=100_000):
+        return frames_from_oracle(chunksize)
+
+    def ping(self):
+        from db_pool import ping
+        return ping()
+
+    def describe(self):
+        from db_pool import ORACLE_HOST, ORACLE_PORT, ORACLE_SID, ORACLE_USER
+        return f"{ORACLE_HOST}:{ORACLE_PORT}/{ORACLE_SID} ({ORACLE_USER})"
+
+    def stats(self):
+        from db_pool import pool_stats
+        stats = super().stats()
+        stats["pool"] = pool_stats()
+        return stats
+
+
+# =========================
+# SQLite
+# =========================
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sales_data (
+        ta_ymd TEXT NOT NULL,
+        dong   TEXT NOT NULL,
+        hour   INTEGER NOT NULL,
+        day    INTEGER,
+        amt    REAL,
+        cnt    INTEGER,
+        unit   TEXT,
+        temp   REAL,
+        rain   REAL,
+        PRIMARY KEY (ta_ymd, dong, hour)
+    ) WITHOUT ROWID
+"""
+# 동 하나의 기간 조회용 (예: 동별 추이)
+SQLITE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_sales_dong_ymd ON sales_data (dong, ta_ymd)",
+]
+
+
+class SqliteSalesStore(SalesStore):
+    """
+    읽기 전용 SQLite 사본
+    (ta_ymd, dong, hour) 가 WITHOUT ROWID 기본키라서 하루치 10행이 한 페이지에 붙어 있음
+    스레드/프로세스마다 커넥션을 따로 열고 PRAGMA mmap_size 로 파일을 메모리 매핑해서 읽음
+    """
+    label = "SQLite(실제데이터)"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        if not os.path.exists(path):
+            print(f"⚠️  SQLite 매출 사본이 없습니다: {path} (python sales_store.py export 로 생성)", flush=True)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5.0,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+            if SQLITE_MMAP_BYTES > 0:
+                conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _fetch_day(self, ymd8, dong):
+        return self._conn().execute(
+            "SELECT hour, amt, cnt, temp, rain FROM sales_data "
+            "WHERE ta_ymd = ? AND dong = ? ORDER BY hour",
+            (ymd8, dong),
+        ).fetchall()
+
+    def scan(self, chunksize=100_000):
+        import pandas as pd
+        cursor = self._conn().execute(
+            "SELECT ta_ymd, dong, hour, day, amt, cnt, unit, temp, rain FROM sales_data")
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=COLUMNS)
+
+    def ping(self):
+        try:
+            self._conn().execute("SELECT 1 FROM sales_data LIMIT 1").fetchall()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def describe(self):
+        return self.path
+
+
+def write_sqlite(frames, path: str):
+    """
+    DataFrame 청크들(COLUMNS) → SQLite 사본
+    임시 파일에 만든 뒤 교체하므로 읽고 있는 앱은 끊기지 않음
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(SQLITE_SCHEMA)
+    total = 0
+    for frame in frames:
+        rows = frame[COLUMNS].astype(object).where(frame[COLUMNS].notna(), None)
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sales_data "
+                "(ta_ymd, dong, hour, day, amt, cnt, unit, temp, rain) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows.itertuples(index=False, name=None),
+            )
+        total += len(frame)
+        print(f"  ✓ {total:,} 행", flush=True)
+    for sql in SQLITE_INDEXES:
+        conn.execute(sql)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    return total
+
+
+# =========================
+# Parquet
+# =========================
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet 저장소를 쓰려면 pyarrow가 필요합니다 (pip install pyarrow)")
+
+
+class _Partition:
+    """한 달치 Parquet → 컬럼 배열 + (날짜, 동) → 행 범위 색인"""
+
+    def __init__(self, path: str):
+        table = pq.read_table(path, columns=["TA_YMD", "DONG", "HOUR", "AMT", "CNT", "TEMP", "RAIN"],
+                              memory_map=True)
+        ymd = np.asarray(table.column("TA_YMD").to_pylist(), dtype=object)
+        dong = np.asarray(table.column("DONG").to_pylist(), dtype=object)
+        hour = table.column("HOUR").cast(pa.float64()).to_numpy()
+
+        # (날짜, 동, 시간) 순으로 정렬해서 (날짜, 동) 마다 연속 구간을 기록
+        order = np.lexsort((hour, dong, ymd))
+        self.values = np.column_stack([
+            hour[order],
+            *(table.column(c).cast(pa.float64()).to_numpy()[order] for c in ("AMT", "CNT", "TEMP", "RAIN")),
+        ])
+        ymd, dong = ymd[order], dong[order]
+        self.index = {}
+        n = len(order)
+        start = 0
+        for i in range(1, n + 1):
+            if i == n or ymd[i] != ymd[start] or dong[i] != dong[start]:
+                self.index[(ymd[start], dong[start])] = (start, i)
+                start = i
+        self.nbytes = int(self.values.nbytes)
+
+    def rows(self, ymd8, dong):
+        span = self.index.get((ymd8, dong))
+        if span is None:
+            return []
+        return [tuple(r) for r in self.values[span[0]:span[1]].tolist()]
+
+
+class ParquetSalesStore(SalesStore):
+    """
+    월별 파티션 Parquet 사본 (root/ym=YYYYMM/part-*.parquet)
+    요청한 날짜의 파티션만 memory_map 으로 읽어 색인을 만들고 LRU로 보관
+    """
+    label = "Parquet(실제데이터)"
+
+    def __init__(self, root: str, max_partitions: int = PARQUET_CACHE_PARTITIONS):
+        _require_pyarrow()
+        super().__init__()
+        self.root = root
+        self.max_partitions = max_partitions
+        self._partitions = OrderedDict()
+        self._lock = threading.Lock()
+        self.partition_loads = 0
+        if not os.path.isdir(root):
+            print(f"⚠️  Parquet 매출 사본이 없습니다: {root} (python sales_store.py export 로 생성)", flush=True)
+
+    def _partition(self, ym: str):
+        with self._lock:
+            part = self._partitions.get(ym)
+            if part is not None:
+                self._partitions.move_to_end(ym)
+                return part
+
+        part_dir = os.path.join(self.root, f"ym={ym}")
+        files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet")) if os.path.isdir(part_dir) else []
+        parts = [_Partition(os.path.join(part_dir, f)) for f in files]
+
+        with self._lock:
+            self.partition_loads += 1
+            self._partitions[ym] = parts
+            while len(self._partitions) > self.max_partitions:
+                self._partitions.popitem(last=False)
+        return parts
+
+    def _fetch_day(self, ymd8, dong):
+        rows = []
+        for part in self._partition(ymd8[:6]):
+            rows.extend(part.rows(ymd8, dong))
+        return rows
+
+    def scan(self, chunksize=100_000):
+        for dirpath, _, files in sorted(os.walk(self.root)):
+            for f in sorted(files):
+                if f.endswith(".parquet"):
+                    pf = pq.ParquetFile(os.path.join(dirpath, f), memory_map=True)
+                    for batch in pf.iter_batches(batch_size=chunksize, columns=COLUMNS):
+                        yield batch.to_pandas()
+
+    def ping(self):
+        return os.path.isdir(self.root)
+
+    def describe(self):
+        return self.root
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats.update({
+                "cached_partitions": list(self._partitions),
+                "cached_bytes": sum(p.nbytes for parts in self._partitions.values() for p in parts),
+                "partition_loads": self.partition_loads,
+            })
+        return stats
+
+
+def parquet_schema():
+    """월별 파티션 파일 스키마 (preprocess_card_data.py 도 같은 스키마로 씀)"""
+    _require_pyarrow()
+    return pa.schema([
+        ("TA_YMD", pa.string()), ("DONG", pa.string()), ("HOUR", pa.int8()), ("DAY", pa.int8()),
+        ("AMT", pa.float64()), ("CNT", pa.int64()), ("UNIT", pa.string()),
+        ("TEMP", pa.float64()), ("RAIN", pa.float64()),
+    ])
+
+
+def write_parquet(frames, root: str):
+    """DataFrame 청크들(COLUMNS) → 월별 파티션 Parquet (임시 폴더에 만든 뒤 교체)"""
+    _require_pyarrow()
+    tmp_root = root + ".tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    schema = parquet_schema()
+    writers = {}
+    total = 0
+    try:
+        for frame in frames:
+            frame = frame[COLUMNS]
+            for ym, part in frame.groupby(frame["TA_YMD"].str[:6]):
+                writer = writers.get(ym)
+                if writer is None:
+                    part_dir = os.path.join(tmp_root, f"ym={ym}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    writer = pq.ParquetWriter(os.path.join(part_dir, "part-0.parquet"), schema)
+                    writers[ym] = writer
+                writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+            total += len(frame)
+            print(f"  ✓ {total:,} 행", flush=True)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp_root, root)
+    return total
+
+
+# =========================
+# 생성 / 사본 만들기
+# =========================
+def default_path(backend: str, data_dir: str = DATA_DIR):
+    if backend == "sqlite":
+        return os.getenv("SALES_STORE_PATH", os.path.join(data_dir, "sales.sqlite3"))
+    if backend == "parquet":
+        return os.getenv("SALES_STORE_PATH", os.path.join(data_dir, "sales_parquet"))
+    return None
+
+
+def _snapshot_path(data_dir: str):
+    return os.getenv("SALES_MEMORY_SNAPSHOT", os.path.join(data_dir, "sales_index.npz"))
+
+
+def load_shared_index(data_dir: str = DATA_DIR, backend: str = None):
+    """
+    prefork 서버의 master 에서 SALES_MEMORY_INDEX=1 색인을 한 번 올림 → SalesIndex (사용 안 하거나 실패하면 None)
+    fork 된 워커들은 create_sales_store(index=...) 로 이 배열을 copy-on-write 로 같이 씀
+    색인을 만드는 데 쓴 Oracle 커넥션 풀은 워커로 넘어가지 않게 닫음
+    """
+    if os.getenv("SALES_MEMORY_INDEX", "0") != "1":
+        return None
+    from sales_index import MemorySalesStore
+    backend = (backend or os.getenv("SALES_STORE_BACKEND", "oracle")).lower()
+    try:
+        return MemorySalesStore(_backing_store(data_dir, backend), snapshot_path=_snapshot_path(data_dir)).load_index()
+    except Exception as e:
+        print(f"⚠️  master 에서 매출 색인을 올리지 못했습니다 (워커마다 따로 로드): {e}", flush=True)
+        return None
+    finally:
+        if backend == "oracle":
+            from db_pool import close_pool
+            close_pool()
+
+
+def _backing_store(data_dir: str, backend: str):
+    if backend == "oracle":
+        store = OracleSalesStore()
+    elif backend == "sqlite":
+        store = SqliteSalesStore(default_path(backend, data_dir))
+    elif backend == "parquet":
+        store = ParquetSalesStore(default_path(backend, data_dir))
+    else:
+        raise ValueError(f"알 수 없는 SALES_STORE_BACKEND: {backend}")
+    return store
+
+
+def create_sales_store(data_dir: str = DATA_DIR, backend: str = None, index=None):
+    """
+    SALES_STORE_BACKEND(oracle/sqlite/parquet)에 맞는 저장소 생성
+    index: load_shared_index() 로 master 에서 올린 색인 (있으면 워커에서 다시 로드하지 않음)
+    """
+    backend = (backend or os.getenv("SALES_STORE_BACKEND", "oracle")).lower()
+    store = _backing_store(data_dir, backend)
+
+    # SALES_MEMORY_INDEX=1 이면 전체를 메모리 배열로 올려두고 조회 (sales_index.py)
+    if os.getenv("SALES_MEMORY_INDEX", "0") == "1":
+        from sales_index import MemorySalesStore
+        store = MemorySalesStore(store, snapshot_path=_snapshot_path(data_dir), index=index).start()
+    return store
+
+
+def frames_from_csv(csv_path: str, chunksize: int):
+    """import_csv_to_oracle 과 같은 변환 규칙으로 CSV 청크 읽기"""
+    import pandas as pd
+    from import_csv_to_oracle import prepare_chunk, read_csv_chunks
+
+    for chunk in read_csv_chunks(csv_path, chunksize):
+        frame = pd.DataFrame(prepare_chunk(chunk), columns=COLUMNS)
+        yield frame[frame["TA_YMD"].notna() & frame["DONG"].notna()]
+
+
+def frames_from_oracle(chunksize: int):
+    """Oracle SALES_DATA 전체를 청크 단위로 읽기"""
+    import pandas as pd
+    from db_pool import pooled_connection
+
+    with pooled_connection() as conn:
+        if not conn:
+            raise ConnectionError("Oracle 커넥션을 얻지 못했습니다")
+        cursor = conn.cursor()
+        cursor.arraysize = min(chunksize, 50_000)
+        cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM SALES_DATA")
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=COLUMNS)
+        cursor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="실제 매출 데이터 로컬 사본(SQLite/Parquet) 만들기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="CSV 또는 Oracle에서 사본 생성")
+    export.add_argument("--backend", choices=["sqlite", "parquet"], required=True)
+    export.add_argument("--source", choices=["csv", "oracle"], default="csv")
+    export.add_argument("--csv", default=os.path.join(DATA_DIR, "수원시 한식 동별 데이터백업.csv"))
+    export.add_argument("--out", default=None, help="출력 경로 (기본: SALES_STORE_PATH 또는 data/ 아래)")
+    export.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    out = args.out or default_path(args.backend)
+    frames = frames_from_csv(args.csv, args.chunksize) if args.source == "csv" else frames_from_oracle(args.chunksize)
+    print(f"📦 {args.source} → {args.backend}: {out}")
+    start = time.perf_counter()
+    writer = write_sqlite if args.backend == "sqlite" else write_parquet
+    total = writer(frames, out)
+    print(f"✅ 사본 생성 완료: {total:,} 행, {time.perf_counter() - start:.1f}초")
@@ -1,5 +1,21 @@
 // main.js - 구 선택 시 동 목록 업데이트
 
+// 동/격자 목록은 /api/locations 에서 한 번만 받음 (URL에 버전이 있어서 브라우저 캐시 사용)
+const LOC_URL = (document.currentScript && document.currentScript.dataset.locUrl) || '/api/locations';
+const locReady = fetch(LOC_URL)
+  .then(function(res) {
+    if (!res.ok) throw new Error('HTTP ' + res.status);
+    return res.json();
+  })
+  .then(function(loc) {
+    window.LOC = loc;
+    return loc;
+  })
+  .catch(function(err) {
+    console.error('동 목록을 불러오지 못했습니다:', err);
+    return {};
+  });
+
 document.addEventListener('DOMContentLoaded', function() {
   const guSelect = document.getElementById('gu');
   const dongSelect = document.getElementById('dong');
@@ -12,30 +28,34 @@ document.addEventListener('DOMContentLoaded', function() {
   // 구 선택 시 동 목록 업데이트
   guSelect.addEventListener('change', function() {
     const selectedGu = this.value;
-    
+
     // 동 선택 초기화
     dongSelect.innerHTML = '<option value="">선택해주세요</option>';
-    
+
     if (!selectedGu) {
       dongSelect.disabled = true;
       return;
     }
 
-    // 선택한 구의 동 목록 가져오기
-    if (window.LOC && window.LOC[selectedGu]) {
-      const dongs = Object.keys(window.LOC[selectedGu]).sort();
-      
-      dongs.forEach(function(dong) {
-        const option = document.createElement('option');
-        option.value = dong;
-        option.textContent = dong;
-        dongSelect.appendChild(option);
-      });
-      
-      dongSelect.disabled = false;
-    } else {
-      dongSelect.disabled = true;
-      console.error('선택한 구의 데이터를 찾을 수 없습니다:', selectedGu);
-    }
+    // 선택한 구의 동 목록 가져오기 (아직 받는 중이면 기다림)
+    locReady.then(function(loc) {
+      if (guSelect.value !== selectedGu) return;
+
+      if (loc && loc[selectedGu]) {
+        const dongs = Object.keys(loc[selectedGu]).sort();
+
+        dongs.forEach(function(dong) {
+          const option = document.createElement('option');
+          option.value = dong;
+          option.textContent = dong;
+          dongSelect.appendChild(option);
+        });
+
+        dongSelect.disabled = false;
+      } else {
+        dongSelect.disabled = true;
+        console.error('선택한 구의 데이터를 찾을 수 없습니다:', selectedGu);
+      }
+    });
   });
 });
@@ -0,0 +1,5 @@
+"""04_flaskWebService 모듈(app, compiled_models ...)을 tests/ 에서 import 할 수 있게 경로 추가"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,90 @@
+"""compiled_models: 경량 추론 결과가 원래 joblib 모델(HourModel)과 같은지"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_inference import HourModel
+from compiled_models import MODELS_DIR, CompiledHourModel, _sample_frame
+
+MLP_PATH = os.path.join(MODELS_DIR, "hour_01_amt_cnt.joblib")
+
+
+def _assert_parity(original: HourModel, compiled: CompiledHourModel, n=500, seed=0):
+    frame = _sample_frame(compiled, n, seed)
+    # 학습에 없던 동도 섞여 있어야 함 (OneHotEncoder handle_unknown="ignore" 경로)
+    assert (frame["DONG"] == "없는동").any()
+    np.testing.assert_allclose(
+        compiled.predict_frame(frame), original.predict_frame(frame), rtol=1e-6, atol=1e-6)
+    return frame
+
+
+def _round_trip(compiled: CompiledHourModel, tmp_path):
+    path = str(tmp_path / f"hour_{compiled.hour:02d}.compiled.npz")
+    compiled.save(path, signature={"size": 0})
+    loaded = CompiledHourModel.load(path)
+    assert loaded.kind == compiled.kind and loaded.hour == compiled.hour
+    assert CompiledHourModel.read_meta(path)["source"] == {"size": 0}
+    return loaded
+
+
+@pytest.fixture(scope="module")
+def mlp_model():
+    if not os.path.exists(MLP_PATH):
+        pytest.skip(f"모델 파일이 없습니다: {MLP_PATH}")
+    return HourModel(1, joblib.load(MLP_PATH))
+
+
+@pytest.fixture(scope="module")
+def xgb_model():
+    pytest.importorskip("xgboost")
+    from train_models import FEATURES, TARGETS, build_model
+
+    rng = np.random.default_rng(0)
+    n = 600
+    dongs = np.array(["고등동", "행궁동", "파장동", "매탄1동", "인계동"])
+    frame = pd.DataFrame({
+        "DONG": dongs[rng.integers(0, len(dongs), n)],
+        "DAY": rng.integers(1, 8, n),
+        "TEMP": rng.uniform(-10, 35, n).round(1),
+        "RAIN": np.where(rng.random(n) < 0.7, 0.0, rng.uniform(0, 40, n).round(1)),
+    })
+    frame["AMT"] = 1e5 + 2e4 * frame["DAY"] - 500 * frame["RAIN"] + rng.normal(0, 5e3, n)
+    frame["CNT"] = 20 + 2 * frame["DAY"] - 0.1 * frame["RAIN"] + rng.normal(0, 2, n)
+    model = build_model("XGB", 1, quick=True)
+    model.fit(frame[FEATURES], frame[TARGETS].values)
+    return HourModel(2, model)
+
+
+def test_mlp_parity(mlp_model):
+    compiled = CompiledHourModel.from_model(1, mlp_model.model)
+    assert compiled.kind == "mlp"
+    _assert_parity(mlp_model, compiled)
+
+
+def test_mlp_save_load_parity(mlp_model, tmp_path):
+    compiled = CompiledHourModel.from_model(1, mlp_model.model)
+    _assert_parity(mlp_model, _round_trip(compiled, tmp_path), seed=1)
+
+
+def test_xgb_parity(xgb_model):
+    compiled = CompiledHourModel.from_model(2, xgb_model.model)
+    assert compiled.kind == "xgb"
+    _assert_parity(xgb_model, compiled)
+
+
+def test_xgb_save_load_parity(xgb_model, tmp_path):
+    compiled = CompiledHourModel.from_model(2, xgb_model.model)
+    _assert_parity(xgb_model, _round_trip(compiled, tmp_path), seed=1)
+
+
+def test_unknown_dong_only(mlp_model, xgb_model):
+    """모든 행이 모르는 동이어도 (원핫 전부 0) 원래 모델과 같음"""
+    for original in (mlp_model, xgb_model):
+        compiled = CompiledHourModel.from_model(original.hour, original.model)
+        frame = _sample_frame(compiled, 50, 2)
+        frame["DONG"] = "없는동"
+        np.testing.assert_allclose(
+            compiled.predict_frame(frame), original.predict_frame(frame), rtol=1e-6, atol=1e-6)
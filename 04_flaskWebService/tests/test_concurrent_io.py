@@ -0,0 +1,25 @@
+"""concurrent_io: 결과가 필요 없어진 작업 취소"""
+import threading
+
+from concurrent_io import IoPool
+
+
+def test_cancel_queued_task_does_not_run():
+    pool = IoPool(workers=1)
+    started, release, ran = threading.Event(), threading.Event(), []
+
+    def _busy():
+        started.set()
+        release.wait(5)
+
+    busy = pool.submit("db", _busy)
+    started.wait(5)
+    queued = pool.submit("weather", ran.append, "weather")
+
+    assert pool.cancel(queued)
+    assert not pool.cancel(busy)  # 이미 실행 중이면 끝나게 둠
+    release.set()
+    pool.wait(busy)
+    pool.shutdown()
+    assert ran == []
+    assert pool.stats()["dependencies"]["weather"]["cancelled"] == 1
@@ -0,0 +1,80 @@
+"""kma_client: circuit breaker 와 호출 속도 제한, 단기예보 범위 밖 날짜"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import kma_client
+from fake_kma_server import start_fake_kma_server
+from kma_client import CircuitBreaker, ForecastMissing, KmaClient, KmaUnavailable
+from weather_store import MemoryWeatherStore
+
+
+class _EmptyBucket:
+    def acquire(self, max_wait):
+        return False
+
+
+@pytest.fixture
+def kma_server(monkeypatch):
+    server = start_fake_kma_server()
+    monkeypatch.setattr(kma_client, "KMA_BASE_URL", server.base_url)
+    yield server
+    server.shutdown()
+
+
+def _half_open_breaker():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.01)
+    breaker.failure()
+    time.sleep(0.02)
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_breaker_allows_one_trial_when_half_open():
+    breaker = _half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_rate_limited_trial_does_not_wedge_breaker(kma_server):
+    kma = KmaClient(MemoryWeatherStore(), service_key="test")
+    kma.breaker = _half_open_breaker()
+    limiter, kma.limiter = kma.limiter, _EmptyBucket()
+
+    with pytest.raises(KmaUnavailable):
+        kma.get_ultra_now(60, 127, use_cache=False)
+    assert kma_server.total_calls() == 0
+
+    # 토큰이 다시 생기면 시험 호출이 나가고 성공하면 서킷이 닫힘
+    kma.limiter = limiter
+    kma.get_ultra_now(60, 127, use_cache=False)
+    assert kma.breaker.state == "closed"
+    assert kma_server.total_calls() == 1
+
+
+@pytest.mark.skipif(kma_client.fcntl is None, reason="fcntl 없음")
+def test_file_token_bucket_shared_between_clients(tmp_path):
+    # 워커 둘이 같은 파일을 쓰면 burst 를 나눠 씀
+    path = str(tmp_path / "kma_rate.state")
+    a = kma_client.FileTokenBucket(path, rate=0.001, burst=3)
+    b = kma_client.FileTokenBucket(path, rate=0.001, burst=3)
+    assert a.acquire(0) and b.acquire(0) and a.acquire(0)
+    assert not b.acquire(0)
+    assert not a.acquire(0)
+
+
+def test_village_date_beyond_forecast_is_not_cached(kma_server):
+    store = MemoryWeatherStore()
+    kma = KmaClient(store, service_key="test")
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y%m%d")
+    far = (datetime.now() + timedelta(days=5)).strftime("%Y%m%d")
+
+    with pytest.raises(ForecastMissing) as info:
+        kma.get_vilage_day_avg(60, 127, far)
+    assert info.value.default == (15.0, 0.0)
+    # 응답에 있던 날짜만 캐시, 없던 날짜는 기본값을 저장하지 않음
+    assert store.get(tomorrow, 60, 127, "village") is not None
+    assert store.get(far, 60, 127, "village") is None
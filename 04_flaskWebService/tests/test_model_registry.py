@@ -0,0 +1,74 @@
+"""model_registry: 워커 간 모델 세트 맞추기, 로드 실패 재시도"""
+import os
+import shutil
+
+import pytest
+
+from model_registry import ModelRegistry, ModelSet, SharedModelVersion
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MLP_PATH = os.path.join(BASE_DIR, "models", "hour_01_amt_cnt.joblib")
+
+
+@pytest.fixture
+def model_dirs(tmp_path):
+    dirs = []
+    for name, mtime in (("v1", 1_000_000_000), ("v2", 1_100_000_000)):
+        d = tmp_path / "models" / name
+        d.mkdir(parents=True)
+        shutil.copyfile(MLP_PATH, d / "hour_01_amt_cnt.joblib")
+        os.utime(d / "hour_01_amt_cnt.joblib", (mtime, mtime))
+        dirs.append(str(d))
+    return dirs
+
+
+def _worker(models_dir, path):
+    registry = ModelRegistry(models_dir, hours=[1], mode="parallel", workers=1).start()
+    return registry, SharedModelVersion(path)
+
+
+def test_workers_follow_published_reload_and_rollback(model_dirs, tmp_path):
+    v1, v2 = model_dirs
+    path = str(tmp_path / "model_active.json")
+    (a, a_sync), (b, b_sync) = _worker(v1, path), _worker(v1, path)
+    assert b_sync.sync(b) is False  # 게시된 것이 없으면 그대로
+
+    # 워커 a 가 교체 요청을 받음 → 게시 → b 는 다음 요청 전에 같은 세트로
+    a_sync.publish(v2, a.reload(v2))
+    assert b.version != a.version
+    assert b_sync.sync(b) is True
+    assert b.version == a.version
+    assert b_sync.sync(b) is False  # 파일이 그대로면 다시 읽지 않음
+
+    # 롤백도 같은 방식, b 는 다시 로드하지 않고 직전 세트로
+    previous = b.snapshot()
+    a.rollback()
+    a_sync.publish(a.snapshot().models_dir, a.version)
+    assert b_sync.sync(b) is True
+    assert b.version == a.version
+    assert b.previous_version == previous.version
+
+
+def test_failed_sync_is_retried_later(model_dirs, tmp_path):
+    v1, _ = model_dirs
+    path = str(tmp_path / "model_active.json")
+    registry, sync = _worker(v1, path)
+    sync.retry_sec = 0.0
+    SharedModelVersion(path).publish(str(tmp_path / "missing"), "deadbeef0000")
+
+    assert sync.sync(registry) is False
+    assert sync._seen is None  # 맞추지 못했으므로 다음 요청에서 다시 시도
+
+
+def test_failed_hour_load_is_retried_after_delay(tmp_path):
+    model_set = ModelSet(str(tmp_path), hours=[1], retry_sec=3600)
+    assert model_set.get(1) is None
+    assert "1" in model_set.stats()["errors"]
+
+    # 파일을 고쳐도 retry_sec 안에는 다시 읽지 않음, 지나면 다음 get() 에서 로드
+    shutil.copyfile(MLP_PATH, tmp_path / "hour_01_amt_cnt.joblib")
+    assert model_set.get(1) is None
+    model_set.retry_sec = 0.0
+    assert model_set.get(1) is not None
+    assert model_set.ready()
+    assert model_set.stats()["errors"] == {}
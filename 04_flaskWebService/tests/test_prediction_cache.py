@@ -0,0 +1,80 @@
+"""prediction_cache: 모델 버전별 키, 통계 대체 예측은 저장하지 않음"""
+import numpy as np
+import pandas as pd
+
+from batch_inference import BatchPredictor
+from prediction_cache import PredictionCache
+
+
+class _ConstModel:
+    """입력과 상관없이 [value, 1] 을 돌려주는 시간대 모델"""
+
+    columns = ["DONG", "DAY", "TEMP", "RAIN"]
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict_frame(self, frame: pd.DataFrame):
+        return np.array([[self.value, 1.0]] * len(frame))
+
+
+class _Fallback:
+    def predict_frame(self, frame, hours):
+        return {hour: np.array([[-1.0, -1.0]] * len(frame)) for hour in hours}
+
+
+def _compute(predictor, calls):
+    def compute(missing, temp, rain, sources):
+        calls.append(list(missing))
+        return predictor.predict_day("팔달구", "고등동", 1, temp, rain, hours=missing, sources=sources)
+    return compute
+
+
+def test_fallback_hours_are_not_cached(tmp_path):
+    cache = PredictionCache(str(tmp_path))
+    models = {1: _ConstModel(100.0)}
+    predictor = BatchPredictor(hour_models=models, fallback=_Fallback())
+    calls = []
+
+    sources = {}
+    out = cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1, 2], _compute(predictor, calls), "v1", sources)
+    assert out == {1: (100.0, 1.0), 2: (-1.0, -1.0)}
+    assert sources == {1: "model", 2: "fallback"}
+
+    # 2시 모델이 로드된 뒤에는 통계 예측이 아니라 모델 예측
+    models[2] = _ConstModel(200.0)
+    sources = {}
+    out = cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1, 2], _compute(predictor, calls), "v1", sources)
+    assert out == {1: (100.0, 1.0), 2: (200.0, 1.0)}
+    assert sources == {1: "model", 2: "model"}
+    assert calls == [[1, 2], [2]]
+
+
+def test_version_is_part_of_key(tmp_path):
+    cache = PredictionCache(str(tmp_path))
+    models = {1: _ConstModel(100.0)}
+    predictor = BatchPredictor(hour_models=models)
+    calls = []
+
+    cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1], _compute(predictor, calls), "v1")
+    models[1] = _ConstModel(300.0)
+    out = cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1], _compute(predictor, calls), "v2")
+    assert out == {1: (300.0, 1.0)}
+    assert calls == [[1], [1]]
+    assert cache.stats()["hits"] == 0
+
+
+def test_hour_subdirectory_change_clears_cache(tmp_path):
+    # models/HOUR_XX/model_{family}.joblib 만 바뀌어도 캐시를 비움
+    hour_dir = tmp_path / "HOUR_01"
+    hour_dir.mkdir()
+    (hour_dir / "model_xgb.joblib").write_bytes(b"v1")
+    cache = PredictionCache(str(tmp_path), check_interval=0.0)
+    predictor = BatchPredictor(hour_models={1: _ConstModel(100.0)})
+    calls = []
+
+    cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1], _compute(predictor, calls))
+    (hour_dir / "model_xgb.joblib").write_bytes(b"v2-longer")
+    cache.get_or_compute_day("고등동", 1, 10.0, 0.0, [1], _compute(predictor, calls))
+    assert calls == [[1], [1]]
+    assert cache.stats()["invalidations"] == 1
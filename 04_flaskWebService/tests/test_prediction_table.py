@@ -0,0 +1,62 @@
+"""prediction_table: 대체 예측 / 날씨 실패는 사전 계산 테이블에 저장하지 않음"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from batch_inference import BatchPredictor
+from prediction_table import PredictionMaterializer, PredictionTable
+
+LOC = {"팔달구": {"고등동": {"nx": 60, "ny": 121}}, "장안구": {"파장동": {"nx": 61, "ny": 122}}}
+
+
+class _ConstModel:
+    columns = ["DONG", "DAY", "TEMP", "RAIN"]
+
+    def predict_frame(self, frame: pd.DataFrame):
+        return np.array([[100.0, 1.0]] * len(frame))
+
+
+class _Fallback:
+    def predict_frame(self, frame, hours):
+        return {hour: np.array([[-1.0, -1.0]] * len(frame)) for hour in hours}
+
+
+def _weather(failed=()):
+    def resolve(nx, ny, ymd8):
+        if (nx, ny) in failed:
+            return 15.0, 0.0, "기본값", "error"
+        return 10.0, 0.0, "단기예보", None
+    return resolve
+
+
+def _materializer(tmp_path, models, resolve):
+    table = PredictionTable(str(tmp_path / "pred.sqlite3"))
+    predictor = BatchPredictor(hour_models=models, fallback=_Fallback())
+    return table, PredictionMaterializer(table, LOC, resolve, predictor, lambda: "v1", days=0)
+
+
+def test_fallback_hours_are_not_materialized(tmp_path):
+    models = {hour: _ConstModel() for hour in range(1, 11) if hour != 5}
+    table, mat = _materializer(tmp_path, models, _weather())
+    ymd = datetime.now().strftime("%Y%m%d")
+
+    # 5시 모델이 없으면 모든 (동, 날짜)가 대체 예측을 포함 → 저장하지 않음
+    assert mat.run() == 0
+    assert mat.last_skipped == 20
+    assert table.lookup("팔달구", "고등동", ymd, "v1") is None
+
+    models[5] = _ConstModel()
+    assert mat.run() == 20
+    hit = table.lookup("팔달구", "고등동", ymd, "v1")
+    assert hit["preds"][5] == (100.0, 1.0)
+
+
+def test_degraded_weather_is_not_materialized(tmp_path):
+    models = {hour: _ConstModel() for hour in range(1, 11)}
+    table, mat = _materializer(tmp_path, models, _weather(failed={(61, 122)}))
+    ymd = datetime.now().strftime("%Y%m%d")
+
+    assert mat.run() == 10
+    assert table.lookup("팔달구", "고등동", ymd, "v1") is not None
+    assert table.lookup("장안구", "파장동", ymd, "v1") is None
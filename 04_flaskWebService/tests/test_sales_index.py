@@ -0,0 +1,72 @@
+"""sales_index: 스냅샷 저장 / 로드"""
+import os
+import threading
+
+import pandas as pd
+
+from sales_index import SalesIndex
+
+
+def _index():
+    frame = pd.DataFrame({
+        "TA_YMD": ["20240101", "20240101", "20240102"],
+        "DONG": ["고등동", "고등동", "행궁동"],
+        "HOUR": [1, 2, 3],
+        "AMT": [1000.0, 2000.0, 3000.0],
+        "CNT": [1, 2, 3],
+        "TEMP": [-1.0, 0.5, 2.0],
+        "RAIN": [0.0, 0.0, 1.2],
+    })
+    return SalesIndex.from_frames([frame], source="test")
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    # 워커 여럿이 같은 스냅샷을 동시에 저장해도 깨진 파일이나 남은 임시 파일이 없어야 함
+    index = _index()
+    path = str(tmp_path / "sales_index.npz")
+    errors = []
+
+    def save():
+        try:
+            for _ in range(5):
+                index.save(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert os.listdir(tmp_path) == ["sales_index.npz"]
+    loaded = SalesIndex.load(path)
+    assert loaded.lookup("20240101", "고등동") == index.lookup("20240101", "고등동")
+    assert loaded.lookup("20240102", "행궁동") == index.lookup("20240102", "행궁동")
+
+
+def test_workers_reuse_shared_index(tmp_path, monkeypatch):
+    # master 가 올린 색인을 쓰는 저장소는 다시 로드하지 않음
+    from sales_index import MemorySalesStore
+    import sales_store
+
+    index = _index()
+    monkeypatch.setenv("SALES_MEMORY_INDEX", "1")
+    monkeypatch.setenv("SALES_MEMORY_SNAPSHOT", str(tmp_path / "sales_index.npz"))
+    store = sales_store.create_sales_store(str(tmp_path), backend="sqlite", index=index)
+    assert isinstance(store, MemorySalesStore)
+    assert store._index is index
+    assert store.get_day("20240101", "고등동")["exists"]
+    assert store.stats()["memory_hits"] == 1
+
+
+def test_load_shared_index_builds_once_from_snapshot(tmp_path, monkeypatch):
+    import sales_store
+
+    path = str(tmp_path / "sales_index.npz")
+    _index().save(path)
+    monkeypatch.setenv("SALES_MEMORY_INDEX", "1")
+    monkeypatch.setenv("SALES_MEMORY_SNAPSHOT", path)
+    index = sales_store.load_shared_index(str(tmp_path), backend="sqlite")
+    assert index is not None and index.rows == 3
@@ -0,0 +1,129 @@
+"""weather_prefetch: 가짜 기상청 서버로 예열 → 이후 /predict 는 기상청을 부르지 않음"""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import kma_client
+import weather_prefetch
+from fake_kma_server import start_fake_kma_server
+from kma_client import KmaClient
+from weather_prefetch import WeatherPrefetcher
+from weather_store import MemoryWeatherStore
+
+LOC = {"팔달구": {"고등동": {"nx": 60, "ny": 121}, "행궁동": {"nx": 60, "ny": 121}},
+       "장안구": {"파장동": {"nx": 61, "ny": 121}}}
+
+
+@pytest.fixture(scope="module")
+def kma_server():
+    server = start_fake_kma_server()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(kma_client, "KMA_BASE_URL", server.base_url)
+        yield server
+    server.shutdown()
+
+
+def _after_ready(minute=46):
+    """05시 단기예보가 나온 뒤, 다음 예열(매시 45분)까지 한 시간 가까이 남은 시각"""
+    return datetime.now().replace(hour=6, minute=minute, second=0, microsecond=0)
+
+
+def test_village_refetched_before_expiry(kma_server):
+    # 캐시 유효 시간이 다음 예열까지보다 짧으면 하루 한 번이 아니라 매번 다시 받아야 함
+    store = MemoryWeatherStore(ttls={"village": 3600})
+    prefetcher = WeatherPrefetcher(KmaClient(store, service_key="test"), LOC)
+    now = _after_ready()
+
+    prefetcher.run_once(now)
+    assert prefetcher.stats()["village_done_for"] == now.strftime("%Y%m%d")
+    assert prefetcher.village_refreshed == 2
+
+    before = kma_server.calls.get("getVilageFcst", 0)
+    prefetcher.run_once(now)
+    assert prefetcher.village_refreshed == 2
+    assert kma_server.calls.get("getVilageFcst", 0) == before + 2
+
+
+def test_village_kept_while_fresh(kma_server):
+    store = MemoryWeatherStore(ttls={"village": 3 * 3600})
+    prefetcher = WeatherPrefetcher(KmaClient(store, service_key="test"), LOC)
+    now = _after_ready()
+
+    prefetcher.run_once(now)
+    before = kma_server.calls.get("getVilageFcst", 0)
+    prefetcher.run_once(now)
+    assert prefetcher.village_refreshed == 0
+    assert kma_server.calls.get("getVilageFcst", 0) == before
+
+
+def test_village_prefetched_before_daily_release(kma_server):
+    # 05시 발표 전이라도 캐시가 비어 있으면 채워 둠
+    store = MemoryWeatherStore()
+    prefetcher = WeatherPrefetcher(KmaClient(store, service_key="test"), LOC)
+    prefetcher.run_once(datetime.now().replace(hour=3, minute=46, second=0, microsecond=0))
+    assert prefetcher.stats()["village_done_for"] is None
+    assert prefetcher.village_refreshed == 2
+    assert store.expires_at(datetime.now().strftime("%Y%m%d"), 60, 121, "village") is not None
+
+
+@pytest.fixture(scope="module")
+def service(kma_server, tmp_path_factory):
+    """가짜 기상청 + 임시 동 목록으로 app 생성"""
+    workdir = tmp_path_factory.mktemp("service")
+    loc_path = workdir / "suwon_locations.json"
+    loc_path.write_text(json.dumps(LOC, ensure_ascii=False), encoding="utf-8")
+    env = {
+        "LOC_PATH": str(loc_path),
+        "WEATHER_CACHE_BACKEND": "memory",
+        "SALES_STORE_BACKEND": "sqlite",
+        "SALES_STORE_PATH": str(workdir / "sales.sqlite3"),
+        "SALES_MEMORY_INDEX": "0",
+        "MATERIALIZE_PREDICTIONS": "0",
+        "MATERIALIZE_DB": str(workdir / "predictions.sqlite3"),
+        "WEATHER_PREFETCH": "0",
+        "MODEL_LOAD_MODE": "parallel",
+        "LOG_LEVEL": "WARNING",
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        for k, v in env.items():
+            mp.setenv(k, v)
+        import app as app_module
+        app_module.create_app()
+        mp.setattr(app_module, "KMA", KmaClient(app_module.WEATHER_CACHE, service_key="test"))
+        yield app_module
+
+
+def test_predict_after_prefetch_makes_no_kma_call(kma_server, service):
+    WeatherPrefetcher(service.KMA, service.LOC).run_once()
+    before = kma_server.total_calls()
+
+    client = service.app.test_client()
+    for d in range(4):
+        ymd = (datetime.now() + timedelta(days=d)).strftime("%Y-%m-%d")
+        for gu, dongs in LOC.items():
+            for dong in dongs:
+                r = client.post("/predict", data={"gu": gu, "dong": dong, "date": ymd})
+                assert r.status_code == 200
+                html = r.get_data(as_text=True)
+                assert ("초단기실황" if d == 0 else "단기예보") in html
+    assert kma_server.total_calls() == before
+
+
+@pytest.mark.skipif(weather_prefetch.fcntl is None, reason="fcntl 없음")
+def test_only_lock_holder_prefetches(kma_server, tmp_path):
+    lock_path = str(tmp_path / "weather_prefetch.lock")
+    store = MemoryWeatherStore()
+    first = WeatherPrefetcher(KmaClient(store, service_key="test"), LOC, lock_path=lock_path)
+    second = WeatherPrefetcher(KmaClient(store, service_key="test"), LOC, lock_path=lock_path)
+
+    first._safe_run()
+    second._safe_run()
+    assert first.stats()["leader"] and first.runs == 1
+    assert not second.stats()["leader"] and second.runs == 0
+
+    # 예열을 맡은 워커가 끝나면 다른 워커가 이어받음
+    first.stop()
+    second._safe_run()
+    assert second.stats()["leader"] and second.runs == 1
@@ -0,0 +1,469 @@
+"""
+시간대별 모델 학습 파이프라인 (노트북 03_MLModelDevelop 의 시간대 × 모델 학습을 명령 한 번으로)
+- 시간대(1~10) × 모델 종류(XGB, DEEP_MLP, RF) 조합을 프로세스 풀에서 동시에 학습/평가
+- 시간대마다 MAE(AMT)가 가장 낮은 모델을 골라 app.py / model_registry.py 가 읽는 파일을 그대로 생성
+
+생성 파일 (--out, 기본 models/)
+- HOUR_XX/model_{종류}.joblib          모든 후보 모델
+- hour_XX_amt_cnt.joblib                시간대별 최고 모델 (예전 경로, bench_inference.py 도 사용)
+- best_model_by_hour.csv                HOUR, BEST_MODEL
+- results_by_hour.csv                   HOUR, MODEL, MAE, RMSE, R2, SAVE_PATH, MAE_CNT, N_TRAIN, N_TEST
+- eval_XGB_vs_DEEP_by_hour.csv          HOUR, MODEL, MAE, RMSE, R2 (XGB / DEEP_MLP)
+- metrics_summary.csv                   HOUR, MAE_AMT, MAE_CNT, model_path, model_type, n_train, n_test
+- mean_hour.csv / mean_dong_hour.csv / mean_dong_hour_day.csv, weather_beta.json  (fallback_estimator.py)
+- training_report.json                  단계별 시간, 조합별 학습 시간/지표
+--hours / --families 로 일부만 학습하면 목록 파일(csv 4개)은 학습한 (시간대, 모델 종류) 행만 바뀌고
+그 시간대의 최고 모델은 이번 결과와 기존 다른 종류 모델 중에서 다시 고름 (나머지 시간대는 그대로)
+
+모델 입력은 app 이 넘기는 DONG, DAY, TEMP, RAIN (batch_inference.FEATURE_SCHEMAS 첫 번째)
+출력은 [AMT, CNT] 2열
+
+사용법:
+    python train_models.py --csv "data/수원시 한식 동별 데이터.csv"
+    python train_models.py --source store                      # SALES_STORE_BACKEND 저장소에서 읽기
+    python train_models.py --csv data.csv --families XGB,RF --hours 4,5 --workers 4 --out models_new
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.neural_network import MLPRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+try:
+    from xgboost import XGBRegressor
+except ImportError:
+    XGBRegressor = None
+
+try:
+    from threadpoolctl import threadpool_limits  # 선택: 프로세스마다 BLAS 스레드 수 제한
+except ImportError:
+    threadpool_limits = None
+
+warnings.filterwarnings('ignore', category=UserWarning)
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+FAMILIES = ["XGB", "DEEP_MLP", "RF"]
+FEATURES = ["DONG", "DAY", "TEMP", "RAIN"]
+TARGETS = ["AMT", "CNT"]
+# metrics_summary.csv 의 model_type 표기 (노트북과 같게)
+MODEL_TYPE_NAMES = {"XGB": "XGB", "DEEP_MLP": "MLP(Deep)", "RF": "RF"}
+
+
+# =========================
+# 데이터
+# =========================
+def load_training_frame(args):
+    """학습 데이터 → DataFrame(TA_YMD, DONG, HOUR, DAY, AMT, CNT, TEMP, RAIN)"""
+    if args.source == "csv":
+        if not args.csv:
+            raise SystemExit("--csv 경로가 필요합니다 (또는 --source store)")
+        from sales_store import frames_from_csv
+        frames = frames_from_csv(args.csv, args.chunksize)
+    else:
+        from sales_store import create_sales_store
+        frames = create_sales_store().scan(args.chunksize)
+
+    cols = ["TA_YMD", "DONG", "HOUR", "DAY", "AMT", "CNT", "TEMP", "RAIN"]
+    df = pd.concat([f[cols] for f in frames], ignore_index=True)
+    for c in ["HOUR", "DAY", "AMT", "CNT", "TEMP", "RAIN"]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    df["DONG"] = df["DONG"].astype(str)
+    df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=["DONG", "HOUR", "DAY", "AMT", "CNT", "TEMP", "RAIN"])
+    df["HOUR"] = df["HOUR"].astype(int)
+    df["DAY"] = df["DAY"].astype(int)
+    df["RAIN"] = df["RAIN"].clip(lower=0)
+    return df
+
+
+def remove_outliers(df, target_col="AMT", percentile=99):
+    """노트북과 같은 이상치 제거 (시간대 전체 기준 상위 1%)"""
+    if not percentile or percentile >= 100:
+        return df
+    return df[df[target_col] <= df[target_col].quantile(percentile / 100)]
+
+
+def split_hour(sub, test_size, split, random_state):
+    """random: 노트북과 같은 무작위 분할 / time: TA_YMD 순서로 마지막 test_size"""
+    if split == "time":
+        sub = sub.sort_values("TA_YMD")
+        cut = int(len(sub) * (1 - test_size))
+        return sub.iloc[:cut], sub.iloc[cut:]
+    return train_test_split(sub, test_size=test_size, random_state=random_state, shuffle=True)
+
+
+# =========================
+# 모델
+# =========================
+def build_model(family, threads, random_state=42, quick=False):
+    """app 입력(DONG, DAY, TEMP, RAIN) → [AMT, CNT] 파이프라인"""
+    scale = family == "DEEP_MLP"
+    pre = ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["DONG"]),
+            ("num", StandardScaler() if scale else "passthrough", ["DAY", "TEMP", "RAIN"]),
+        ],
+        remainder="drop",
+    )
+
+    if family == "XGB":
+        if XGBRegressor is None:
+            raise RuntimeError("xgboost 가 설치되어 있지 않습니다")
+        model = MultiOutputRegressor(XGBRegressor(
+            n_estimators=100 if quick else 800,
+            learning_rate=0.04,
+            max_depth=7,
+            min_child_weight=3,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            reg_alpha=0.1,
+            reg_lambda=1.5,
+            gamma=0.1,
+            objective="reg:squarederror",
+            random_state=random_state,
+            tree_method="hist",
+            n_jobs=threads,
+        ))
+    elif family == "DEEP_MLP":
+        model = MultiOutputRegressor(MLPRegressor(
+            hidden_layer_sizes=(256, 128, 64),
+            activation="relu",
+            solver="adam",
+            alpha=1e-4,
+            batch_size=128,
+            learning_rate="adaptive",
+            learning_rate_init=5e-4,
+            max_iter=30 if quick else 500,
+            random_state=random_state,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            tol=1e-5,
+        ))
+    elif family == "RF":
+        # 2열 출력을 그대로 지원하므로 MultiOutputRegressor 없이
+        model = RandomForestRegressor(
+            n_estimators=50 if quick else 300,
+            min_samples_leaf=5,
+            max_features=1.0,
+            random_state=random_state,
+            n_jobs=threads,
+        )
+    else:
+        raise ValueError(f"알 수 없는 모델 종류: {family} (가능: {', '.join(FAMILIES)})")
+    return Pipeline([("pre", pre), ("model", model)])
+
+
+def _scores(y_true, pred):
+    y_true = np.asarray(y_true, dtype=np.float64)
+    pred = np.maximum(np.asarray(pred, dtype=np.float64), 0.0)
+    return {
+        "MAE": float(mean_absolute_error(y_true[:, 0], pred[:, 0])),
+        "RMSE": float(np.sqrt(mean_squared_error(y_true[:, 0], pred[:, 0]))),
+        "R2": float(r2_score(y_true[:, 0], pred[:, 0])),
+        "MAE_CNT": float(mean_absolute_error(y_true[:, 1], pred[:, 1])),
+        "RMSE_CNT": float(np.sqrt(mean_squared_error(y_true[:, 1], pred[:, 1]))),
+        "R2_CNT": float(r2_score(y_true[:, 1], pred[:, 1])),
+    }
+
+
+def train_one(hour, family, train, test, out_path, threads, random_state, quick):
+    """
+    프로세스 풀 작업 하나: (시간대, 모델 종류) 학습 → 평가 → 저장
+    threads: 이 작업이 쓸 스레드 수 (XGB/RF n_jobs, BLAS)
+    """
+    timing = {}
+    limits = threadpool_limits(limits=threads) if threadpool_limits else None
+    try:
+        t0 = time.perf_counter()
+        model = build_model(family, threads, random_state, quick)
+        model.fit(train[FEATURES], train[TARGETS].values)
+        timing["fit_sec"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scores = _scores(test[TARGETS].values, model.predict(test[FEATURES]))
+        timing["eval_sec"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        joblib.dump(model, out_path)
+        timing["save_sec"] = time.perf_counter() - t0
+    finally:
+        if limits is not None:
+            limits.unregister()
+    return {
+        "HOUR": hour,
+        "MODEL": family,
+        "path": out_path,
+        "n_train": len(train),
+        "n_test": len(test),
+        "timing": {k: round(v, 3) for k, v in timing.items()},
+        **scores,
+    }
+
+
+# =========================
+# 부가 파일 (fallback_estimator.py 용)
+# =========================
+def write_mean_tables(df, out_dir):
+    df[["HOUR", "AMT", "CNT"]].groupby("HOUR").mean().reset_index() \
+        .to_csv(os.path.join(out_dir, "mean_hour.csv"), index=False, encoding="utf-8-sig")
+    df.groupby(["DONG", "HOUR"])[["AMT", "CNT"]].mean().reset_index() \
+        .to_csv(os.path.join(out_dir, "mean_dong_hour.csv"), index=False, encoding="utf-8-sig")
+    df.groupby(["DONG", "HOUR", "DAY"])[["AMT", "CNT"]].mean().reset_index() \
+        .to_csv(os.path.join(out_dir, "mean_dong_hour_day.csv"), index=False, encoding="utf-8-sig")
+
+
+def write_weather_beta(df, out_dir):
+    """AMT/CNT ~ 절편 + TEMP + RAIN 최소제곱 계수"""
+    X = np.column_stack([np.ones(len(df)), df["TEMP"].values, df["RAIN"].values])
+    beta = {t.lower(): np.linalg.lstsq(X, df[t].values.astype(np.float64), rcond=None)[0].tolist()
+            for t in TARGETS}
+    with open(os.path.join(out_dir, "weather_beta.json"), "w", encoding="utf-8") as f:
+        json.dump(beta, f)
+    return beta
+
+
+# =========================
+# 실행
+# =========================
+def _parse_hours(s):
+    hours = set()
+    for part in s.split(","):
+        part = part.strip()
+        if "-" in part:
+            a, b = part.split("-")
+            hours.update(range(int(a), int(b) + 1))
+        elif part:
+            hours.add(int(part))
+    if not hours or not all(1 <= h <= 10 for h in hours):
+        raise SystemExit("--hours 는 1~10 (예: 1-10, 4,5)")
+    return sorted(hours)
+
+
+def _rel(path, out_dir):
+    return "./models/" + os.path.relpath(path, out_dir).replace(os.sep, "/")
+
+
+def merge_manifest(frame: pd.DataFrame, name: str, out_dir: str, keys) -> pd.DataFrame:
+    """
+    out_dir 에 같은 목록 파일이 있으면 이번 frame 과 keys 가 같은 행만 바꾸고 나머지 행은 그대로 합침
+    예: keys=["HOUR", "MODEL"] → --families XGB 로 다시 학습해도 같은 시간대의 RF / DEEP_MLP 기록은 남음
+    """
+    existing = os.path.join(out_dir, name)
+    if not os.path.exists(existing):
+        return frame
+    old = pd.read_csv(existing, encoding="utf-8-sig")
+    if not all(k in old.columns for k in keys):
+        return frame
+    new_keys = set(frame[keys].itertuples(index=False, name=None))
+    keep = [tuple(r) not in new_keys for r in old[keys].itertuples(index=False, name=None)]
+    return pd.concat([old[keep].reindex(columns=frame.columns), frame], ignore_index=True)
+
+
+def write_manifest(frame: pd.DataFrame, name: str, staging: str, out_dir: str, keys):
+    """
+    목록 파일(csv) 저장: out_dir 에 이미 있으면 keys 가 같은 행만 바꾸고 나머지 행은 그대로 둠
+    → --hours / --families 로 일부만 다시 학습해도 다른 시간대·모델 종류의 기록이 지워지지 않음
+    """
+    frame = merge_manifest(frame, name, out_dir, keys)
+    frame.sort_values(keys).to_csv(os.path.join(staging, name), index=False, encoding="utf-8-sig")
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시간대별 AMT/CNT 모델 학습 (병렬)")
+    parser.add_argument("--source", choices=["csv", "store"], default="csv",
+                        help="csv: --csv 파일 / store: SALES_STORE_BACKEND 저장소 전체")
+    parser.add_argument("--csv", help="학습 CSV (TA_YMD, DONG, HOUR, DAY, AMT, CNT, TEMP, RAIN)")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--out", default=MODELS_DIR, help="결과 폴더 (기본 models/)")
+    parser.add_argument("--families", default=",".join(FAMILIES), help="학습할 모델 종류 (쉼표 구분)")
+    parser.add_argument("--hours", default="1-10")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="동시에 학습할 조합 수 (프로세스)")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="조합 하나가 쓸 스레드 수 (XGB/RF n_jobs), 0이면 코어 수 / workers")
+    parser.add_argument("--split", choices=["random", "time"], default="random")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--outlier-percentile", type=float, default=99)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="반복 횟수를 줄여 빠르게 (파이프라인 확인용)")
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(",") if f.strip()]
+    unknown = [f for f in families if f not in FAMILIES]
+    if unknown:
+        raise SystemExit(f"알 수 없는 모델 종류: {unknown} (가능: {', '.join(FAMILIES)})")
+    hours = _parse_hours(args.hours)
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+
+    out_dir = os.path.abspath(args.out)
+    # 다 만든 뒤 한꺼번에 옮김 → 학습 도중 실행 중인 앱이 반쯤 바뀐 models/ 를 보지 않음
+    staging = os.path.join(out_dir, f".staging_{datetime.now():%Y%m%d_%H%M%S}")
+    os.makedirs(staging, exist_ok=True)
+
+    stages = {}
+    total_start = time.perf_counter()
+    print(f"\n{'='*60}")
+    print(f"🧠 시간대별 모델 학습: 시간대 {hours}, 모델 {families}")
+    print(f"   프로세스 {workers}개 × 스레드 {threads}개, 분할 {args.split}")
+    print(f"{'='*60}")
+
+    # 1) 데이터 읽기
+    t0 = time.perf_counter()
+    df = load_training_frame(args)
+    stages["load_sec"] = time.perf_counter() - t0
+    print(f"✅ 데이터 읽기: {len(df):,}행 ({stages['load_sec']:.1f}s)")
+
+    # 2) 정리 + 분할
+    t0 = time.perf_counter()
+    df = remove_outliers(df, "AMT", args.outlier_percentile)
+    splits = {}
+    for hour in hours:
+        sub = df[df["HOUR"] == hour]
+        if len(sub) < 10:
+            print(f"⚠️  HOUR {hour:02d} 데이터가 너무 적어 건너뜀: {len(sub)}행")
+            continue
+        splits[hour] = split_hour(sub[["TA_YMD"] + FEATURES + TARGETS], args.test_size, args.split, args.random_state)
+    stages["prepare_sec"] = time.perf_counter() - t0
+    print(f"✅ 이상치 제거 후 {len(df):,}행, 분할 ({stages['prepare_sec']:.1f}s)")
+
+    # 3) 학습 (시간대 × 모델 종류)
+    t0 = time.perf_counter()
+    results, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for hour, (train, test) in splits.items():
+            for family in families:
+                path = os.path.join(staging, f"HOUR_{hour:02d}", f"model_{family}.joblib")
+                fut = pool.submit(train_one, hour, family, train, test, path, threads, args.random_state, args.quick)
+                futures[fut] = (hour, family)
+        for fut in as_completed(futures):
+            hour, family = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                failures.append({"HOUR": hour, "MODEL": family, "error": str(e)})
+                print(f"❌ HOUR {hour:02d} {family}: {e}")
+                continue
+            results.append(r)
+            print(f"  ✓ HOUR {hour:02d} {family:8s} MAE {r['MAE']:>12,.0f}  R2 {r['R2']:6.3f}  "
+                  f"MAE_CNT {r['MAE_CNT']:7.2f}  ({r['timing']['fit_sec']:.1f}s)")
+    stages["train_sec"] = time.perf_counter() - t0
+    print(f"✅ 학습 {len(results)}개 조합 ({stages['train_sec']:.1f}s)")
+    if not results:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise SystemExit("학습된 모델이 없습니다")
+
+    # 4) 시간대별 최고 모델 선택 + 목록 파일
+    t0 = time.perf_counter()
+    res = pd.DataFrame(results).sort_values(["HOUR", "MODEL"])
+    final_path = lambda p: os.path.join(out_dir, os.path.relpath(p, staging))
+    res["SAVE_PATH"] = [_rel(final_path(p), out_dir) for p in res["path"]]
+    res = res.rename(columns={"n_train": "N_TRAIN", "n_test": "N_TEST"})
+
+    # 이번에 학습한 (시간대, 모델 종류) 행만 바꾸고 나머지 행은 기존 목록 파일에서 그대로 가져옴
+    merged = write_manifest(res[["HOUR", "MODEL", "MAE", "RMSE", "R2", "SAVE_PATH", "MAE_CNT", "N_TRAIN", "N_TEST"]],
+                            "results_by_hour.csv", staging, out_dir, ["HOUR", "MODEL"])
+    # XGB/DEEP_MLP 를 하나도 학습하지 않은 시간대는 기존 비교 결과를 남겨 둠
+    write_manifest(res[res["MODEL"].isin(["XGB", "DEEP_MLP"])][["HOUR", "MODEL", "MAE", "RMSE", "R2"]],
+                   "eval_XGB_vs_DEEP_by_hour.csv", staging, out_dir, ["HOUR", "MODEL"])
+
+    # 학습한 시간대의 최고 모델은 이번 결과 + 기존 다른 종류 모델(파일이 남아 있는 것) 중에서 다시 고름
+    new_paths = {(r["HOUR"], r["MODEL"]): r["path"] for _, r in res.iterrows()}
+
+    def _model_file(hour, family):
+        path = new_paths.get((hour, family))
+        if path is None:
+            path = os.path.join(out_dir, f"HOUR_{hour:02d}", f"model_{family}.joblib")
+        return path if os.path.exists(path) else None
+
+    cand = merged[merged["HOUR"].isin(res["HOUR"].unique())].copy()
+    cand["HOUR"] = cand["HOUR"].astype(int)
+    cand["path"] = [_model_file(h, m) for h, m in zip(cand["HOUR"], cand["MODEL"])]
+    cand = cand[cand["path"].notna() & cand["MAE"].notna()]
+    best = cand.loc[cand.groupby("HOUR")["MAE"].idxmin()].sort_values("HOUR")
+    for _, row in best.iterrows():
+        shutil.copyfile(row["path"], os.path.join(staging, f"hour_{int(row['HOUR']):02d}_amt_cnt.joblib"))
+
+    write_manifest(best[["HOUR", "MODEL"]].rename(columns={"MODEL": "BEST_MODEL"}),
+                   "best_model_by_hour.csv", staging, out_dir, ["HOUR"])
+    write_manifest(pd.DataFrame({
+        "HOUR": best["HOUR"].values,
+        "MAE_AMT": best["MAE"].values,
+        "MAE_CNT": best["MAE_CNT"].values,
+        "model_path": [f"./models/hour_{int(h):02d}_amt_cnt.joblib" for h in best["HOUR"]],
+        "model_type": [MODEL_TYPE_NAMES.get(m, m) for m in best["MODEL"]],
+        "n_train": best["N_TRAIN"].values,
+        "n_test": best["N_TEST"].values,
+    }), "metrics_summary.csv", staging, out_dir, ["HOUR"])
+    write_mean_tables(df, staging)
+    beta = write_weather_beta(df, staging)
+    stages["select_sec"] = time.perf_counter() - t0
+
+    # 5) models/ 로 옮기기 (모델 파일 먼저, 목록 파일은 마지막 → 앱은 완성된 목록만 봄)
+    t0 = time.perf_counter()
+    moved = []
+    manifests = {"best_model_by_hour.csv", "results_by_hour.csv", "metrics_summary.csv"}
+    files = [os.path.join(root, name) for root, _, names in os.walk(staging) for name in names]
+    files.sort(key=lambda p: os.path.basename(p) in manifests)
+    for src in files:
+        dst = final_path(src)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.replace(src, dst)
+        moved.append(os.path.relpath(dst, out_dir))
+    shutil.rmtree(staging, ignore_errors=True)
+    stages["publish_sec"] = time.perf_counter() - t0
+    stages["total_sec"] = time.perf_counter() - total_start
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": args.csv if args.source == "csv" else "store",
+        "rows": len(df),
+        "hours": hours,
+        "families": families,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "split": args.split,
+        "quick": args.quick,
+        "stages": {k: round(v, 3) for k, v in stages.items()},
+        "best": {int(r["HOUR"]): r["MODEL"] for _, r in best.iterrows()},
+        "weather_beta": beta,
+        "results": [
+            {k: v for k, v in r.items() if k != "path"} for r in sorted(results, key=lambda r: (r["HOUR"], r["MODEL"]))
+        ],
+        "failures": failures,
+        "files": sorted(moved),
+    }
+    with open(os.path.join(out_dir, "training_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 시간대별 최고 모델: " + ", ".join(f"{h}:{m}" for h, m in report["best"].items()))
+    print("⏱️  단계별 시간: " + ", ".join(f"{k}={v:.1f}s" for k, v in stages.items()))
+    print(f"✅ 저장: {out_dir} (training_report.json)")
+    print(f"   실행 중인 앱에 반영: curl -X POST -H 'X-Admin-Token: ...' http://localhost:5000/api/models/reload")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+날씨 캐시 백그라운드 예열
+LOC에 있는 격자(nx, ny)마다 기상청 발표 직후에 미리 조회해서
+/predict가 평상시에는 네트워크를 기다리지 않게 함
+- 초단기실황: 매시 PREFETCH_MINUTE분 (매시 40분경 발표)
+- 단기예보: 오늘 ~ PREFETCH_DAYS일 뒤까지, 05시 발표분이 나온 뒤 하루 한 번 새로 받고
+  그 밖에도 캐시(WEATHER_TTL_VILLAGE, 기본 3시간)가 다음 예열 전에 만료될 격자는 미리 다시 받음
+  → 낮/밤에도 미래 날짜 /predict 가 기상청 응답을 기다리지 않음
+- lock_path: prefork 서버에서 워커마다 스레드가 떠도 파일 잠금(flock)을 잡은 프로세스 하나만 실제로 예열
+  (잡은 워커가 재시작되면 다음 실행 때 다른 워커가 이어받음)
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from kma_client import ForecastMissing
+
+try:
+    import fcntl  # 리눅스/맥: 워커 중 하나만 예열
+except ImportError:
+    fcntl = None
+
+load_dotenv()
+
+PREFETCH_MINUTE = int(os.getenv("WEATHER_PREFETCH_MINUTE", "45"))
+PREFETCH_DAYS = int(os.getenv("WEATHER_PREFETCH_DAYS", "3"))
+# 05시 단기예보를 가져오기 시작하는 시각 (발표 후 API 반영까지 약 10분)
+VILLAGE_READY_HHMM = os.getenv("WEATHER_PREFETCH_VILLAGE_READY", "0515")
+# 다음 예열 시각보다 이만큼(초) 더 남아 있지 않은 단기예보 캐시는 이번에 다시 받음 (예열 소요 시간 여유)
+VILLAGE_REFRESH_MARGIN = float(os.getenv("WEATHER_PREFETCH_VILLAGE_MARGIN", "600"))
+
+
+def grid_cells(loc: dict):
+    """LOC에서 중복 없는 (nx, ny) 목록"""
+    cells = set()
+    for dongs in loc.values():
+        for info in dongs.values():
+            cells.add((int(info["nx"]), int(info["ny"])))
+    return sorted(cells)
+
+
+def next_run_at(now: datetime) -> datetime:
+    """다음 실행 시각 (매시 PREFETCH_MINUTE분)"""
+    run = now.replace(minute=PREFETCH_MINUTE, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(hours=1)
+    return run
+
+
+class WeatherPrefetcher:
+    def __init__(self, kma, loc: dict, days: int = PREFETCH_DAYS, lock_path: str = None):
+        """kma: kma_client.KmaClient, lock_path: 여러 프로세스 중 하나만 예열할 때 쓰는 잠금 파일"""
+        self.kma = kma
+        self.cells = grid_cells(loc)
+        self.days = days
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._village_done_for = None  # 05시 발표분을 마지막으로 새로 받은 날짜
+        self._village_last = {}        # (nx, ny) → 마지막 응답에 없던 첫 날짜 (다음 05시 발표 전까지 다시 받지 않음)
+        self.village_refreshed = 0     # 마지막 실행에서 단기예보를 다시 받은 격자 수
+        self.last_run = None
+        self.last_duration = 0.0
+        self.last_errors = 0
+        self.runs = 0
+        self._on_complete = []
+
+    def on_complete(self, callback):
+        """예열이 한 번 끝날 때마다 호출할 함수 등록 (예: 예측 사전 계산)"""
+        self._on_complete.append(callback)
+
+    # =========================
+    # 한 번 실행
+    # =========================
+    def run_once(self, now: datetime = None):
+        now = now or datetime.now()
+        today = now.strftime("%Y%m%d")
+        start = time.perf_counter()
+        errors = 0
+
+        # 초단기실황: 캐시에 있어도 새로 받아서 덮어씀
+        for nx, ny in self.cells:
+            try:
+                self.kma.get_ultra_now(nx, ny, use_cache=False)
+            except Exception as e:
+                errors += 1
+                print(f"⚠️  예열 실패 (초단기실황 {nx},{ny}): {e}", flush=True)
+
+        # 단기예보: 05시 발표분이 나온 뒤 하루 한 번 전부, 그 외에는 다음 예열 전에 만료될 격자만
+        daily = self._village_done_for != today and now.strftime("%H%M") >= VILLAGE_READY_HHMM
+        dates = [(now + timedelta(days=d)).strftime("%Y%m%d") for d in range(self.days + 1)]
+        village_errors = refreshed = 0
+        if daily:
+            self._village_last.clear()
+        for nx, ny in self.cells:
+            if not daily and not self._village_expiring(nx, ny, dates, now):
+                continue
+            refreshed += 1
+            for d, ymd in enumerate(dates):
+                try:
+                    # 오늘은 새로 받고, 이후 날짜는 같은 응답으로 채워졌으면 캐시 사용
+                    self.kma.get_vilage_day_avg(nx, ny, ymd, use_cache=(d > 0))
+                except ForecastMissing:
+                    # 이후 날짜도 응답에 없음 → 실패로 세지 않고 다음 격자로
+                    self._village_last[(nx, ny)] = ymd
+                    break
+                except Exception as e:
+                    village_errors += 1
+                    print(f"⚠️  예열 실패 (단기예보 {nx},{ny},{ymd}): {e}", flush=True)
+        errors += village_errors
+        self.village_refreshed = refreshed
+        if daily and village_errors == 0:
+            self._village_done_for = today
+
+        self.runs += 1
+        self.last_run = now.isoformat(timespec="seconds")
+        self.last_duration = time.perf_counter() - start
+        self.last_errors = errors
+        print(f"🌤️  날씨 예열 완료: 격자 {len(self.cells)}개, {self.last_duration:.1f}초, 실패 {errors}건", flush=True)
+
+        for cb in self._on_complete:
+            try:
+                cb()
+            except Exception as e:
+                print(f"⚠️  예열 후처리 실패: {e}", flush=True)
+
+    def _village_expiring(self, nx: int, ny: int, dates, now: datetime) -> bool:
+        """dates 중 하나라도 캐시에 없거나 다음 예열(+여유) 전에 만료되면 True"""
+        horizon = time.time() + (next_run_at(now) - now).total_seconds() + VILLAGE_REFRESH_MARGIN
+        missing_from = self._village_last.get((nx, ny))
+        for ymd in dates:
+            if missing_from is not None and ymd >= missing_from:
+                break
+            expires = self.kma.store.expires_at(ymd, nx, ny, "village")
+            if expires is None or expires < horizon:
+                return True
+        return False
+
+    # =========================
+    # 백그라운드 스레드
+    # =========================
+    def is_leader(self) -> bool:
+        """이 프로세스가 예열을 맡았는지 (잠금 파일이 없거나 fcntl 이 없으면 항상 True)"""
+        if self.lock_path is None or fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        f = open(self.lock_path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        # 프로세스가 끝날 때까지 열어 둠 (닫으면 잠금이 풀림)
+        self._lock_file = f
+        return True
+
+    def _loop(self):
+        self._safe_run()
+        while not self._stop.is_set():
+            wait = (next_run_at(datetime.now()) - datetime.now()).total_seconds()
+            if self._stop.wait(max(1.0, wait)):
+                break
+            self._safe_run()
+
+    def _safe_run(self):
+        if not self.is_leader():
+            return
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"⚠️  날씨 예열 중 오류: {e}", flush=True)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="weather-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self):
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "leader": self.lock_path is None or self._lock_file is not None,
+            "cells": len(self.cells),
+            "days": self.days,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_duration_sec": round(self.last_duration, 3),
+            "last_errors": self.last_errors,
+            "village_done_for": self._village_done_for,
+            "village_refreshed": self.village_refreshed,
+        }
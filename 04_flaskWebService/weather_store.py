@@ -0,0 +1,275 @@
+"""
+날씨 캐시 저장소
+- SqliteWeatherStore: WAL 모드 SQLite, 키 단위 원자적 저장, gunicorn 워커끼리 공유 가능
+- MemoryWeatherStore: 프로세스 내부 dict (테스트/단일 프로세스용)
+API 종류(ultra/village/asos)마다 TTL을 따로 둠
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# API 종류별 캐시 유효 시간(초), 0 이하면 만료 없음
+DEFAULT_TTLS = {
+    "ultra": float(os.getenv("WEATHER_TTL_ULTRA", "3600")),        # 초단기실황: 매시 갱신
+    "village": float(os.getenv("WEATHER_TTL_VILLAGE", "10800")),   # 단기예보: 3시간 간격 발표
+    "asos": float(os.getenv("WEATHER_TTL_ASOS", "0")),             # 과거 관측: 바뀌지 않음
+}
+
+
+def _make_key(date_ymd: str, nx: int, ny: int, api_type: str) -> str:
+    return f"{date_ymd}_{nx}_{ny}_{api_type}"
+
+
+class WeatherStore:
+    """날씨 캐시 공통 인터페이스"""
+
+    def __init__(self, ttls=None):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._stat_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _expires_at(self, api_type: str, now: float):
+        ttl = self.ttls.get(api_type, 0)
+        return now + ttl if ttl and ttl > 0 else None
+
+    def _count(self, hit: bool):
+        with self._stat_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, date_ymd: str, nx: int, ny: int, api_type: str):
+        """{"temp", "rain", "cached_at"} 또는 None"""
+        raise NotImplementedError
+
+    def expires_at(self, date_ymd: str, nx: int, ny: int, api_type: str):
+        """만료 시각(time.time() 기준), 만료 없음이면 inf, 없거나 이미 만료면 None (적중/누락 통계에 넣지 않음)"""
+        raise NotImplementedError
+
+    def set(self, date_ymd: str, nx: int, ny: int, api_type: str, temp: float, rain: float):
+        self.set_many([(date_ymd, nx, ny, api_type, temp, rain)])
+
+    def set_many(self, entries):
+        """entries: [(date_ymd, nx, ny, api_type, temp, rain), ...]"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def stats(self):
+        with self._stat_lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "size": len(self),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "ttls": dict(self.ttls),
+            }
+
+
+class MemoryWeatherStore(WeatherStore):
+    """프로세스 내부 dict 캐시"""
+
+    def __init__(self, ttls=None):
+        super().__init__(ttls)
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, date_ymd, nx, ny, api_type):
+        key = _make_key(date_ymd, nx, ny, api_type)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.time():
+                del self._data[key]
+                entry = None
+        self._count(entry is not None)
+        return dict(entry[1]) if entry is not None else None
+
+    def expires_at(self, date_ymd, nx, ny, api_type):
+        with self._lock:
+            entry = self._data.get(_make_key(date_ymd, nx, ny, api_type))
+        if entry is None:
+            return None
+        if entry[0] is None:
+            return math.inf
+        return entry[0] if entry[0] > time.time() else None
+
+    def set_many(self, entries):
+        now = time.time()
+        cached_at = datetime.now().isoformat()
+        with self._lock:
+            for date_ymd, nx, ny, api_type, temp, rain in entries:
+                self._data[_make_key(date_ymd, nx, ny, api_type)] = (
+                    self._expires_at(api_type, now),
+                    {"temp": float(temp), "rain": float(rain), "cached_at": cached_at},
+                )
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class SqliteWeatherStore(WeatherStore):
+    """
+    SQLite(WAL) 캐시
+    스레드마다 커넥션을 따로 열고, 키 하나씩 UPSERT 하므로
+    전체 파일을 다시 쓰지 않고 여러 프로세스가 동시에 읽고 쓸 수 있음
+    """
+
+    def __init__(self, path: str, ttls=None):
+        super().__init__(ttls)
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS weather_cache (
+                cache_key  TEXT PRIMARY KEY,
+                temp       REAL NOT NULL,
+                rain       REAL NOT NULL,
+                cached_at  TEXT NOT NULL,
+                expires_at REAL
+            )
+        """)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # fork 이후에는 부모 프로세스의 커넥션을 쓰지 않고 새로 연결
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, date_ymd, nx, ny, api_type):
+        key = _make_key(date_ymd, nx, ny, api_type)
+        try:
+            row = self._conn().execute(
+                "SELECT temp, rain, cached_at, expires_at FROM weather_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️  날씨 캐시 조회 실패: {e}", flush=True)
+            row = None
+        if row is not None and row[3] is not None and row[3] <= time.time():
+            row = None
+        self._count(row is not None)
+        if row is None:
+            return None
+        return {"temp": row[0], "rain": row[1], "cached_at": row[2]}
+
+    def expires_at(self, date_ymd, nx, ny, api_type):
+        try:
+            row = self._conn().execute(
+                "SELECT expires_at FROM weather_cache WHERE cache_key = ?",
+                (_make_key(date_ymd, nx, ny, api_type),),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        if row[0] is None:
+            return math.inf
+        return row[0] if row[0] > time.time() else None
+
+    def set_many(self, entries):
+        now = time.time()
+        cached_at = datetime.now().isoformat()
+        rows = [
+            (_make_key(d, nx, ny, t), float(temp), float(rain), cached_at, self._expires_at(t, now))
+            for d, nx, ny, t, temp, rain in entries
+        ]
+        conn = self._conn()
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT INTO weather_cache (cache_key, temp, rain, cached_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        temp = excluded.temp,
+                        rain = excluded.rain,
+                        cached_at = excluded.cached_at,
+                        expires_at = excluded.expires_at
+                """, rows)
+        except sqlite3.Error as e:
+            print(f"⚠️  날씨 캐시 저장 실패: {e}", flush=True)
+
+    def purge_expired(self):
+        """만료된 항목 삭제"""
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    "DELETE FROM weather_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                    (time.time(),),
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  날씨 캐시 정리 실패: {e}", flush=True)
+
+    def __len__(self):
+        try:
+            return self._conn().execute("SELECT COUNT(*) FROM weather_cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+def import_legacy_json(store: WeatherStore, json_path: str, rename: bool = True):
+    """예전 weather_cache.json 내용을 새 저장소로 옮김 (rename이면 옮긴 뒤 파일 이름을 바꿔둠)"""
+    if not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  예전 날씨 캐시를 읽을 수 없습니다: {e}")
+        return 0
+
+    entries = []
+    for key, value in legacy.items():
+        parts = key.split("_")
+        if len(parts) != 4:
+            continue
+        date_ymd, nx, ny, api_type = parts
+        try:
+            entries.append((date_ymd, int(nx), int(ny), api_type, float(value["temp"]), float(value["rain"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    store.set_many(entries)
+    if rename:
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except OSError:
+            pass
+    print(f"✅ 예전 날씨 캐시 이전: {len(entries)}개")
+    return len(entries)
+
+
+def create_weather_store(data_dir: str, backend: str = None):
+    """WEATHER_CACHE_BACKEND(sqlite/memory)에 맞는 저장소 생성"""
+    backend = (backend or os.getenv("WEATHER_CACHE_BACKEND", "sqlite")).lower()
+    if backend == "memory":
+        store = MemoryWeatherStore()
+    elif backend == "sqlite":
+        path = os.getenv("WEATHER_CACHE_DB", os.path.join(data_dir, "weather_cache.sqlite3"))
+        store = SqliteWeatherStore(path)
+    else:
+        raise ValueError(f"알 수 없는 WEATHER_CACHE_BACKEND: {backend}")
+    # 메모리 저장소는 재시작하면 비므로 예전 파일을 그대로 둠
+    import_legacy_json(store, os.path.join(data_dir, "weather_cache.json"), rename=(backend == "sqlite"))
+    return store
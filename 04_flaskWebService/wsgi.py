@@ -0,0 +1,12 @@
+"""
+운영 서버 진입점 (prefork WSGI 서버용)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+- import 될 때(preload_app=True 이면 master 에서 한 번) 모델 / 동 목록 / 평균 테이블만 로드
+- DB 풀, SQLite 커넥션, 기상청 세션, 스레드 풀은 fork 후 워커마다 생성 (gunicorn.conf.py 의 post_fork)
+- post_fork 훅이 없는 서버(waitress 등)에서는 워커 자원을 첫 요청 때 생성
+"""
+from app import create_app
+
+app = create_app(prefork=True)